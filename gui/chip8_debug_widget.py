@@ -6,11 +6,12 @@ from PyQt5.QtWidgets import QWidget, QHBoxLayout
 
 from gui.chip8_machine_state_widget import Chip8MachineStateWidget
 from gui.chip8_screen_widget import Chip8ScreenWidget
-from tools.timer import Timer
 from virtualmachine.machine import Machine
+from virtualmachine.rewind import RewindBuffer
 
 
 class Chip8DebugWidget(QWidget):
+    INSTRUCTIONS_PER_FRAME = 10  # timers are decreased every frame
 
     def __init__(self, machine: Machine, sound: bool=False):
         super().__init__()
@@ -20,6 +21,8 @@ class Chip8DebugWidget(QWidget):
         self._sound_support = sound
 
         self._executed_number = 0
+        self._rewind = RewindBuffer(capacity=100 * Chip8DebugWidget.INSTRUCTIONS_PER_FRAME,
+                                    keyframe_interval=Chip8DebugWidget.INSTRUCTIONS_PER_FRAME)
 
         self._key_dict = {
             Qt.Key_1: 1, Qt.Key_2: 2, Qt.Key_3: 3, Qt.Key_4: 0xC,
@@ -29,11 +32,11 @@ class Chip8DebugWidget(QWidget):
         }
 
     def init_ui(self):
-        screen = Chip8ScreenWidget(self._machine.Screen, self)
-        state = Chip8MachineStateWidget(self._machine, self)
+        self._screen = Chip8ScreenWidget(self._machine.Screen, self)
+        self._state = Chip8MachineStateWidget(self._machine, self)
         layout = QHBoxLayout()
-        layout.addWidget(screen)
-        layout.addWidget(state)
+        layout.addWidget(self._screen)
+        layout.addWidget(self._state)
         self.setLayout(layout)
         self.setWindowTitle('Chip 8')
         self.show()
@@ -45,17 +48,39 @@ class Chip8DebugWidget(QWidget):
         if event.key() == Qt.Key_Space:
             self._execute_instruction()
 
+        if event.key() == Qt.Key_Backspace:
+            if event.modifiers() & Qt.ShiftModifier:
+                self._step_back(Chip8DebugWidget.INSTRUCTIONS_PER_FRAME)
+            else:
+                self._step_back(1)
+
     def keyReleaseEvent(self, event: QtGui.QKeyEvent):
         if event.key() in self._key_dict:
             self._machine.Keyboard.key_up(self._key_dict[event.key()])
 
     def _execute_instruction(self):
+        self._rewind.push(self._machine)
         self._machine.execute_next_instruction()
         self._update_sound_delay()
         self._executed_number += 1
+        self._refresh()
+
+    def _step_back(self, instructions: int):
+        # states are pushed before every instruction
+        instructions = min(instructions, len(self._rewind))
+
+        if not self._rewind.rewind(self._machine, instructions):
+            return
+
+        self._executed_number -= instructions
+        self._refresh()
+
+    def _refresh(self):
+        self._screen.refresh()
+        self._state.refresh()
 
     def _update_sound_delay(self):
-        if self._executed_number % 10 != 0:
+        if self._executed_number % Chip8DebugWidget.INSTRUCTIONS_PER_FRAME != 0:
             return
 
         if self._machine.SoundTimer.get_count() != 0 and self._sound_support:
@@ -3,8 +3,8 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPainter, QColor, QFont
 from PyQt5.QtWidgets import QWidget, QDesktopWidget, QLabel
 
-from tools.timer import Timer
 from virtualmachine.machine import Machine
+from parser.disassembler import Disassembler
 from parser.instruction_factory import *
 
 
@@ -17,13 +17,13 @@ class Chip8MachineStateWidget(QWidget):
         super().__init__(parent)
         self._machine = machine
 
-        self._init_ui()
-
-        self._draw_timer = Timer(interval=1.0 / 30)
-        self._draw_timer.add_handler(self._draw_state_event)
-        self._draw_timer.start()
+        self._disassembler = Disassembler(InstructionFactory.shared())
+        self._disassembly = machine.disassembly()
+        self._listing = []
+        self._lines = {}  # address -> index of line of listing
+        self._set_listing(self._disassembly)
 
-        self._instruction_factory = InstructionFactory()
+        self._init_ui()
 
     def _init_ui(self):
         screen_size = QDesktopWidget().screenGeometry(-1)
@@ -45,7 +45,7 @@ class Chip8MachineStateWidget(QWidget):
 
         qp.end()
 
-    def _draw_state_event(self):
+    def refresh(self):
         self.update()
 
     def keyPressEvent(self, a0: QtGui.QKeyEvent):
@@ -67,34 +67,47 @@ class Chip8MachineStateWidget(QWidget):
 
         y = 5 * self._text_size + 4 * t
 
-        for i in range(-10, 11):
-            index = self._machine.PC + i * 2
+        pc = self._machine.PC
+        index = self._find_line(pc)
 
-            if index < 0 or index > self._machine.MemorySize:
-                qp.drawText(0, y, '')
+        for i in range(-10, 11):
+            if index is None or not 0 <= index + i < len(self._listing):
+                y += self._text_size + t
                 continue
 
-            opcode = self._get_opcode_at(index)
-
-            try:
-                instruction = self._instruction_factory.from_opcode(opcode)
+            address, data, text = self._listing[index + i]
+            label = self._disassembly.label(address)
 
-                qp.drawText(0, y, '{}{} : {}, {} {} {}'
-                            .format('-> ' if i == 0 else '    ',
-                                    to_hex(index),
-                                    list(map(to_hex, opcode)),
-                                    instruction.__class__.__name__,
-                                    list((map(to_hex, instruction.arg_registers))),
-                                    to_hex(instruction.arg_constant) if instruction.arg_constant is not None else '-'))
-            except InstructionFactoryError:
-                qp.drawText(0, y, '{}{} : {}, [unknown]'
-                            .format('-> ' if i == 0 else '    ',
-                                    to_hex(index),
-                                    list(map(to_hex, opcode))))
+            qp.drawText(0, y, '{}{} : {}, {}{}'
+                        .format('-> ' if address == pc else '    ',
+                                to_hex(address),
+                                list(map(to_hex, data)),
+                                text,
+                                ' ({})'.format(label) if label is not None else ''))
 
             y += self._text_size + t
 
         qp.drawText(0, y, 'Machine blocked' if self._machine.Block else 'Machine not blocked')
 
-    def _get_opcode_at(self, i):
-        return bytearray([self._machine.Memory[i], self._machine.Memory[i + 1]])
+    def _find_line(self, pc: int):
+        """
+        Return index of line of listing at PC, listing is built again if PC left known code or code was rewritten
+        """
+
+        index = self._lines.get(pc)
+
+        if index is not None and self._listing[index][1] == self._machine.Memory[pc:pc + len(self._listing[index][1])]:
+            return index
+
+        if pc >= self._machine.MemorySize - 1:
+            return None
+
+        entries = [pc] + ([0x200] if pc != 0x200 else [])
+        self._set_listing(self._disassembler.disassemble(self._machine.Memory, 0, entries))
+
+        return self._lines.get(pc)
+
+    def _set_listing(self, disassembly):
+        self._disassembly = disassembly
+        self._listing = disassembly.listing() if disassembly is not None else []
+        self._lines = {line[0]: i for i, line in enumerate(self._listing)}
@@ -1,25 +1,27 @@
 #!/usr/bin/env python3
 from PyQt5 import QtGui
-from PyQt5.QtGui import QPainter, QColor
+from PyQt5.QtCore import QRect, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QImage
 from PyQt5.QtWidgets import QWidget, QDesktopWidget
 
-from tools.timer import Timer
 from virtualmachine.machine import Screen
 
 
 class Chip8ScreenWidget(QWidget):
+    _rows_changed = pyqtSignal(int, int)
+
     def __init__(self, screen: Screen, parent: QWidget=None):
         super().__init__(parent)
         self._screen = screen
         screen_size = QDesktopWidget().screenGeometry(-1)
         self._pixel_width = int(screen_size.width() * 1 / 100)
         self._pixel_height = self._pixel_width
+        self._drawn_generation = None
+        self._colors = [QColor(0, 0, 0).rgb(), QColor(255, 255, 255).rgb()]
 
-        self.init_ui()
+        self._rows_changed.connect(self._update_rows)
 
-        self._draw_timer = Timer(interval=1.0 / 30)
-        self._draw_timer.add_handler(self._draw_screen_event)
-        self._draw_timer.start()
+        self.init_ui()
 
     def init_ui(self):
         self.setFixedSize(self._screen.width() * self._pixel_width,
@@ -29,22 +31,47 @@ class Chip8ScreenWidget(QWidget):
     def paintEvent(self, e):
         qp = QPainter()
         qp.begin(self)
-        self._draw_screen(qp)
+        self._draw_screen(qp, e.rect())
         qp.end()
 
     def keyPressEvent(self, a0: QtGui.QKeyEvent):
         self.parent().keyPressEvent(a0)
 
-    def _draw_screen_event(self):
-        self.update()
+    def refresh(self):
+        """
+        Request repaint of changed rows, it may be called from thread which runs machine
+        """
+
+        generation = self._screen.generation()
+
+        if generation == self._drawn_generation:
+            return
+
+        self._drawn_generation = generation
+        dirty_rows = self._screen.take_dirty_rows()
+
+        if dirty_rows == 0:
+            return
+
+        first_row = (dirty_rows & -dirty_rows).bit_length() - 1
+        last_row = dirty_rows.bit_length() - 1
+
+        self._rows_changed.emit(first_row, last_row)
+
+    def _update_rows(self, first_row, last_row):
+        self.update(QRect(0, first_row * self._pixel_height,
+                          self.width(), (last_row - first_row + 1) * self._pixel_height))
+
+    def _draw_screen(self, qp, area: QRect):
+        # screen is packed by rows with left pixel in most significant bit, it is exactly 1-bit QImage
+        pixels = self._screen.to_bytes()
+        image = QImage(pixels, self._screen.width(), self._screen.height(),
+                       len(pixels) // self._screen.height(), QImage.Format_Mono)
+        image.setColorTable(self._colors)
 
-    def _draw_screen(self, qp):
-        qp.setPen(QColor(0, 0, 0))
-        for y in range(self._screen.height()):
-            for x in range(self._screen.width()):
-                self._draw_pixel(y, x, qp)
+        first_row = max(area.top() // self._pixel_height, 0)
+        last_row = min(area.bottom() // self._pixel_height, self._screen.height() - 1)
+        rows = last_row - first_row + 1
 
-    def _draw_pixel(self, y, x, qp):
-        qp.fillRect(x * self._pixel_width, y * self._pixel_height,
-                    self._pixel_width, self._pixel_height,
-                    QColor(0, 0, 0) if self._screen.get_pixel(y, x) == 0 else QColor(255, 255, 255))
+        qp.drawImage(QRect(0, first_row * self._pixel_height, self.width(), rows * self._pixel_height),
+                     image, QRect(0, first_row, self._screen.width(), rows))
@@ -5,26 +5,27 @@ from PyQt5.QtMultimedia import QSound
 from PyQt5.QtWidgets import QWidget
 
 from gui.chip8_screen_widget import Chip8ScreenWidget
-from tools.timer import Timer
+from tools.scheduler import FrameScheduler
 from virtualmachine.machine import Machine
 
 
 class Chip8Widget(QWidget):
 
-    def __init__(self, machine: Machine, sound: bool=False, instruction_per_second: int = 500):
+    def __init__(self, machine: Machine, sound: bool=False, instruction_per_second: int = 500,
+                 turbo: bool = False, input_log=None):
         super().__init__()
         self._machine = machine
         self.init_ui()
         self._sound = QSound('beep.wav')
         self._sound_support = sound
 
-        self._machine_update_timer = Timer(interval=1.0 / instruction_per_second)
-        self._machine_update_timer.add_handler(self._execute_instruction)
-        self._machine_update_timer.start()
-
-        self._machine_sound_delay_timer = Timer(interval=1.0 / 60)  # 60 Hz
-        self._machine_sound_delay_timer.add_handler(self._update_sound_delay)
-        self._machine_sound_delay_timer.start()
+        # machine is touched only by thread of scheduler
+        self._replay = input_log is not None
+        self._scheduler = FrameScheduler(machine, instruction_per_second, frame_rate=60, turbo=turbo,
+                                         input_log=input_log)
+        self._scheduler.add_frame_handler(self._screen.refresh)
+        self._scheduler.add_frame_handler(self._update_sound)
+        self._scheduler.start()
 
         self._key_dict = {
             Qt.Key_1: 1, Qt.Key_2: 2, Qt.Key_3: 3, Qt.Key_4: 0xC,
@@ -34,23 +35,19 @@ class Chip8Widget(QWidget):
         }
 
     def init_ui(self):
-        screen = Chip8ScreenWidget(self._machine.Screen, self)
+        self._screen = Chip8ScreenWidget(self._machine.Screen, self)
         self.setWindowTitle('Chip 8')
         self.show()
 
     def keyPressEvent(self, event: QtGui.QKeyEvent):
-        if event.key() in self._key_dict:
-            self._machine.Keyboard.key_down(self._key_dict[event.key()])
+        # keys are applied by scheduler at start of frame, so run can be recorded and replayed
+        if event.key() in self._key_dict and not self._replay and not event.isAutoRepeat():
+            self._scheduler.key_down(self._key_dict[event.key()])
 
     def keyReleaseEvent(self, event: QtGui.QKeyEvent):
-        if event.key() in self._key_dict:
-            self._machine.Keyboard.key_up(self._key_dict[event.key()])
-
-    def _execute_instruction(self):
-        self._machine.execute_next_instruction()
+        if event.key() in self._key_dict and not self._replay and not event.isAutoRepeat():
+            self._scheduler.key_up(self._key_dict[event.key()])
 
-    def _update_sound_delay(self):
+    def _update_sound(self):
         if self._machine.SoundTimer.get_count() != 0 and self._sound_support:
             self._sound.play()
-        self._machine.DelayTimer.decrease()
-        self._machine.SoundTimer.decrease()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark - run every ROM headless for fixed amount of cycles and measure speed of machine
+
+Runs are deterministic: Rand is seeded and keys are scripted (or given by input log file)
+For every ROM it reports instructions per second (best of repeats), hit rate of block cache,
+peak memory (measured by tracemalloc in separate run), profile of first instructions:
+time per instruction class, hot addresses and sprites (see virtualmachine.profiler)
+and how many times every superinstruction was executed (see virtualmachine.fusion),
+they are counted in separate run by block engine, because JIT executes fused code only before compilation
+Every measured run gets its own empty cache of decoded programs, so it includes disassembly and compilation
+Results are written into JSON file and may be compared with baseline results file:
+ROM which became slower than baseline by more than tolerance fails the run
+
+Usage:
+python -m headless.benchmark games/* --output benchmark.json --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+from headless.runner import HeadlessRunner
+from virtualmachine.input_log import InputLog, InputEvent
+from virtualmachine.machine import Machine
+from virtualmachine.rom_cache import RomCache
+
+
+def scripted_input_log(cycles: int, period: int = 1000, hold: int = 250) -> InputLog:
+    """
+    Return input log which presses keys 0..F by turns: every period cycles next key is held for hold cycles
+    """
+
+    events = []
+
+    for i, cycle in enumerate(range(period, cycles, period)):
+        events.append(InputEvent(cycle, i % 16, True))
+        events.append(InputEvent(cycle + hold, i % 16, False))
+
+    return InputLog(events)
+
+
+class Benchmark:
+    def __init__(self, cycles: int = 100000, engine: str = Machine.BLOCK_ENGINE, seed: int = 0, input_log=None,
+                 repeat: int = 3, profile_cycles: int = 20000, frequency: int = 500, compatibility: bool = False,
+                 flamegraph: str = None):
+        self._cycles = cycles
+        self._engine = engine
+        self._seed = seed
+        self._input_log = input_log if input_log is not None else scripted_input_log(cycles)
+        self._repeat = repeat
+        self._profile_cycles = profile_cycles
+        self._frequency = frequency
+        self._compatibility = compatibility
+        self._flamegraph = flamegraph  # directory for folded stacks
+
+    def run(self, roms: list) -> dict:
+        return {
+            'cycles': self._cycles,
+            'engine': self._engine,
+            'seed': self._seed,
+            'roms': {os.path.basename(rom): self.run_rom(rom) for rom in roms}
+        }
+
+    def run_rom(self, rom: str) -> dict:
+        best = None
+
+        for _ in range(self._repeat):
+            runner = self._create_runner(rom, self._cycles)
+            machine = runner.create_machine()
+            result = runner.run(machine)
+
+            if best is None or result.Elapsed < best[0].Elapsed:
+                best = (result, machine)
+
+        result, machine = best
+        statistics = machine.cache_statistics()
+        lookups = statistics['hits'] + statistics['misses']
+
+        return {
+            'exit_reason': result.ExitReason,
+            'error': result.Error,
+            'executed': result.Cycles,
+            'elapsed': result.Elapsed,
+            'instructions_per_second': result.instructions_per_second(),
+            'screen_hash': result.ScreenHash,
+            'cache_hit_rate': statistics['hits'] / lookups if lookups != 0 else 0.0,
+            'cached_blocks': statistics['blocks'],
+            'fusions': self._count_fusions(rom),
+            'peak_memory': self._measure_peak_memory(rom),
+            'profile': self._profile(rom)
+        }
+
+    def _create_runner(self, rom: str, cycles: int, engine: str = None) -> HeadlessRunner:
+        return HeadlessRunner(rom, cycles, self._input_log, self._frequency, engine=engine or self._engine,
+                              compatibility=self._compatibility, seed=self._seed, rom_cache=RomCache())
+
+    def _measure_peak_memory(self, rom: str) -> int:
+        runner = self._create_runner(rom, self._cycles)
+
+        tracemalloc.start()
+        try:
+            runner.run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return peak
+
+    def _count_fusions(self, rom: str) -> dict:
+        runner = self._create_runner(rom, self._cycles, Machine.BLOCK_ENGINE)
+        machine = runner.create_machine()
+        runner.run(machine)
+
+        return machine.fusion_statistics()
+
+    def _profile(self, rom: str) -> dict:
+        """
+        Run first profile_cycles instructions with profiler of machine
+        """
+
+        runner = self._create_runner(rom, self._profile_cycles)
+        machine = runner.create_machine()
+        profiler = machine.enable_profiling()
+        runner.run(machine)
+
+        if self._flamegraph is not None:
+            os.makedirs(self._flamegraph, exist_ok=True)
+            profiler.save_folded_stacks(os.path.join(self._flamegraph, os.path.basename(rom) + '.folded'))
+
+        return profiler.report()
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Return list of regressions: ROMs which are slower than in baseline by more than tolerance (part of speed)
+    """
+
+    regressions = []
+
+    for rom, result in sorted(results['roms'].items()):
+        expected = baseline.get('roms', {}).get(rom)
+
+        if expected is None:
+            continue
+
+        if result['instructions_per_second'] < expected['instructions_per_second'] * (1 - tolerance):
+            regressions.append('{}: {:.0f} instructions/s, baseline {:.0f} instructions/s'
+                               .format(rom, result['instructions_per_second'], expected['instructions_per_second']))
+
+    return regressions
+
+
+def total_fusions(results: dict) -> dict:
+    """
+    Return how many times every superinstruction was executed by all ROMs
+    """
+
+    totals = {}
+
+    for result in results['roms'].values():
+        for name, count in result.get('fusions', {}).items():
+            totals[name] = totals.get(name, 0) + count
+
+    return totals
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Benchmark machine on ROMs')
+    parser.add_argument('roms', nargs='*', help='files with chip8 programs (default: games/*)')
+    parser.add_argument('--cycles', help='amount of executing instructions for every rom', type=int, default=100000)
+    parser.add_argument('-e', '--engine', help='execution engine', choices=Machine.ENGINES, default=Machine.BLOCK_ENGINE)
+    parser.add_argument('--seed', help='seed of Rand instruction', type=int, default=0)
+    parser.add_argument('-f', '--frequency', help='instructions per second of emulated time', type=int, default=500)
+    parser.add_argument('-c', '--compatibility', help='enable compatibility mode for store and load instructions',
+                        action='store_true')
+    parser.add_argument('--keys', help='file with key events (default: keys 0..F are pressed by turns)')
+    parser.add_argument('--repeat', help='amount of runs of every rom, the fastest is taken', type=int, default=3)
+    parser.add_argument('--profile-cycles', help='amount of profiled instructions', type=int, default=20000)
+    parser.add_argument('--flamegraph', help='directory for folded stacks of profiled instructions')
+    parser.add_argument('-o', '--output', help='file for results', default='benchmark.json')
+    parser.add_argument('--baseline', help='file with results to compare with')
+    parser.add_argument('--tolerance', help='allowed slowdown against baseline (part of speed)',
+                        type=float, default=0.1)
+    args = parser.parse_args(args)
+
+    roms = args.roms or sorted(os.path.join('games', name) for name in os.listdir('games'))
+    input_log = InputLog.load(args.keys) if args.keys is not None else None
+
+    benchmark = Benchmark(args.cycles, args.engine, args.seed, input_log, args.repeat, args.profile_cycles,
+                          args.frequency, args.compatibility, args.flamegraph)
+    results = benchmark.run(roms)
+
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2, sort_keys=True)
+
+    for rom, result in sorted(results['roms'].items()):
+        print('{:<10} {:>12.0f} instructions/s  cache hits {:6.2%}  peak memory {:>9} B  {}'
+              .format(rom, result['instructions_per_second'], result['cache_hit_rate'], result['peak_memory'],
+                      result['exit_reason']))
+
+    fusions = total_fusions(results)
+    print('Fusions: {}'.format(', '.join('{} {}'.format(name, count) for name, count in sorted(fusions.items()))))
+
+    if args.baseline is None:
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.tolerance)
+
+    for regression in regressions:
+        print('Regression: {}'.format(regression))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
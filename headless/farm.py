@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+"""
+RomFarm - run many (ROM, seed, input log) jobs on all cores by process pool
+
+Every job runs on its own Machine by HeadlessRunner
+Results are streamed back as JSON lines in order of completion,
+they may be sharded into several files by index of job
+
+Usage:
+python -m headless.farm games/* --seeds 100 --cycles 100000 --output results
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+from headless.runner import HeadlessRunner, RunResult
+from virtualmachine.input_log import InputLog
+from virtualmachine.machine import Machine
+
+
+class FarmJob:
+    def __init__(self, index: int, rom: str, seed: int, cycles: int, keys: str = None, frequency: int = 500,
+                 timer_rate: int = 60, engine: str = Machine.BLOCK_ENGINE, compatibility: bool = False):
+        self.Index = index
+        self.Rom = rom
+        self.Seed = seed
+        self.Cycles = cycles
+        self.Keys = keys  # file with input log
+        self.Frequency = frequency
+        self.TimerRate = timer_rate
+        self.Engine = engine
+        self.Compatibility = compatibility
+
+    def run(self) -> dict:
+        result = {
+            'job': self.Index,
+            'rom': self.Rom,
+            'seed': self.Seed,
+            'keys': self.Keys
+        }
+
+        try:
+            input_log = InputLog.load(self.Keys) if self.Keys is not None else None
+            runner = HeadlessRunner(self.Rom, self.Cycles, input_log, self.Frequency, self.TimerRate,
+                                    self.Engine, self.Compatibility, self.Seed)
+            machine = runner.create_machine()
+            run_result = runner.run(machine)
+
+            result.update(run_result.to_dict())
+            result['screen'] = machine.Screen.to_bytes().hex()
+        except Exception as e:
+            result['exit_reason'] = RunResult.ERROR
+            result['error'] = '{}: {}'.format(type(e).__name__, e)
+
+        return result
+
+
+def _run_job(job: FarmJob) -> dict:
+    return job.run()
+
+
+class RomFarm:
+    def __init__(self, processes: int = None, chunk_size: int = 1):
+        self._processes = processes or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+
+    def run(self, jobs):
+        """
+        Yield results of jobs in order of completion
+        """
+
+        with multiprocessing.Pool(self._processes) as pool:
+            for result in pool.imap_unordered(_run_job, jobs, self._chunk_size):
+                yield result
+
+    def run_to_files(self, jobs, output: str, shards: int = 1) -> int:
+        """
+        Write results of jobs into output/results-<shard>.jsonl, shard of job is index of job by modulo of shards
+        Return amount of written results
+        """
+
+        os.makedirs(output, exist_ok=True)
+        files = [open(os.path.join(output, 'results-{:03}.jsonl'.format(shard)), 'w') for shard in range(shards)]
+
+        written = 0
+
+        try:
+            for result in self.run(jobs):
+                shard_file = files[result['job'] % shards]
+                shard_file.write(json.dumps(result, sort_keys=True))
+                shard_file.write('\n')
+                shard_file.flush()
+                written += 1
+        finally:
+            for shard_file in files:
+                shard_file.close()
+
+        return written
+
+
+def create_jobs(roms: list, seeds, cycles: int, keys: list = None, **kwargs) -> list:
+    jobs = []
+
+    for rom in roms:
+        for seed in seeds:
+            for key_file in keys or [None]:
+                jobs.append(FarmJob(len(jobs), rom, seed, cycles, key_file, **kwargs))
+
+    return jobs
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Run ROMs headless under many seeds on all cores')
+    parser.add_argument('roms', nargs='+', help='files with chip8 programs')
+    parser.add_argument('--seeds', help='amount of seeds for every rom', type=int, default=1)
+    parser.add_argument('--first-seed', help='first seed', type=int, default=0)
+    parser.add_argument('--cycles', help='amount of executing instructions for every job', type=int, default=100000)
+    parser.add_argument('--keys', help='file with key events, jobs are created for every file', action='append')
+    parser.add_argument('-f', '--frequency', help='instructions per second of emulated time', type=int, default=500)
+    parser.add_argument('--timer-rate', help='frequency of delay and sound timers', type=int, default=60)
+    parser.add_argument('-e', '--engine', help='execution engine', choices=Machine.ENGINES, default=Machine.BLOCK_ENGINE)
+    parser.add_argument('-c', '--compatibility', help='enable compatibility mode for store and load instructions',
+                        action='store_true')
+    parser.add_argument('-p', '--processes', help='amount of processes (default: amount of cores)', type=int)
+    parser.add_argument('-o', '--output', help='directory for results (default: stdout)')
+    parser.add_argument('--shards', help='amount of result files in output directory', type=int, default=1)
+    args = parser.parse_args(args)
+
+    jobs = create_jobs(args.roms, range(args.first_seed, args.first_seed + args.seeds), args.cycles, args.keys,
+                       frequency=args.frequency, timer_rate=args.timer_rate, engine=args.engine,
+                       compatibility=args.compatibility)
+    farm = RomFarm(args.processes)
+
+    if args.output is not None:
+        farm.run_to_files(jobs, args.output, args.shards)
+        return 0
+
+    for result in farm.run(jobs):
+        sys.stdout.write(json.dumps(result, sort_keys=True))
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""
+HeadlessRunner - run program on machine without gui as fast as possible
+
+Machine runs given amount of cycles (Machine.Cycles: executed instructions and cycles spent on waiting of key)
+Timers are decreased every frequency / timer_rate cycles, so emulated time doesnt depend on host speed
+Keyboard is driven by InputLog keyed by Machine.Cycles, Rand is driven by seeded generator of machine,
+so run is reproducible and replays runs recorded by InputRecorder under FrameScheduler
+Machine.run stops exactly at tick or event boundary, so every engine executes the same instructions between them
+"""
+
+import hashlib
+import time
+
+from virtualmachine.input_log import InputLog
+from virtualmachine.machine import Machine
+from virtualmachine.rom_cache import RomCache
+
+
+class RunResult:
+    CYCLES = 'cycles'  # cycles budget is exhausted
+    EXIT = 'exit'  # program ended
+    BLOCKED = 'blocked'  # machine waits key which will never be pressed
+    ERROR = 'error'  # program raised error
+
+    def __init__(self, exit_reason: str, cycles: int, elapsed: float, machine: Machine, error: str = None):
+        self.ExitReason = exit_reason
+        self.Error = error
+        self.Cycles = cycles
+        self.Elapsed = elapsed
+        self.ScreenHash = hashlib.sha1(machine.Screen.to_bytes()).hexdigest()
+        self.Registers = {
+            'V': list(machine.VRegisters),
+            'I': machine.AddressRegister,
+            'PC': machine.PC,
+            'Stack': list(machine.Stack.items()),
+            'DT': machine.DelayTimer.get_count(),
+            'ST': machine.SoundTimer.get_count()
+        }
+
+    def instructions_per_second(self) -> float:
+        return self.Cycles / self.Elapsed if self.Elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'exit_reason': self.ExitReason,
+            'error': self.Error,
+            'cycles': self.Cycles,
+            'elapsed': self.Elapsed,
+            'instructions_per_second': self.instructions_per_second(),
+            'screen_hash': self.ScreenHash,
+            'registers': self.Registers
+        }
+
+
+class HeadlessRunner:
+    def __init__(self, program, cycles: int, input_log: InputLog = None, frequency: int = 500, timer_rate: int = 60,
+                 engine: str = Machine.BLOCK_ENGINE, compatibility: bool = False, seed: int = None,
+                 rom_cache: RomCache = None):
+        if not isinstance(cycles, int) or cycles < 0:
+            raise ValueError('Cycles must be non-negative integer')
+
+        if frequency <= 0 or timer_rate <= 0:
+            raise ValueError('Frequency and timer rate must be positive')
+
+        self._program = program
+        self._cycles = cycles
+        self._input_log = input_log if input_log is not None else InputLog()
+        self._frequency = frequency
+        self._timer_rate = timer_rate
+        self._engine = engine
+        self._compatibility = compatibility
+        self._seed = seed
+        self._rom_cache = rom_cache  # cache of decoded programs for machines (default: shared cache)
+        self._cycles_done = 0
+
+    def create_machine(self) -> Machine:
+        machine = Machine(compatibility_load_store=self._compatibility, engine=self._engine, seed=self._seed,
+                          rom_cache=self._rom_cache)
+        machine.load_program(self._program)
+
+        return machine
+
+    def run(self, machine: Machine = None) -> RunResult:
+        if machine is None:
+            machine = self.create_machine()
+
+        start_cycles = machine.Cycles
+        start = time.perf_counter()
+
+        try:
+            exit_reason = self._execute(machine)
+            error = None
+        except Exception as e:
+            exit_reason = RunResult.ERROR
+            error = '{}: {}'.format(type(e).__name__, e)
+
+        elapsed = time.perf_counter() - start
+        self._cycles_done = machine.Cycles - start_cycles
+
+        return RunResult(exit_reason, self._cycles_done, elapsed, machine, error)
+
+    def _execute(self, machine: Machine) -> str:
+        events = self._input_log.events()
+        event_index = 0
+        start = machine.Cycles
+        end = start + self._cycles
+        ticks = 0
+        next_tick = start + self._tick_cycle(1)
+
+        while machine.Cycles < end:
+            while event_index < len(events) and events[event_index].Cycle <= machine.Cycles:
+                events[event_index].apply(machine.Keyboard)
+                event_index += 1
+
+            next_event = events[event_index].Cycle if event_index < len(events) else end
+            boundary = min(end, next_tick, next_event)
+
+            if machine.Block and not machine.Keyboard.is_any_key_pressed():
+                if event_index == len(events):
+                    return RunResult.BLOCKED
+
+                # nothing changes until next input event except timers
+                machine.Cycles = boundary
+            else:
+                machine.run(max(boundary - machine.Cycles, 1))
+
+                if machine.ExitCode is not None:
+                    return RunResult.EXIT
+
+            while machine.Cycles >= next_tick:
+                machine.DelayTimer.decrease()
+                machine.SoundTimer.decrease()
+                ticks += 1
+                next_tick = start + self._tick_cycle(ticks + 1)
+
+        return RunResult.CYCLES
+
+    def _tick_cycle(self, tick: int) -> int:
+        return tick * self._frequency // self._timer_rate
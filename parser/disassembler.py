@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+
+"""
+Disassembler - static recursive descent disassembly of program
+
+Code is found by following control flow from entry points (start address by default):
+ Jmp goes to its address, Jsr goes to subroutine and returns after itself, Rts ends path,
+ skips (Skeq, Skne, SkipIfKeyPressed, ...) continue at next and at skipped instruction,
+ Jmi ends path because its target depends on V0 (such code is found by machine at run time)
+Path also ends at zero opcode (end of program for machine), at unknown opcode and at end of program
+Everything which is not reached is data, sprites are data drawn by DrawSprite at addresses loaded by Mvi,
+addresses are carried along control flow graph, so Mvi and DrawSprite may be at different blocks
+
+Disassembly contains:
+ Instructions - decoded instruction by address of code
+ Blocks - control flow graph: ControlFlowBlock by start address
+ Subroutines - entry points of subroutines (targets of Jsr)
+ SpriteRegions - sorted list of (start, end) of sprite data
+
+Usage:
+python -m parser.disassembler games/BRIX
+"""
+
+import argparse
+import sys
+
+from parser.instruction_factory import InstructionFactory
+from parser.opcode_formatter import OpcodeFormatter
+from parser.opcode_unit import OpcodeUnitType
+from virtualmachine.instructions import *
+
+
+class ControlFlowBlock:
+    def __init__(self, start: int, end: int, successors: list, calls: list):
+        self.Start = start
+        self.End = end  # address after last instruction
+        self.Successors = successors  # addresses of blocks control goes to after block
+        self.Calls = calls  # subroutines called by Jsr at the end of block
+
+
+class Disassembly:
+    def __init__(self, program: bytes, start_address: int, instructions: dict, blocks: dict, subroutines: set,
+                 sprite_regions: list):
+        self.Program = program
+        self.StartAddress = start_address
+        self.Instructions = instructions
+        self.Blocks = blocks
+        self.Subroutines = subroutines
+        self.SpriteRegions = sprite_regions
+
+    def is_code(self, address: int) -> bool:
+        return address in self.Instructions
+
+    def is_sprite(self, address: int) -> bool:
+        return any(start <= address < end for start, end in self.SpriteRegions)
+
+    def label(self, address: int) -> str:
+        """
+        Return name of address (sub_XXX for subroutines, loc_XXX for other blocks) or None
+        """
+
+        if address in self.Subroutines:
+            return 'sub_{:03X}'.format(address)
+
+        if address in self.Blocks:
+            return 'loc_{:03X}'.format(address)
+
+        return None
+
+    def listing(self) -> list:
+        """
+        Return lines of program as (address, bytes, text): instructions for code, single bytes for data
+        """
+
+        lines = []
+        address = self.StartAddress
+        end = self.StartAddress + len(self.Program)
+        formatter = OpcodeFormatter()
+
+        while address < end:
+            offset = address - self.StartAddress
+            instruction = self.Instructions.get(address)
+
+            if instruction is not None:
+                lines.append((address, self.Program[offset:offset + 2], format_instruction(instruction, formatter)))
+                address += 2
+                continue
+
+            value = self.Program[offset]
+            if self.is_sprite(address):
+                lines.append((address, self.Program[offset:offset + 1],
+                              'sprite {:08b}'.format(value).replace('0', '.').replace('1', '#')))
+            else:
+                lines.append((address, self.Program[offset:offset + 1], 'data 0x{:02X}'.format(value)))
+
+            address += 1
+
+        return lines
+
+
+def format_instruction(instruction: Instruction, formatter: OpcodeFormatter = None) -> str:
+    """
+    Return text of instruction like 'DrawSprite V1, V2, 0x5'
+    """
+
+    formatter = formatter or OpcodeFormatter()
+    opcode_format = instruction.opcode_format()
+    opcode = bytes(_encode(instruction).to_bytes(2, 'big'))
+    constant_width = max(opcode_format.lower().count('n'), 1)
+
+    operands = ['V{:X}'.format(unit.Value) if unit.Type == OpcodeUnitType.REGISTER
+                else '0x{:0{}X}'.format(unit.Value, constant_width)
+                for unit in formatter.parse_by_format(opcode, opcode_format)]
+
+    return ' '.join([type(instruction).__name__, ', '.join(operands)]).rstrip()
+
+
+def _encode(instruction: Instruction) -> int:
+    opcode = 0
+
+    for i, digit in enumerate(instruction.opcode_format().lower()):
+        shift = 12 - 4 * i
+
+        if digit == 'x':
+            opcode |= instruction.x << shift
+        elif digit == 'y':
+            opcode |= instruction.y << shift
+        elif digit != 'n':
+            opcode |= int(digit, 16) << shift
+
+    constant = instruction.arg_constant
+    return opcode | (constant if constant is not None else 0)
+
+
+class Disassembler:
+    _skip_types = (Skeq, Skne, SkeqRegister, SkneRegisters, SkipIfKeyPressed, SkipIfKeyNotPressed)
+
+    def __init__(self, instruction_factory: InstructionFactory = None):
+        self._decode_table = (instruction_factory or InstructionFactory.shared()).decode_table()
+
+    def disassemble(self, program, start_address: int = 0x200, entries: list = None) -> Disassembly:
+        """
+        Disassemble program placed at start_address from given entry points (start_address by default)
+        """
+
+        program = bytes(program)
+        end = start_address + len(program)
+        instructions = {}
+        successors = {}  # address -> addresses control goes to after instruction
+        subroutines = set()
+        leaders = set()
+
+        entries = list(entries) if entries is not None else [start_address]
+        pending = list(entries)
+        leaders.update(pending)
+
+        while len(pending) != 0:
+            address = pending.pop()
+
+            while start_address <= address < end - 1 and address not in instructions:
+                offset = address - start_address
+                opcode = (program[offset] << 8) | program[offset + 1]
+                instruction = self._decode_table[opcode]
+
+                if opcode == 0 or instruction is None:
+                    break
+
+                instructions[address] = instruction
+                following = self._successors(instruction, address)
+                successors[address] = following
+
+                if isinstance(instruction, Jsr):
+                    subroutines.add(instruction.nnn)
+                    leaders.add(address + 2)
+                    pending.append(instruction.nnn)
+
+                if following != [address + 2]:
+                    leaders.update(following)
+                    leaders.add(address + 2)
+                    pending.extend(following[1:])
+
+                if len(following) == 0:
+                    break
+
+                address = following[0]
+
+        leaders.update(subroutines)
+        blocks = self._build_blocks(instructions, successors, leaders)
+
+        return Disassembly(program, start_address, instructions, blocks, subroutines,
+                           self._find_sprites(program, start_address, instructions, blocks,
+                                              entries + sorted(subroutines)))
+
+    def _successors(self, instruction: Instruction, address: int) -> list:
+        if isinstance(instruction, Jmp):
+            return [instruction.nnn]
+
+        if isinstance(instruction, (Rts, Jmi)):
+            return []
+
+        if isinstance(instruction, Disassembler._skip_types):
+            return [address + 2, address + 4]
+
+        return [address + 2]
+
+    @staticmethod
+    def _build_blocks(instructions: dict, successors: dict, leaders: set) -> dict:
+        blocks = {}
+
+        for start in sorted(address for address in leaders if address in instructions):
+            address = start
+
+            while successors[address] == [address + 2] and not isinstance(instructions[address], Jsr) \
+                    and address + 2 in instructions and address + 2 not in leaders:
+                address += 2
+
+            instruction = instructions[address]
+            calls = [instruction.nnn] if isinstance(instruction, Jsr) else []
+            blocks[start] = ControlFlowBlock(start, address + 2, successors[address], calls)
+
+        return blocks
+
+    @staticmethod
+    def _address_register_values(instructions: dict, blocks: dict, entries: list) -> dict:
+        """
+        Return possible values of address register at start of every reached block:
+        set of addresses loaded by Mvi or None if value is unknown
+        Values flow along edges of control flow graph until they stop changing,
+        register is unknown at entry points and after calls of subroutines
+        """
+
+        values = {entry: None for entry in entries if entry in blocks}
+        pending = list(values)
+
+        while len(pending) != 0:
+            block = blocks[pending.pop()]
+            value = values[block.Start]
+
+            for address in range(block.Start, block.End, 2):
+                value = Disassembler._address_register_after(instructions[address], value)
+
+            if len(block.Calls) != 0:
+                value = None
+
+            for successor in block.Successors:
+                if successor not in blocks:
+                    continue
+
+                if successor not in values:
+                    merged = value
+                elif values[successor] is None or value is None:
+                    merged = None
+                else:
+                    merged = values[successor] | value
+
+                if successor not in values or merged != values[successor]:
+                    values[successor] = merged
+                    pending.append(successor)
+
+        return values
+
+    @staticmethod
+    def _address_register_after(instruction: Instruction, value):
+        if isinstance(instruction, Mvi):
+            return frozenset([instruction.nnn])
+
+        if isinstance(instruction, (Adi, LoadChar, StoreRegisters, LoadRegisters)):
+            return None
+
+        return value
+
+    @staticmethod
+    def _find_sprites(program: bytes, start_address: int, instructions: dict, blocks: dict, entries: list) -> list:
+        end = start_address + len(program)
+        regions = []
+
+        for start, value in Disassembler._address_register_values(instructions, blocks, entries).items():
+            block = blocks[start]
+
+            for address in range(block.Start, block.End, 2):
+                instruction = instructions[address]
+
+                if isinstance(instruction, DrawSprite) and instruction.n != 0 and value is not None:
+                    for sprite_address in value:
+                        if start_address <= sprite_address and sprite_address + instruction.n <= end:
+                            regions.append((sprite_address, sprite_address + instruction.n))
+
+                value = Disassembler._address_register_after(instruction, value)
+
+        merged = []
+        for start, stop in sorted(regions):
+            if len(merged) != 0 and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+            else:
+                merged.append((start, stop))
+
+        return [(start, stop) for start, stop in merged
+                if not any(address in instructions for address in range(start - 1, stop))]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Disassemble chip8 program')
+    parser.add_argument('program', help='file with chip8 program')
+    parser.add_argument('--start', help='address of program', type=lambda value: int(value, 0), default=0x200)
+    args = parser.parse_args(args)
+
+    with open(args.program, 'rb') as program_file:
+        disassembly = Disassembler().disassemble(program_file.read(), args.start)
+
+    for address, data, text in disassembly.listing():
+        label = disassembly.label(address)
+        if label is not None:
+            print('{}:'.format(label))
+
+        print('    {:03X}  {:<4}  {}'.format(address, data.hex().upper(), text))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
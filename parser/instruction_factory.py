@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
-from parser.opcode_formatter import *
-from parser.opcode_unit import *
+import struct
+import threading
+
 from virtualmachine.instructions import *
 
 
@@ -11,52 +12,161 @@ class InstructionFactoryError(Exception):
 
 
 class InstructionFactory:
+    """
+    Decode table is a list of 0x10000 items indexed by integer opcode.
+    Item is decoded instruction or UNKNOWN_INSTRUCTION for opcodes which do not correspond to any instruction.
+    Table is built once per process and shared by all factories
+    Factory is stateless, so single factory returned by shared() may be used by all machines and threads
+    Saved decode table contains only data: header, signature of instructions set and index of instruction class
+    for every opcode, instructions are created by their classes on load
+    """
+
+    UNKNOWN_INSTRUCTION = None
+
+    _DECODE_TABLE_MAGIC = b'CH8T'
+    _DECODE_TABLE_VERSION = 3
+    _DECODE_TABLE_HEADER = struct.Struct('>4sHI')  # magic, version, length of signature
+    _UNKNOWN_INDEX = 0xFF
+
+    _decode_table = None
+    _shared = None
+    _lock = threading.Lock()
+
     def __init__(self):
-        self._opcode_formatter = OpcodeFormatter()
         self._instructions = InstructionFactory._get_instructions_list()
-        self._cache = dict()
+
+    @staticmethod
+    def shared():
+        """
+        Return factory shared by whole process
+        """
+
+        if InstructionFactory._shared is None:
+            with InstructionFactory._lock:
+                if InstructionFactory._shared is None:
+                    InstructionFactory._shared = InstructionFactory()
+
+        return InstructionFactory._shared
 
     def from_opcode(self, opcode: bytearray) -> Instruction:
         if not isinstance(opcode, bytearray) and not isinstance(opcode, bytes):
             raise TypeError('opcode must be byte-sequence object')
 
-        tupled = tuple(opcode)
-        if tupled not in self._cache:
-            self._cache[tupled] = self._get_instruction_by_opcode(opcode)
+        instruction = self.decode_table()[(opcode[0] << 8) | opcode[1]]
 
-        return self._cache[tupled]
+        if instruction is InstructionFactory.UNKNOWN_INSTRUCTION:
+            raise InstructionFactoryError('Unknown instruction {}'.format(list(map(hex, opcode))))
+
+        return instruction
 
     def get_instructions_classes(self):
         return self._instructions
 
-    def _get_instruction_by_opcode(self, opcode: bytearray):
-        instructions = []
+    def decode_table(self) -> list:
+        if InstructionFactory._decode_table is None:
+            with InstructionFactory._lock:
+                if InstructionFactory._decode_table is None:
+                    InstructionFactory._decode_table = self._build_decode_table()
 
-        for instruction in self._instructions:
-            if self._opcode_formatter.is_opcode_valid(opcode, instruction.opcode_format()):
-                instructions.append(instruction)
+        return InstructionFactory._decode_table
 
-        if len(instructions) == 0:
-            raise InstructionFactoryError('Unknown instruction {}'.format(list(map(hex, opcode))))
+    def save_decode_table(self, filename: str):
+        indices = {instruction_type: i for i, instruction_type in enumerate(self._instructions)}
+        table = bytes(InstructionFactory._UNKNOWN_INDEX if instruction is InstructionFactory.UNKNOWN_INSTRUCTION
+                      else indices[type(instruction)] for instruction in self.decode_table())
+        signature = self._instructions_signature()
 
-        if len(instructions) > 1:
-            raise InstructionFactoryError('Ambigious opcode: {}'.format(list(map(hex, opcode))))
+        with open(filename, 'wb') as table_file:
+            table_file.write(InstructionFactory._DECODE_TABLE_HEADER.pack(
+                InstructionFactory._DECODE_TABLE_MAGIC, InstructionFactory._DECODE_TABLE_VERSION, len(signature)))
+            table_file.write(signature)
+            table_file.write(table)
 
-        return self._create_instruction_from_opcode(instructions[0], opcode)
+    def load_decode_table(self, filename: str) -> bool:
+        """
+        Load decode table saved by save_decode_table
+        Return False if file is missing, damaged or was saved for another set of instructions
+        """
 
-    def _create_instruction_from_opcode(self, instruction_type: type(Instruction), opcode: bytearray):
-        instruction = instruction_type()
+        header = InstructionFactory._DECODE_TABLE_HEADER
 
-        opcode_units = self._opcode_formatter.parse_by_format(opcode, instruction_type.opcode_format())
+        try:
+            with open(filename, 'rb') as table_file:
+                data = table_file.read()
+        except OSError:
+            return False
 
-        for unit in opcode_units:
-            if unit.Type == OpcodeUnitType.REGISTER:
-                instruction.arg_registers.append(unit.Value)
+        if len(data) < header.size:
+            return False
 
-            if unit.Type == OpcodeUnitType.CONSTANT:
-                instruction.arg_constant = unit.Value
+        magic, version, signature_size = header.unpack_from(data)
+        signature = data[header.size:header.size + signature_size]
+        indices = data[header.size + signature_size:]
 
-        return instruction
+        if magic != InstructionFactory._DECODE_TABLE_MAGIC or version != InstructionFactory._DECODE_TABLE_VERSION \
+                or signature != self._instructions_signature() or len(indices) != 0x10000:
+            return False
+
+        fixed_bits = [InstructionFactory._get_fixed_bits(instruction_type.opcode_format().lower())
+                      for instruction_type in self._instructions]
+        table = [InstructionFactory.UNKNOWN_INSTRUCTION] * 0x10000
+
+        for opcode, index in enumerate(indices):
+            if index == InstructionFactory._UNKNOWN_INDEX:
+                continue
+
+            # class must exist and its format must match opcode
+            if index >= len(self._instructions) or opcode & fixed_bits[index][0] != fixed_bits[index][1]:
+                return False
+
+            table[opcode] = self._instructions[index].from_value(opcode)
+
+        InstructionFactory._decode_table = table
+        return True
+
+    def _instructions_signature(self) -> bytes:
+        return '\n'.join('{} {}'.format(instruction.__name__, instruction.opcode_format())
+                         for instruction in self._instructions).encode()
+
+    def _build_decode_table(self):
+        table = [InstructionFactory.UNKNOWN_INSTRUCTION] * 0x10000
+
+        for instruction_type in self._instructions:
+            opcode_format = instruction_type.opcode_format().lower()
+            fixed_mask, fixed_value = InstructionFactory._get_fixed_bits(opcode_format)
+            free_mask = ~fixed_mask & 0xFFFF
+
+            # enumerate all opcodes with fixed nibbles equal to format ones
+            free = free_mask
+            while True:
+                value = fixed_value | free
+
+                if table[value] is not InstructionFactory.UNKNOWN_INSTRUCTION:
+                    raise InstructionFactoryError('Ambigious opcode: {}'.format(hex(value)))
+
+                table[value] = instruction_type.from_value(value)
+
+                if free == 0:
+                    break
+                free = (free - 1) & free_mask
+
+        return table
+
+    @staticmethod
+    def _get_fixed_bits(opcode_format: str):
+        mask = 0
+        value = 0
+
+        for i in range(4):
+            shift = 12 - 4 * i
+
+            if opcode_format[i] in {'x', 'y', 'n'}:
+                continue
+
+            mask |= 0xF << shift
+            value |= int(opcode_format[i], 16) << shift
+
+        return mask, value
 
     @staticmethod
     def _get_instructions_list():
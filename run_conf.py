@@ -1,41 +1,94 @@
 import sys
 import argparse
+import json
 
-from PyQt5.QtWidgets import QApplication
-
-from gui.chip8_debug_widget import Chip8DebugWidget
-from gui.chip8_widget import Chip8Widget
+from parser.instruction_factory import InstructionFactory
 from virtualmachine.machine import Machine
 
 
 class RunConfiguration:
-    def __init__(self, filename: str, debug: bool, sound: bool, compatibility: bool, instructions_per_second):
+    def __init__(self, filename: str, debug: bool, sound: bool, compatibility: bool, instructions_per_second,
+                 decode_table: str = None, engine: str = Machine.INTERPRETER_ENGINE, headless: bool = False,
+                 cycles: int = 100000, keys: str = None, timer_rate: int = 60, turbo: bool = False,
+                 seed: int = None, record: str = None):
         self._filename = filename
         self._debug = debug
         self._sound = sound
         self._compatibility = compatibility
         self._instructions_per_second = instructions_per_second
+        self._decode_table = decode_table
+        self._engine = engine
+        self._headless = headless
+        self._cycles = cycles
+        self._keys = keys
+        self._timer_rate = timer_rate
+        self._turbo = turbo
+        self._seed = seed
+        self._record = record
 
     def run(self):
-        machine = Machine(compatibility_load_store=self._compatibility)
+        if self._decode_table is not None:
+            self._prepare_decode_table()
+
+        if self._headless:
+            return self._run_headless()
+
+        return self._run_gui()
+
+    def _run_gui(self):
+        from PyQt5.QtWidgets import QApplication
+
+        from gui.chip8_debug_widget import Chip8DebugWidget
+        from gui.chip8_widget import Chip8Widget
+        from virtualmachine.input_log import InputLog, InputRecorder
+
+        machine = Machine(compatibility_load_store=self._compatibility, engine=self._engine, seed=self._seed)
         machine.load_program(self._filename)
 
+        recorder = InputRecorder(machine) if self._record is not None else None
+        input_log = InputLog.load(self._keys) if self._keys is not None else None
+
         app = QApplication(sys.argv)
 
         if not self._debug:
-            chip8 = Chip8Widget(machine, self._sound, self._instructions_per_second)
+            chip8 = Chip8Widget(machine, self._sound, self._instructions_per_second, self._turbo, input_log)
         else:
             chip8 = Chip8DebugWidget(machine, self._sound)
 
         chip8.show()
-        return app.exec_()
+        code = app.exec_()
+
+        if recorder is not None:
+            recorder.log().save(self._record)
+
+        return code
+
+    def _run_headless(self):
+        from headless.runner import HeadlessRunner, RunResult
+        from virtualmachine.input_log import InputLog
+
+        input_log = InputLog.load(self._keys) if self._keys is not None else None
+
+        runner = HeadlessRunner(self._filename, self._cycles, input_log, self._instructions_per_second,
+                                self._timer_rate, self._engine, self._compatibility, self._seed)
+        result = runner.run()
+
+        print(json.dumps(result.to_dict(), indent=2, sort_keys=True))
+
+        return 1 if result.ExitReason == RunResult.ERROR else 0
+
+    def _prepare_decode_table(self):
+        factory = InstructionFactory.shared()
+
+        if not factory.load_decode_table(self._decode_table):
+            factory.save_decode_table(self._decode_table)
 
     @staticmethod
     def from_args():
 
         desc = '''
 This is the CHIP-8 interpreter
-It usages PyQt5, so you should install it
+It usages PyQt5, so you should install it (it is not needed in headless mode)
 
 Keyboard:
 CHIP-8 keyboard    real keyboard 
@@ -49,6 +102,7 @@ CHIP-8 keyboard    real keyboard
 | A | 0 | B | F |  | Z | X | C | V |
 +---------------+  +---------------+
 Space usages as execute next instruction in debug mode
+Backspace steps back by one instruction, Shift+Backspace steps back by one frame (10 instructions) in debug mode
 
 Written by rkhapov (r.khapov@yandex.ru)
 '''
@@ -61,8 +115,30 @@ Written by rkhapov (r.khapov@yandex.ru)
                             action='store_true')
         parser.add_argument('-f', '--frequency', help='frequency: amount of executing instructions per second',
                             type=int, default=500)
+        parser.add_argument('-t', '--decode-table', help='file to load precomputed decode table from '
+                                                         '(it will be created if does not exist)')
+        parser.add_argument('-e', '--engine', help='execution engine (default: interpreter, block in headless mode)',
+                            choices=Machine.ENGINES)
+        parser.add_argument('--headless', help='run program without gui and print final state of machine',
+                            action='store_true')
+        parser.add_argument('--cycles', help='amount of executing instructions in headless mode',
+                            type=int, default=100000)
+        parser.add_argument('--keys', '--replay', help='file with key events to replay (like "100:+A 250:-A"), '
+                                                       'keyboard is ignored in gui', dest='keys')
+        parser.add_argument('--record', help='file to record key events into (gui mode)')
+        parser.add_argument('--seed', help='seed of Rand instruction (default: random)', type=int)
+        parser.add_argument('--timer-rate', help='frequency of delay and sound timers in headless mode',
+                            type=int, default=60)
+        parser.add_argument('--turbo', help='run as fast as possible, timers still go by emulated time '
+                                            'and display skips frames', action='store_true')
         args = parser.parse_args()
 
         filename = args.filename
 
-        return RunConfiguration(filename, args.debug, args.sound, args.compatibility, args.frequency)
+        engine = args.engine
+        if engine is None:
+            engine = Machine.BLOCK_ENGINE if args.headless else Machine.INTERPRETER_ENGINE
+
+        return RunConfiguration(filename, args.debug, args.sound, args.compatibility, args.frequency,
+                                args.decode_table, engine, args.headless, args.cycles, args.keys, args.timer_rate,
+                                args.turbo, args.seed, args.record)
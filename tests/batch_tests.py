@@ -0,0 +1,142 @@
+import random
+import unittest
+from virtualmachine.machine import Machine
+
+try:
+    import numpy
+    from virtualmachine.batch import BatchMachine
+except ImportError:
+    numpy = None
+
+
+@unittest.skipUnless(numpy, 'numpy is not installed')
+class BatchMachineTests(unittest.TestCase):
+
+    @staticmethod
+    def _create_machine(program, seed):
+        generator = random.Random(seed)
+
+        machine = Machine()
+        machine.load_program(program)
+
+        for i in range(16):
+            machine.VRegisters[i] = generator.choice([0, 1, 0x7F, 0x80, 0xFF, generator.randint(0, 255)])
+        machine.VRegisters[0xE] = generator.randint(0, 15)  # register for LoadChar and keys, it is never changed
+        machine.AddressRegister = 0x300 + generator.randint(0, 0x100)
+        machine.DelayTimer.set_count(generator.randint(0, 255))
+        machine.Keyboard.key_down(generator.randint(0, 15))
+
+        return machine
+
+    @staticmethod
+    def _get_state(machine):
+        return (bytes(machine.VRegisters), machine.PC, machine.AddressRegister, bytes(machine.Memory),
+                list(machine.Stack.items()), machine.DelayTimer.get_count(), machine.SoundTimer.get_count(),
+                machine.Block, machine.Screen.to_bytes())
+
+    @staticmethod
+    def _opcodes():
+        for x in [0, 1, 2, 0xF]:
+            for y in [0, 2, 0xE, 0xF]:
+                yield 0x5000 | (x << 8) | (y << 4)
+                yield 0x9000 | (x << 8) | (y << 4)
+                yield 0xD003 | (x << 8) | (y << 4)
+
+                for n in [0, 1, 2, 3, 4, 5, 6, 7, 0xE]:
+                    yield 0x8000 | (x << 8) | (y << 4) | n
+
+            for nn in [0, 1, 0x7F, 0x80, 0xFF]:
+                yield 0x3000 | (x << 8) | nn
+                yield 0x4000 | (x << 8) | nn
+                yield 0x6000 | (x << 8) | nn
+                yield 0x7000 | (x << 8) | nn
+                yield 0xC000 | (x << 8) | nn
+
+            for nn in [0x07, 0x15, 0x18, 0x1E, 0x33, 0x55]:
+                yield 0xF000 | (x << 8) | nn
+
+        yield 0xF265
+        yield 0xEE9E
+        yield 0xEEA1
+        yield 0xFE29
+        yield 0x00E0
+        yield 0xA456
+
+    def test_diverged_machines_should_give_same_state_as_machine(self):
+        generator = random.Random(7)
+        opcodes = list(BatchMachineTests._opcodes())
+
+        for _ in range(20):
+            program = bytearray()
+            for _ in range(generator.randint(1, 12)):
+                program += generator.choice(opcodes).to_bytes(2, 'big')
+            program += bytes([0x22, 0x00 + len(program) + 4, 0x12, 0x00, 0x00, 0xEE])
+
+            machines = [BatchMachineTests._create_machine(program, seed) for seed in range(8)]
+            for seed, machine in enumerate(machines):
+                machine.Random.seed(seed)
+            batch = BatchMachine(len(machines))
+            for i, machine in enumerate(machines):
+                batch.set_machine(i, machine)
+
+            for _ in range(30):
+                batch.step()
+                for machine in machines:
+                    machine.execute_next_instruction()
+
+            for i, machine in enumerate(machines):
+                self.assertEqual(BatchMachineTests._get_state(batch.machine(i)),
+                                 BatchMachineTests._get_state(machine), msg=program.hex())
+
+    def test_rand_should_give_different_values_to_machines(self):
+        batch = BatchMachine(64, seed=1)
+        batch.load_program(bytearray([0xC0, 0x0F]))
+
+        self.assertEqual(batch.step(), 64)
+
+        self.assertTrue((batch.VRegisters[:, 0] <= 0x0F).all())
+        self.assertGreater(len(numpy.unique(batch.VRegisters[:, 0])), 1)
+        self.assertTrue((batch.PC == 0x202).all())
+
+    def test_rand_should_give_same_values_as_machine_with_same_seed(self):
+        program = bytearray([0xC0, 0xFF, 0xC1, 0x3F, 0x12, 0x00])
+        batch = BatchMachine(4, seed=10)
+        batch.load_program(program)
+        batch.run(30)
+
+        for i in range(4):
+            machine = Machine(seed=10 + i)
+            machine.load_program(program)
+            for _ in range(30):
+                machine.execute_next_instruction()
+
+            self.assertEqual(batch.machine(i).VRegisters, machine.VRegisters)
+
+    def test_load_program_should_raise_error_if_program_does_not_fit(self):
+        batch = BatchMachine(2, memory_size=0x204)
+
+        with self.assertRaisesRegex(ValueError, 'does not fit'):
+            batch.load_program(bytearray(6))
+
+    def test_machine_should_halt_at_end_of_program(self):
+        batch = BatchMachine(2)
+        batch.load_program(bytearray([0x60, 0x01]))
+
+        self.assertEqual(batch.run(10), 2)
+        self.assertTrue(batch.Halted.all())
+        self.assertEqual(batch.machine(0).ExitCode, 0)
+        self.assertEqual(batch.Errors, [None, None])
+
+    def test_wrong_instruction_should_halt_only_its_machine(self):
+        batch = BatchMachine(2)
+        batch.load_program(bytearray([0x30, 0x01,  # skip if V0 == 1
+                                      0xFF, 0xFF,  # unknown instruction
+                                      0x12, 0x04]))  # jump at itself
+        batch.VRegisters[1, 0] = 1
+
+        batch.run(10)
+
+        self.assertTrue(batch.Halted[0])
+        self.assertIsNotNone(batch.Errors[0])
+        self.assertFalse(batch.Halted[1])
+        self.assertEqual(batch.PC[1], 0x204)
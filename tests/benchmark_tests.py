@@ -0,0 +1,88 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from headless.benchmark import Benchmark, compare, main, scripted_input_log, total_fusions
+from virtualmachine.rom_cache import RomCache
+
+
+class BenchmarkTests(unittest.TestCase):
+    _program = bytes([0xC1, 0xFF,  # V1 = rand
+                      0x71, 0x01,  # V1 += 1
+                      0x12, 0x00])  # jump at 0x200
+
+    def test_benchmark_should_report_every_rom(self):
+        with tempfile.TemporaryDirectory() as directory:
+            rom = os.path.join(directory, 'ROM')
+            with open(rom, 'wb') as rom_file:
+                rom_file.write(BenchmarkTests._program)
+
+            results = Benchmark(cycles=1000, repeat=2, profile_cycles=300).run([rom])
+
+        result = results['roms']['ROM']
+        self.assertGreaterEqual(result['executed'], 1000)
+        self.assertGreater(result['instructions_per_second'], 0)
+        self.assertGreater(result['cache_hit_rate'], 0.9)
+        self.assertGreater(result['peak_memory'], 0)
+        self.assertEqual(result['profile']['instructions']['Rand']['count'], 100)
+        self.assertEqual(result['profile']['instructions']['Jmp']['count'], 100)
+        self.assertEqual(set(result['fusions']), {'MviDrawSprite', 'MovSetDelayTimer', 'AddSkeq', 'DelayTimerWait'})
+
+    def test_total_fusions_should_sum_roms(self):
+        results = {'roms': {'A': {'fusions': {'AddSkeq': 2, 'MviDrawSprite': 1}}, 'B': {'fusions': {'AddSkeq': 3}}}}
+
+        self.assertEqual(total_fusions(results), {'AddSkeq': 5, 'MviDrawSprite': 1})
+
+    def test_same_seed_should_give_same_screen_and_registers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            rom = os.path.join(directory, 'ROM')
+            with open(rom, 'wb') as rom_file:
+                rom_file.write(BenchmarkTests._program)
+
+            first = Benchmark(cycles=500, repeat=1, profile_cycles=0).run_rom(rom)
+            second = Benchmark(cycles=500, repeat=1, profile_cycles=0).run_rom(rom)
+
+        self.assertEqual(first['screen_hash'], second['screen_hash'])
+
+    def test_compare_should_find_slower_roms(self):
+        baseline = {'roms': {'A': {'instructions_per_second': 1000}, 'B': {'instructions_per_second': 1000}}}
+        results = {'roms': {'A': {'instructions_per_second': 950}, 'B': {'instructions_per_second': 800},
+                            'C': {'instructions_per_second': 1}}}
+
+        regressions = compare(results, baseline, 0.1)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('B'))
+
+    def test_scripted_input_log_should_release_every_pressed_key(self):
+        events = scripted_input_log(10000).events()
+
+        self.assertEqual(len(events), 2 * 9)
+        self.assertTrue(all(events[i].Key == events[i + 1].Key for i in range(0, len(events), 2)))
+
+    def test_measured_runs_should_not_use_shared_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            rom = os.path.join(directory, 'ROM')
+            with open(rom, 'wb') as rom_file:
+                rom_file.write(BenchmarkTests._program)
+
+            Benchmark(cycles=500, repeat=2, profile_cycles=0).run_rom(rom)
+
+        self.assertIsNone(RomCache.shared().get(RomCache.key(BenchmarkTests._program, 0x200, 0x1000)))
+
+    def test_main_should_pass_frequency_and_compatibility(self):
+        with tempfile.TemporaryDirectory() as directory:
+            rom = os.path.join(directory, 'ROM')
+            with open(rom, 'wb') as rom_file:
+                rom_file.write(BenchmarkTests._program)
+            output = os.path.join(directory, 'results.json')
+
+            with mock.patch('headless.benchmark.Benchmark', wraps=Benchmark) as benchmark, \
+                    contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(main([rom, '--cycles', '400', '--repeat', '1', '--profile-cycles', '0',
+                                       '-f', '1000', '-c', '-o', output]), 0)
+
+        arguments = benchmark.call_args[0]
+        self.assertEqual(arguments[6:8], (1000, True))
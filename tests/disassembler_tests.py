@@ -0,0 +1,75 @@
+import unittest
+from parser.disassembler import Disassembler, format_instruction
+from virtualmachine.instructions import *
+from virtualmachine.machine import Machine
+
+
+class DisassemblerTests(unittest.TestCase):
+    _program = bytes([0x22, 0x0A,  # 200: call 0x20A
+                      0x30, 0x01,  # 202: skip if V0 == 1
+                      0x12, 0x08,  # 204: jump at 0x208
+                      0x60, 0x02,  # 206: V0 = 2
+                      0x12, 0x08,  # 208: jump at 0x208
+                      0xA2, 0x10,  # 20A: I = 0x210
+                      0xD0, 0x12,  # 20C: draw 2 lines of sprite
+                      0x00, 0xEE,  # 20E: return
+                      0x3C, 0x7E])  # 210: sprite
+
+    def setUp(self):
+        self.disassembly = Disassembler().disassemble(DisassemblerTests._program)
+
+    def test_reachable_instructions_should_be_code_and_rest_data(self):
+        self.assertEqual(sorted(self.disassembly.Instructions), list(range(0x200, 0x210, 2)))
+        self.assertFalse(self.disassembly.is_code(0x210))
+
+    def test_jsr_targets_should_be_subroutines(self):
+        self.assertEqual(self.disassembly.Subroutines, {0x20A})
+        self.assertEqual(self.disassembly.label(0x20A), 'sub_20A')
+        self.assertEqual(self.disassembly.Blocks[0x200].Calls, [0x20A])
+
+    def test_skip_should_continue_both_paths(self):
+        self.assertEqual(self.disassembly.Blocks[0x202].Successors, [0x204, 0x206])
+        self.assertEqual(self.disassembly.Blocks[0x206].Successors, [0x208])
+        self.assertEqual(self.disassembly.Blocks[0x20A].End, 0x210)
+
+    def test_sprites_drawn_after_mvi_should_be_found(self):
+        self.assertEqual(self.disassembly.SpriteRegions, [(0x210, 0x212)])
+        self.assertEqual(self.disassembly.listing()[-1], (0x211, b'\x7E', 'sprite .######.'))
+
+    def test_sprites_should_be_found_across_blocks(self):
+        disassembly = Disassembler().disassemble(bytes([0xA2, 0x10,  # 200: I = 0x210
+                                                        0x30, 0x01,  # 202: skip if V0 == 1
+                                                        0xA2, 0x0E,  # 204: I = 0x20E
+                                                        0xD0, 0x12,  # 206: draw 2 lines of sprite
+                                                        0xD0, 0x10,  # 208: draw 0 lines of sprite
+                                                        0x12, 0x00,  # 20A: jump at 0x200
+                                                        0x00, 0x00,  # 20C
+                                                        0x3C, 0x7E,  # 20E: sprite
+                                                        0x18, 0x18]))  # 210: sprite
+
+        self.assertEqual(disassembly.SpriteRegions, [(0x20E, 0x212)])
+
+    def test_draw_of_zero_lines_should_not_mark_sprite(self):
+        disassembly = Disassembler().disassemble(bytes([0xA2, 0x06,  # 200: I = 0x206
+                                                        0xD0, 0x10,  # 202: draw 0 lines of sprite
+                                                        0x12, 0x04,  # 204: jump at itself
+                                                        0x3C, 0x7E]) + bytes(32))  # 206: data
+
+        self.assertEqual(disassembly.SpriteRegions, [])
+
+    def test_jmi_should_end_path(self):
+        disassembly = Disassembler().disassemble(bytes([0xB3, 0x00,  # jump at V0 + 0x300
+                                                        0x60, 0x01]))
+
+        self.assertEqual(list(disassembly.Instructions), [0x200])
+
+    def test_format_instruction_should_show_registers_and_constants(self):
+        self.assertEqual(format_instruction(DrawSprite(x=1, y=0xA, n=5)), 'DrawSprite V1, VA, 0x5')
+        self.assertEqual(format_instruction(Jmp(nnn=0x2F0)), 'Jmp 0x2F0')
+        self.assertEqual(format_instruction(Cls()), 'Cls')
+
+    def test_machine_should_keep_disassembly_of_loaded_program(self):
+        machine = Machine()
+        machine.load_program(DisassemblerTests._program)
+
+        self.assertEqual(machine.disassembly().Subroutines, {0x20A})
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from headless.farm import FarmJob, RomFarm, create_jobs
+
+
+class FarmTests(unittest.TestCase):
+    _program = bytes([0xC1, 0xFF,  # V1 = rand
+                      0x12, 0x00])  # jump at 0x200
+
+    def _create_rom(self, directory):
+        filename = os.path.join(directory, 'ROM')
+        with open(filename, 'wb') as rom_file:
+            rom_file.write(FarmTests._program)
+        return filename
+
+    def test_create_jobs_should_create_job_for_every_rom_seed_and_keys(self):
+        jobs = create_jobs(['A', 'B'], range(3), 100, ['keys1', 'keys2'])
+
+        self.assertEqual(len(jobs), 2 * 3 * 2)
+        self.assertListEqual([job.Index for job in jobs], list(range(12)))
+
+    def test_job_with_same_seed_should_give_same_result(self):
+        with tempfile.TemporaryDirectory() as directory:
+            rom = self._create_rom(directory)
+
+            first = FarmJob(0, rom, 5, 101).run()
+            second = FarmJob(1, rom, 5, 101).run()
+            other = FarmJob(2, rom, 6, 101).run()
+
+        self.assertEqual(first['registers'], second['registers'])
+        self.assertNotEqual(first['registers'], other['registers'])
+
+    def test_farm_should_write_results_by_shards(self):
+        with tempfile.TemporaryDirectory() as directory:
+            rom = self._create_rom(directory)
+            output = os.path.join(directory, 'results')
+
+            written = RomFarm(processes=2).run_to_files(create_jobs([rom], range(5), 100), output, shards=2)
+
+            with open(os.path.join(output, 'results-000.jsonl')) as shard:
+                first_shard = shard.readlines()
+            with open(os.path.join(output, 'results-001.jsonl')) as shard:
+                second_shard = shard.readlines()
+
+        self.assertEqual(written, 5)
+        self.assertEqual(len(first_shard), 3)
+        self.assertEqual(len(second_shard), 2)
@@ -0,0 +1,76 @@
+import unittest
+from virtualmachine.fusion import fuse, MviDrawSprite, MovSetDelayTimer, AddSkeq, DelayTimerWait
+from virtualmachine.instructions import *
+from virtualmachine.machine import Machine
+
+
+class FusionTests(unittest.TestCase):
+    _program = bytes([0x6F, 0x05,  # VF = 5
+                      0xA2, 0x1C,  # I = 0x21C
+                      0xDF, 0x01,  # draw sprite at (VF, VF), 1 line
+                      0x60, 0x03,  # V0 = 3
+                      0xF0, 0x15,  # delay timer = V0
+                      0x71, 0x01,  # V1 += 1
+                      0x31, 0x04,  # skip if V1 == 4
+                      0x12, 0x02,  # jump at 0x202
+                      0xF2, 0x07,  # V2 = delay timer
+                      0x32, 0x00,  # skip if V2 == 0
+                      0x12, 0x18,  # jump at 0x218
+                      0x12, 0x16,  # jump at itself
+                      0x63, 0x01,  # V3 = 1
+                      0x12, 0x10,  # jump at 0x210
+                      0xF0, 0x00])  # sprite
+
+    def test_sequences_should_be_fused(self):
+        code, exit_instruction = fuse([MovConstantToRegister.from_value(0x6105), SetDelayTimer.from_value(0xF115),
+                                       Mvi.from_value(0xA300), DrawSprite.from_value(0xD125),
+                                       AddConstantToRegister.from_value(0x7302)],
+                                      Skeq.from_value(0x3304), Jmp.from_value(0x1200))
+
+        self.assertEqual([type(instruction) for instruction in code], [MovSetDelayTimer, MviDrawSprite])
+        mov_set_delay, mvi_draw = code
+        self.assertEqual((mov_set_delay.x, mov_set_delay.nn, mov_set_delay.timer_register), (1, 0x05, 1))
+        self.assertEqual((mvi_draw.nnn, mvi_draw.x, mvi_draw.y, mvi_draw.n), (0x300, 1, 2, 5))
+        self.assertIsInstance(exit_instruction, AddSkeq)
+        self.assertEqual((exit_instruction.x, exit_instruction.nn, exit_instruction.skip_register,
+                          exit_instruction.skip_value), (3, 0x02, 3, 0x04))
+
+    def test_delay_timer_wait_should_include_following_jump(self):
+        code, exit_instruction = fuse([GetDelayTimer.from_value(0xF207)], Skeq.from_value(0x3210),
+                                      Jmp.from_value(0x1234))
+
+        self.assertEqual(code, [])
+        self.assertIsInstance(exit_instruction, DelayTimerWait)
+        self.assertEqual((exit_instruction.x, exit_instruction.skip_register, exit_instruction.skip_value,
+                          exit_instruction.nnn), (2, 2, 0x10, 0x234))
+        self.assertIs(type(fuse([GetDelayTimer.from_value(0xF207)], Skeq.from_value(0x3210),
+                                Rts.from_value(0x00EE))[1]), Skeq)
+
+    def test_fused_blocks_should_execute_as_instructions(self):
+        for engine in (Machine.BLOCK_ENGINE, Machine.JIT_ENGINE):
+            fused = Machine(engine=engine)
+            fused.load_program(FusionTests._program)
+            executed = fused.run(200)
+
+            expected = Machine()
+            expected.load_program(FusionTests._program)
+            for _ in range(executed):
+                expected.execute_next_instruction()
+
+            self.assertEqual(fused.PC, expected.PC)
+            self.assertEqual(fused.VRegisters, expected.VRegisters)
+            self.assertEqual(fused.AddressRegister, expected.AddressRegister)
+            self.assertEqual(fused.DelayTimer.get_count(), expected.DelayTimer.get_count())
+            self.assertEqual(fused.Screen.get_pixel(5, 5), expected.Screen.get_pixel(5, 5))
+
+    def test_machine_should_count_executed_fusions(self):
+        machine = Machine(engine=Machine.BLOCK_ENGINE)
+        machine.load_program(FusionTests._program)
+        machine.run(44)
+
+        statistics = machine.fusion_statistics()
+
+        self.assertEqual(statistics['MviDrawSprite'], 4)
+        self.assertEqual(statistics['MovSetDelayTimer'], 4)
+        self.assertEqual(statistics['AddSkeq'], 4)
+        self.assertEqual(statistics['DelayTimerWait'], 3)
@@ -0,0 +1,122 @@
+import os
+import unittest
+from headless.runner import HeadlessRunner, RunResult
+from tools.scheduler import FrameScheduler
+from virtualmachine.input_log import InputLog, InputEvent, InputLogError, InputRecorder
+from virtualmachine.machine import Machine
+
+
+class HeadlessRunnerTests(unittest.TestCase):
+    def test_run_should_stop_after_cycles(self):
+        runner = HeadlessRunner(bytes([0x71, 0x01,  # V1 += 1
+                                       0x12, 0x00]),  # jump at 0x200
+                                cycles=100)
+
+        result = runner.run()
+
+        self.assertEqual(result.ExitReason, RunResult.CYCLES)
+        self.assertEqual(result.Cycles, 100)
+        self.assertEqual(result.Registers['V'][1], 50)
+
+    def test_run_should_report_exit_of_program(self):
+        result = HeadlessRunner(bytes([0x61, 0x01]), cycles=100).run()
+
+        self.assertEqual(result.ExitReason, RunResult.EXIT)
+        self.assertEqual(result.Cycles, 1)
+
+    def test_run_should_report_error(self):
+        result = HeadlessRunner(bytes([0x00, 0xEE]), cycles=100).run()  # rts from empty stack
+
+        self.assertEqual(result.ExitReason, RunResult.ERROR)
+        self.assertIsNotNone(result.Error)
+
+    def test_blocked_machine_should_get_keys_from_input_log(self):
+        program = bytes([0xF2, 0x0A,  # wait key at V2
+                         0x12, 0x02])  # jump at 0x202
+
+        blocked = HeadlessRunner(program, cycles=1000).run()
+        pressed = HeadlessRunner(program, cycles=1000, input_log=InputLog.parse('500:+B')).run()
+
+        self.assertEqual(blocked.ExitReason, RunResult.BLOCKED)
+        self.assertEqual(pressed.ExitReason, RunResult.CYCLES)
+        self.assertEqual(pressed.Registers['V'][2], 0xB)
+
+    def test_timers_should_be_decreased_by_timer_rate(self):
+        program = bytes([0x61, 0xFF,  # V1 = 0xFF
+                         0xF1, 0x15,  # DT = V1
+                         0x12, 0x04])  # jump at 0x204
+
+        result = HeadlessRunner(program, cycles=1000, frequency=600, timer_rate=60).run()
+
+        self.assertEqual(result.Registers['DT'], 0xFF - 100)
+
+    def test_input_log_should_be_parsed_and_formatted(self):
+        log = InputLog.parse('100:+A, 250:-a 300:+0')
+
+        self.assertListEqual(log.events(), [InputEvent(100, 0xA, True),
+                                            InputEvent(250, 0xA, False),
+                                            InputEvent(300, 0x0, True)])
+        self.assertEqual(log.format(), '100:+A\n250:-A\n300:+0')
+        self.assertRaises(InputLogError, InputLog.parse, '100:A')
+
+    def test_engines_should_give_same_results_on_timer_driven_rom(self):
+        rom = os.path.join(os.path.dirname(__file__), '..', 'games', 'MISSILE')
+        results = [HeadlessRunner(rom, 50000, engine=engine, seed=1).run() for engine in Machine.ENGINES]
+
+        for result in results[1:]:
+            self.assertEqual(result.ScreenHash, results[0].ScreenHash)
+            self.assertEqual(result.Registers, results[0].Registers)
+            self.assertEqual(result.Cycles, results[0].Cycles)
+
+    def test_run_recorded_with_interpreter_should_be_replayed_by_jit(self):
+        rom = os.path.join(os.path.dirname(__file__), '..', 'games', 'INVADERS')
+        machine = Machine(seed=3)
+        machine.load_program(rom)
+        recorder = InputRecorder(machine)
+        scheduler = FrameScheduler(machine)
+
+        for frame in range(3000):
+            if frame % 40 == 5:
+                scheduler.key_down((2, 4, 6, 8)[frame // 40 % 4])
+            if frame % 40 == 25:
+                scheduler.key_up((2, 4, 6, 8)[frame // 40 % 4])
+            scheduler.run_frame()
+
+        runner = HeadlessRunner(rom, machine.Cycles, recorder.log(), engine=Machine.JIT_ENGINE, seed=3)
+        replayed = runner.create_machine()
+        runner.run(replayed)
+
+        self.assertEqual(replayed.save_state(), machine.save_state())
+
+    def test_recorder_should_record_keys_after_reset(self):
+        machine = Machine()
+        recorder = InputRecorder(machine)
+        machine.Keyboard.key_down(1)
+
+        machine.reset()
+        machine.Keyboard.key_down(2)
+
+        self.assertFalse(machine.Keyboard.is_key_pressed(1))
+        self.assertListEqual(recorder.log().events(), [InputEvent(0, 1, True), InputEvent(0, 2, True)])
+
+    def test_run_recorded_by_scheduler_should_be_replayed_exactly(self):
+        rom = os.path.join(os.path.dirname(__file__), '..', 'games', 'BRIX')
+        machine = Machine(engine=Machine.JIT_ENGINE, seed=7)
+        machine.load_program(rom)
+        recorder = InputRecorder(machine)
+        scheduler = FrameScheduler(machine)
+
+        for frame in range(900):
+            if frame % 50 == 10:
+                scheduler.key_down(4 if frame % 100 == 10 else 6)
+            if frame % 50 == 40:
+                scheduler.key_up(4 if frame % 100 == 40 else 6)
+            scheduler.run_frame()
+
+        runner = HeadlessRunner(rom, machine.Cycles, recorder.log(), engine=Machine.JIT_ENGINE, seed=7)
+        replayed = runner.create_machine()
+        result = runner.run(replayed)
+
+        self.assertGreater(len(recorder.log()), 10)
+        self.assertEqual(result.Cycles, machine.Cycles)
+        self.assertEqual(replayed.save_state(), machine.save_state())
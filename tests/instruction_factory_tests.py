@@ -1,5 +1,8 @@
+import os
+import tempfile
+import threading
 import unittest
-from parser.instruction_factory import InstructionFactory
+from parser.instruction_factory import InstructionFactory, InstructionFactoryError
 from virtualmachine.instructions import *
 
 
@@ -54,3 +57,82 @@ class InstructionFactoryTests(unittest.TestCase):
             self.assertTrue(isinstance(sut, test[1]), msg=test[4] + ' isinstance')
             self.assertEqual(sut.arg_constant, test[2], msg=test[4] + ' arg_constant')
             self.assertListEqual(sut.arg_registers, test[3], msg=test[4] + ' arg_registers')
+
+    def test_decode_table_should_be_indexed_by_integer_opcode(self):
+        table = self.factory.decode_table()
+
+        self.assertEqual(len(table), 0x10000)
+
+        for test in InstructionFactoryTests._from_opcode_tests_cases():
+            sut = table[(test[0][0] << 8) | test[0][1]]
+
+            self.assertTrue(isinstance(sut, test[1]), msg=test[4] + ' isinstance')
+            self.assertEqual(sut.arg_constant, test[2], msg=test[4] + ' arg_constant')
+            self.assertListEqual(sut.arg_registers, test[3], msg=test[4] + ' arg_registers')
+
+    def test_decode_table_should_contain_unknown_marker_for_unknown_opcodes(self):
+        table = self.factory.decode_table()
+
+        self.assertIs(table[0x0000], InstructionFactory.UNKNOWN_INSTRUCTION)
+        self.assertIs(table[0x5121], InstructionFactory.UNKNOWN_INSTRUCTION)
+        self.assertIs(table[0xF1FF], InstructionFactory.UNKNOWN_INSTRUCTION)
+        self.assertRaises(InstructionFactoryError, self.factory.from_opcode, bytearray([0xF1, 0xFF]))
+
+    def test_saved_decode_table_should_be_loaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'decode_table')
+
+            self.assertFalse(self.factory.load_decode_table(filename))
+
+            self.factory.save_decode_table(filename)
+
+            self.assertTrue(self.factory.load_decode_table(filename))
+
+        sut = self.factory.from_opcode(bytearray([0x7E, 0xBC]))
+
+        self.assertTrue(isinstance(sut, AddConstantToRegister))
+        self.assertEqual(sut.arg_constant, 0xBC)
+        self.assertListEqual(sut.arg_registers, [0xE])
+
+    def test_damaged_decode_table_should_not_be_loaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'decode_table')
+            self.factory.save_decode_table(filename)
+
+            with open(filename, 'rb') as table_file:
+                data = bytearray(table_file.read())
+
+            self.assertEqual(data[:4], b'CH8T')
+
+            damaged = bytearray(data)
+            damaged[-0x10000 + 0x7EBC] = damaged[-0x10000 + 0x00E0]  # AddConstantToRegister opcode as Cls
+            for content in (data[:-1], damaged, b'\x80\x04' + data[2:]):
+                with open(filename, 'wb') as table_file:
+                    table_file.write(content)
+
+                self.assertFalse(self.factory.load_decode_table(filename))
+
+        self.assertIsInstance(self.factory.from_opcode(bytearray([0x7E, 0xBC])), AddConstantToRegister)
+
+    def test_decoded_instruction_should_have_operand_fields_and_be_immutable(self):
+        sut = self.factory.from_opcode(bytearray([0xD1, 0x2A]))
+
+        self.assertEqual((sut.x, sut.y, sut.n), (1, 2, 0xA))
+        self.assertFalse(hasattr(sut, '__dict__'))
+        self.assertRaises(AttributeError, setattr, sut, 'x', 3)
+
+        jmp = self.factory.from_opcode(bytearray([0x1A, 0xBC]))
+
+        self.assertEqual((jmp.x, jmp.y, jmp.nnn), (0, 0, 0xABC))
+
+    def test_shared_factory_should_be_single_for_all_threads(self):
+        factories = []
+        threads = [threading.Thread(target=lambda: factories.append(InstructionFactory.shared())) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(factory is InstructionFactory.shared() for factory in factories))
+        self.assertIs(InstructionFactory.shared().decode_table(), self.factory.decode_table())
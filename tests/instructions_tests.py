@@ -39,8 +39,7 @@ class InstructionTests(unittest.TestCase):
     def test_jmp_should_change_pc_for_parameter(self):
         machine = Machine()
 
-        jmp = Jmp()
-        jmp.arg_constant = 0x250
+        jmp = Jmp(nnn=0x250)
 
         jmp.execute(machine)
 
@@ -51,8 +50,7 @@ class InstructionTests(unittest.TestCase):
         machine = Machine()
         machine.PC = 10
 
-        jsr = Jsr()
-        jsr.arg_constant = 0xEEF
+        jsr = Jsr(nnn=0xEEF)
 
         jsr.execute(machine)
 
@@ -65,9 +63,7 @@ class InstructionTests(unittest.TestCase):
         machine.PC = 10
         machine.VRegisters[2] = 0xEE
 
-        skeq = Skeq()
-        skeq.arg_constant = 0xEE
-        skeq.arg_registers.append(2)
+        skeq = Skeq(x=2, nn=0xEE)
         skeq.execute(machine)
 
         self.assertTrue(isinstance(skeq, JumpInstruction))
@@ -78,9 +74,7 @@ class InstructionTests(unittest.TestCase):
         machine.PC = 10
         machine.VRegisters[2] = 0xAC
 
-        skeq = Skeq()
-        skeq.arg_constant = 0xEE
-        skeq.arg_registers.append(2)
+        skeq = Skeq(x=2, nn=0xEE)
         skeq.execute(machine)
 
         self.assertTrue(isinstance(skeq, JumpInstruction))
@@ -91,9 +85,7 @@ class InstructionTests(unittest.TestCase):
         machine.PC = 10
         machine.VRegisters[2] = 0xBC
 
-        skne = Skne()
-        skne.arg_constant = 0xEE
-        skne.arg_registers.append(2)
+        skne = Skne(x=2, nn=0xEE)
         skne.execute(machine)
 
         self.assertTrue(isinstance(skne, JumpInstruction))
@@ -104,9 +96,7 @@ class InstructionTests(unittest.TestCase):
         machine.PC = 10
         machine.VRegisters[2] = 0xEE
 
-        skne = Skne()
-        skne.arg_constant = 0xEE
-        skne.arg_registers.append(2)
+        skne = Skne(x=2, nn=0xEE)
         skne.execute(machine)
 
         self.assertTrue(isinstance(skne, JumpInstruction))
@@ -118,9 +108,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[2] = 0xEE
         machine.VRegisters[5] = 0xEE
 
-        skeq = SkeqRegister()
-        skeq.arg_registers.append(2)
-        skeq.arg_registers.append(5)
+        skeq = SkeqRegister(x=2, y=5)
         skeq.execute(machine)
 
         self.assertTrue(isinstance(skeq, JumpInstruction))
@@ -132,9 +120,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[2] = 0xEE
         machine.VRegisters[5] = 0xE4
 
-        skeq = SkeqRegister()
-        skeq.arg_registers.append(2)
-        skeq.arg_registers.append(5)
+        skeq = SkeqRegister(x=2, y=5)
         skeq.execute(machine)
 
         self.assertTrue(isinstance(skeq, JumpInstruction))
@@ -144,9 +130,7 @@ class InstructionTests(unittest.TestCase):
         machine = Machine()
         machine.VRegisters[0xA] = 15
 
-        mov = MovConstantToRegister()
-        mov.arg_registers.append(0xA)
-        mov.arg_constant = 0xAC
+        mov = MovConstantToRegister(x=0xA, nn=0xAC)
 
         mov.execute(machine)
 
@@ -156,9 +140,7 @@ class InstructionTests(unittest.TestCase):
         machine = Machine()
         machine.VRegisters[0xA] = 0xFA
 
-        add = AddConstantToRegister()
-        add.arg_registers.append(0xA)
-        add.arg_constant = 0x3
+        add = AddConstantToRegister(x=0xA, nn=0x3)
 
         add.execute(machine)
 
@@ -168,9 +150,7 @@ class InstructionTests(unittest.TestCase):
         machine = Machine()
         machine.VRegisters[0xA] = 0xFA
 
-        add = AddConstantToRegister()
-        add.arg_registers.append(0xA)
-        add.arg_constant = 0xAC
+        add = AddConstantToRegister(x=0xA, nn=0xAC)
 
         add.execute(machine)
 
@@ -182,9 +162,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0xEE
 
-        mov = MovRegisterToRegister()
-        mov.arg_registers.append(0xA)
-        mov.arg_registers.append(0xB)
+        mov = MovRegisterToRegister(x=0xA, y=0xB)
 
         mov.execute(machine)
 
@@ -196,9 +174,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0xEE
 
-        ori = Or()
-        ori.arg_registers.append(0xA)
-        ori.arg_registers.append(0xB)
+        ori = Or(x=0xA, y=0xB)
 
         ori.execute(machine)
 
@@ -210,9 +186,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0xEE
 
-        andi = And()
-        andi.arg_registers.append(0xA)
-        andi.arg_registers.append(0xB)
+        andi = And(x=0xA, y=0xB)
 
         andi.execute(machine)
 
@@ -224,9 +198,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0xEE
 
-        xor = Xor()
-        xor.arg_registers.append(0xA)
-        xor.arg_registers.append(0xB)
+        xor = Xor(x=0xA, y=0xB)
 
         xor.execute(machine)
 
@@ -238,9 +210,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0x1
 
-        add = AddRegisterToRegister()
-        add.arg_registers.append(0xA)
-        add.arg_registers.append(0xB)
+        add = AddRegisterToRegister(x=0xA, y=0xB)
 
         add.execute(machine)
 
@@ -253,9 +223,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0xEE
 
-        add = AddRegisterToRegister()
-        add.arg_registers.append(0xA)
-        add.arg_registers.append(0xB)
+        add = AddRegisterToRegister(x=0xA, y=0xB)
 
         add.execute(machine)
 
@@ -268,9 +236,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0x1
 
-        sub = SubRegisterToRegister()
-        sub.arg_registers.append(0xA)
-        sub.arg_registers.append(0xB)
+        sub = SubRegisterToRegister(x=0xA, y=0xB)
 
         sub.execute(machine)
 
@@ -283,9 +249,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0xFF
 
-        sub = SubRegisterToRegister()
-        sub.arg_registers.append(0xA)
-        sub.arg_registers.append(0xB)
+        sub = SubRegisterToRegister(x=0xA, y=0xB)
 
         sub.execute(machine)
 
@@ -298,9 +262,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0xFF
 
-        shr = Shr()
-        shr.arg_registers.append(0xA)
-        shr.arg_registers.append(0xB)
+        shr = Shr(x=0xA, y=0xB)
 
         shr.execute(machine)
 
@@ -313,9 +275,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0xFF
 
-        subn = Subn()
-        subn.arg_registers.append(0xA)
-        subn.arg_registers.append(0xB)
+        subn = Subn(x=0xA, y=0xB)
 
         subn.execute(machine)
 
@@ -328,9 +288,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFF
         machine.VRegisters[0xB] = 0xFA
 
-        subn = Subn()
-        subn.arg_registers.append(0xA)
-        subn.arg_registers.append(0xB)
+        subn = Subn(x=0xA, y=0xB)
 
         subn.execute(machine)
 
@@ -343,9 +301,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[0xA] = 0xFA
         machine.VRegisters[0xB] = 0xFF
 
-        shl = Shl()
-        shl.arg_registers.append(0xA)
-        shl.arg_registers.append(0xB)
+        shl = Shl(x=0xA, y=0xB)
 
         shl.execute(machine)
 
@@ -359,9 +315,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[1] = 5
         machine.VRegisters[2] = 6
 
-        skne = SkneRegisters()
-        skne.arg_registers.append(1)
-        skne.arg_registers.append(2)
+        skne = SkneRegisters(x=1, y=2)
 
         skne.execute(machine)
 
@@ -374,9 +328,7 @@ class InstructionTests(unittest.TestCase):
         machine.VRegisters[1] = 5
         machine.VRegisters[2] = 5
 
-        skne = SkneRegisters()
-        skne.arg_registers.append(1)
-        skne.arg_registers.append(2)
+        skne = SkneRegisters(x=1, y=2)
 
         skne.execute(machine)
 
@@ -386,8 +338,7 @@ class InstructionTests(unittest.TestCase):
     def test_mvi_should_change_address_register(self):
         machine = Machine()
 
-        mvi = Mvi()
-        mvi.arg_constant = 0xABC
+        mvi = Mvi(nnn=0xABC)
 
         mvi.execute(machine)
 
@@ -397,8 +348,7 @@ class InstructionTests(unittest.TestCase):
         machine = Machine()
         machine.VRegisters[0] = 0xAB
 
-        jmi = Jmi()
-        jmi.arg_constant = 0x111
+        jmi = Jmi(nnn=0x111)
 
         jmi.execute(machine)
 
@@ -408,8 +358,7 @@ class InstructionTests(unittest.TestCase):
     def test_load_char_should_set_right_address(self):
         machine = Machine()
 
-        load = LoadChar()
-        load.arg_registers.append(0x5)
+        load = LoadChar(x=0x5)
 
         for digit in range(16):
             machine.VRegisters[5] = digit
@@ -422,8 +371,7 @@ class InstructionTests(unittest.TestCase):
         machine.Keyboard.key_down(4)
         machine.VRegisters[5] = 4
 
-        skip = SkipIfKeyPressed()
-        skip.arg_registers.append(5)
+        skip = SkipIfKeyPressed(x=5)
 
         skip.execute(machine)
 
@@ -434,8 +382,7 @@ class InstructionTests(unittest.TestCase):
         machine.Keyboard.key_down(7)
         machine.VRegisters[5] = 4
 
-        skip = SkipIfKeyPressed()
-        skip.arg_registers.append(5)
+        skip = SkipIfKeyPressed(x=5)
 
         skip.execute(machine)
 
@@ -446,8 +393,7 @@ class InstructionTests(unittest.TestCase):
         machine.Keyboard.key_down(3)
         machine.VRegisters[8] = 3
 
-        skip = SkipIfKeyNotPressed()
-        skip.arg_registers.append(8)
+        skip = SkipIfKeyNotPressed(x=8)
 
         skip.execute(machine)
 
@@ -458,8 +404,7 @@ class InstructionTests(unittest.TestCase):
         machine.Keyboard.key_down(8)
         machine.VRegisters[8] = 3
 
-        skip = SkipIfKeyNotPressed()
-        skip.arg_registers.append(8)
+        skip = SkipIfKeyNotPressed(x=8)
 
         skip.execute(machine)
 
@@ -476,8 +421,7 @@ class InstructionTests(unittest.TestCase):
     def test_wait_key_unblock_when_key_pressed_and_return_right_key(self):
         machine = Machine()
 
-        wait = WaitKey()
-        wait.arg_registers.append(4)
+        wait = WaitKey(x=4)
         wait.execute(machine)
 
         machine.Keyboard.key_down(5)
@@ -491,8 +435,7 @@ class InstructionTests(unittest.TestCase):
         machine = Machine()
         machine.VRegisters[7] = 107
 
-        bcd = Bcd()
-        bcd.arg_registers.append(7)
+        bcd = Bcd(x=7)
 
         bcd.execute(machine)
 
@@ -506,8 +449,7 @@ class InstructionTests(unittest.TestCase):
             machine.VRegisters[i] = i
         machine.AddressRegister = 123
 
-        store = StoreRegisters()
-        store.arg_registers.append(5)
+        store = StoreRegisters(x=5)
 
         store.execute(machine)
 
@@ -521,8 +463,7 @@ class InstructionTests(unittest.TestCase):
             machine.Memory[123 + i] = i
         machine.AddressRegister = 123
 
-        load = LoadRegisters()
-        load.arg_registers.append(5)
+        load = LoadRegisters(x=5)
 
         load.execute(machine)
 
@@ -530,12 +471,46 @@ class InstructionTests(unittest.TestCase):
             self.assertEqual(machine.VRegisters[i], machine.Memory[123 + i])
         self.assertEqual(machine.AddressRegister, 123 + 5 + 1)
 
+    def test_bcd_should_store_decimal_digits_of_every_value(self):
+        machine = Machine()
+        machine.AddressRegister = 0x300
+
+        for value in range(256):
+            machine.VRegisters[3] = value
+            Bcd(x=3).execute(machine)
+
+            self.assertEqual(list(machine.Memory[0x300:0x303]), [value // 100, value // 10 % 10, value % 10])
+
+    def test_store_and_load_registers_should_move_address_register_in_compatibility_mode(self):
+        machine = Machine(compatibility_load_store=True)
+        machine.VRegisters[:4] = bytes([1, 2, 3, 4])
+        machine.AddressRegister = 0x300
+
+        StoreRegisters(x=3).execute(machine)
+        machine.VRegisters[:4] = bytes(4)
+        machine.AddressRegister = 0x300
+        LoadRegisters(x=3).execute(machine)
+
+        self.assertEqual(list(machine.Memory[0x300:0x304]), [1, 2, 3, 4])
+        self.assertEqual(list(machine.VRegisters[:5]), [1, 2, 3, 4, 0])
+        self.assertEqual(machine.AddressRegister, 0x304)
+
+    def test_registers_should_not_be_copied_past_end_of_memory(self):
+        machine = Machine()
+        machine.AddressRegister = machine.MemorySize - 2
+
+        for instruction in (Bcd(x=0), StoreRegisters(x=2), LoadRegisters(x=2)):
+            with self.assertRaises(IndexError):
+                instruction.execute(machine)
+
+        self.assertEqual(len(machine.Memory), machine.MemorySize)
+        self.assertEqual(len(machine.VRegisters), 16)
+
     def test_set_delay_timer(self):
         machine = Machine()
         machine.VRegisters[0xC] = 150
 
-        set_delay = SetDelayTimer()
-        set_delay.arg_registers.append(0xC)
+        set_delay = SetDelayTimer(x=0xC)
         set_delay.execute(machine)
 
         self.assertEqual(machine.DelayTimer.get_count(), 150)
@@ -544,8 +519,7 @@ class InstructionTests(unittest.TestCase):
         machine = Machine()
         machine.VRegisters[0xC] = 150
 
-        set_sound = SetSoundTimer()
-        set_sound.arg_registers.append(0xC)
+        set_sound = SetSoundTimer(x=0xC)
         set_sound.execute(machine)
 
         self.assertEqual(machine.SoundTimer.get_count(), 150)
@@ -555,8 +529,7 @@ class InstructionTests(unittest.TestCase):
         machine.DelayTimer.set_count(228)
         machine.VRegisters[0xC] = 150
 
-        set_delay = GetDelayTimer()
-        set_delay.arg_registers.append(0xC)
+        set_delay = GetDelayTimer(x=0xC)
         set_delay.execute(machine)
 
         self.assertEqual(machine.VRegisters[0xC], 228)
@@ -0,0 +1,129 @@
+import random
+import unittest
+from virtualmachine.machine import Machine
+
+
+class JitTests(unittest.TestCase):
+
+    @staticmethod
+    def _create_machine(engine, program, seed):
+        generator = random.Random(seed)
+
+        machine = Machine(engine=engine, seed=seed)
+        machine.load_program(program)
+
+        for i in range(16):
+            machine.VRegisters[i] = generator.choice([0, 1, 0x7F, 0x80, 0xFF, generator.randint(0, 255)])
+        machine.VRegisters[0xE] = generator.randint(0, 15)  # register for LoadChar and keys, it is never changed
+        machine.AddressRegister = 0x300 + generator.randint(0, 0x100)
+        machine.DelayTimer.set_count(generator.randint(0, 255))
+        machine.Keyboard.key_down(generator.randint(0, 15))
+
+        return machine
+
+    @staticmethod
+    def _get_state(machine):
+        return (bytes(machine.VRegisters), machine.PC, machine.AddressRegister, bytes(machine.Memory),
+                list(machine.Stack.items()), machine.DelayTimer.get_count(), machine.SoundTimer.get_count(),
+                machine.Block)
+
+    @staticmethod
+    def _get_screen(machine):
+        return [[machine.Screen.get_pixel(y, x) for x in range(machine.Screen.width())]
+                for y in range(machine.Screen.height())]
+
+    def _assert_same_as_interpreter(self, program, seed, runs):
+        interpreter = JitTests._create_machine(Machine.INTERPRETER_ENGINE, program, seed)
+        jit = JitTests._create_machine(Machine.JIT_ENGINE, program, seed)
+
+        for _ in range(runs):
+            executed = jit.execute_next_instruction()
+
+            for _ in range(executed):
+                interpreter.execute_next_instruction()
+
+            self.assertEqual(JitTests._get_state(jit), JitTests._get_state(interpreter), msg=program.hex())
+
+        self.assertEqual(JitTests._get_screen(jit), JitTests._get_screen(interpreter), msg=program.hex())
+
+    @staticmethod
+    def _instructions_opcodes():
+        for x in [0, 1, 2, 0xF]:
+            for y in [0, 2, 0xE, 0xF]:
+                yield 0x5000 | (x << 8) | (y << 4)
+                yield 0x9000 | (x << 8) | (y << 4)
+                yield 0xD003 | (x << 8) | (y << 4)
+
+                for n in [0, 1, 2, 3, 4, 5, 6, 7, 0xE]:
+                    yield 0x8000 | (x << 8) | (y << 4) | n
+
+            for nn in [0, 1, 0x7F, 0x80, 0xFF]:
+                yield 0x3000 | (x << 8) | nn
+                yield 0x4000 | (x << 8) | nn
+                yield 0x6000 | (x << 8) | nn
+                yield 0x7000 | (x << 8) | nn
+                yield 0xC000 | (x << 8) | nn
+
+            for nn in [0x07, 0x15, 0x18, 0x1E, 0x33, 0x55]:
+                yield 0xF000 | (x << 8) | nn
+
+        yield 0xF265
+        yield 0xEE9E
+        yield 0xEEA1
+        yield 0xFE29
+        yield 0x00E0
+        yield 0xA456
+
+    def test_every_instruction_should_give_same_state_as_interpreter(self):
+        for opcode in list(JitTests._instructions_opcodes()) + [0xB300, 0x2300]:
+            for seed in range(2):
+                program = bytearray(opcode.to_bytes(2, 'big') + bytes([0x12, 0x00]))
+
+                self._assert_same_as_interpreter(program, seed, Machine.JIT_THRESHOLD + 2)
+
+    def test_random_blocks_should_give_same_state_as_interpreter(self):
+        generator = random.Random(42)
+        opcodes = list(JitTests._instructions_opcodes())
+
+        for seed in range(100):
+            program = bytearray()
+            for _ in range(generator.randint(1, 12)):
+                program += generator.choice(opcodes).to_bytes(2, 'big')
+            program += bytes([0x12, 0x00])
+
+            self._assert_same_as_interpreter(program, seed, Machine.JIT_THRESHOLD + 4)
+
+    def test_skip_in_compiled_block_should_exit_block(self):
+        machine = Machine(engine=Machine.JIT_ENGINE)
+        machine.load_program(bytearray([0x71, 0x01,  # V1 += 1
+                                        0x31, 0x20,  # skip if V1 == 0x20
+                                        0x12, 0x00,  # jump at 0x200
+                                        0x62, 0x01,  # V2 = 1
+                                        0x12, 0x08]))  # jump at 0x208
+
+        executed = machine.run(1000)
+
+        self.assertEqual(executed, 1000)
+        self.assertEqual(machine.VRegisters[1], 0x20)
+        self.assertEqual(machine.VRegisters[2], 1)
+        self.assertEqual(machine.PC, 0x208)
+
+    def test_compiled_region_should_stop_at_budget(self):
+        program = bytearray([0x71, 0x01,  # V1 += 1
+                             0x31, 0x40,  # skip if V1 == 0x40
+                             0x72, 0x01,  # V2 += 1
+                             0x32, 0x30,  # skip if V2 == 0x30
+                             0x12, 0x00,  # jump at 0x200
+                             0x12, 0x0A])  # jump at itself
+        machine = Machine(engine=Machine.JIT_ENGINE)
+        machine.load_program(program)
+        expected = Machine()
+        expected.load_program(program)
+
+        for budget in [2, 3, 1, 5, 4, 7, 2] * 10:
+            self.assertEqual(machine.run(budget), budget)
+            for _ in range(budget):
+                expected.execute_next_instruction()
+
+            self.assertEqual(machine.PC, expected.PC)
+            self.assertEqual(machine.VRegisters, expected.VRegisters)
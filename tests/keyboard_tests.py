@@ -0,0 +1,38 @@
+import unittest
+from virtualmachine.keyboard import Keyboard
+
+
+class KeyboardTests(unittest.TestCase):
+    def test_first_pressed_should_be_lowest_key(self):
+        keyboard = Keyboard()
+        keyboard.key_down(0xC)
+        keyboard.key_down(0x5)
+
+        self.assertEqual(keyboard.get_first_pressed(), 0x5)
+        self.assertEqual(keyboard.mask(), 0x1020)
+
+    def test_released_keys_should_not_be_pressed(self):
+        keyboard = Keyboard()
+        keyboard.key_down(0xF)
+        keyboard.key_up(0xF)
+
+        self.assertFalse(keyboard.is_any_key_pressed())
+        self.assertFalse(keyboard.is_key_pressed(0xF))
+        self.assertIsNone(keyboard.get_first_pressed())
+
+    def test_key_out_of_range_should_raise_error(self):
+        keyboard = Keyboard()
+
+        self.assertRaises(IndexError, keyboard.key_down, 16)
+        self.assertRaises(IndexError, keyboard.is_key_pressed, 16)
+
+    def test_set_mask_should_not_call_listeners(self):
+        events = []
+        keyboard = Keyboard()
+        keyboard.add_listener(lambda key, pressed: events.append((key, pressed)))
+
+        keyboard.set_mask(0x8001)
+        keyboard.key_down(3)
+
+        self.assertEqual(events, [(3, True)])
+        self.assertTrue(keyboard.is_key_pressed(0xF))
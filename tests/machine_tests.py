@@ -1,5 +1,8 @@
+import os
+import tempfile
 import unittest
 from virtualmachine.instructions import *
+from virtualmachine.machine import Machine
 
 
 class MachineTests(unittest.TestCase):
@@ -60,3 +63,185 @@ class MachineTests(unittest.TestCase):
 
         self.assertTrue(machine.Block)
         self.assertEqual(machine.PC, 100)
+
+    def test_execute_block_executes_instructions_up_to_jump(self):
+        machine = Machine()
+        machine.load_program(bytearray([0x61, 0x05,  # V1 = 5
+                                        0x71, 0x02,  # V1 += 2
+                                        0x12, 0x00]))  # jump at 0x200
+
+        executed = machine.execute_block()
+
+        self.assertEqual(executed, 3)
+        self.assertEqual(machine.VRegisters[1], 7)
+        self.assertEqual(machine.PC, 0x200)
+
+    def test_run_stops_when_machine_blocked(self):
+        machine = Machine()
+        machine.load_program(bytearray([0x61, 0x05,  # V1 = 5
+                                        0xF2, 0x0A,  # wait key at V2
+                                        0x12, 0x00]))  # jump at 0x200
+
+        executed = machine.run(100)
+
+        self.assertEqual(executed, 2)
+        self.assertTrue(machine.Block)
+        self.assertEqual(machine.PC, 0x202)
+
+    def test_store_registers_into_code_invalidates_blocks(self):
+        machine = Machine()
+        machine.load_program(bytearray([0x60, 0x71,  # V0 = 0x71
+                                        0x61, 0x10,  # V1 = 0x10
+                                        0xA2, 0x08,  # I = 0x208
+                                        0xF1, 0x55,  # store V0, V1 at 0x208
+                                        0x72, 0x01,  # V2 += 1, rewritten by store as V1 += 0x10
+                                        0x12, 0x08]))  # jump at 0x208
+
+        machine.run(4)
+        machine.run(2)
+
+        self.assertEqual(machine.VRegisters[1], 0x20)
+        self.assertEqual(machine.VRegisters[2], 0)
+
+    def test_load_program_accepts_buffers_and_files(self):
+        program = bytes([0x61, 0x05, 0x12, 0x00])
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'program.ch8')
+            with open(filename, 'wb') as program_file:
+                program_file.write(program)
+
+            for source in [program, bytearray(program), memoryview(program), filename]:
+                machine = Machine()
+                machine.load_program(source)
+
+                self.assertEqual(machine.Memory[0x200:0x204], program)
+                self.assertEqual(machine.PC, 0x200)
+                self.assertEqual(len(machine.Memory), machine.MemorySize)
+
+    def test_load_program_raises_error_when_program_does_not_fit(self):
+        machine = Machine(memory_size=0x204)
+
+        with self.assertRaises(ValueError):
+            machine.load_program(bytes(6))
+
+        self.assertEqual(len(machine.Memory), 0x204)
+
+    def test_reset_reuses_memory(self):
+        machine = Machine()
+        memory = machine.Memory
+        machine.load_program(bytes([0x61, 0x05]))
+
+        machine.reset()
+
+        self.assertIs(machine.Memory, memory)
+        self.assertEqual(machine.Memory, Machine.create_memory(machine.MemorySize))
+
+    @staticmethod
+    def _run_by_instructions(program, instructions, delay):
+        machine = Machine()
+        machine.load_program(program)
+        machine.DelayTimer.set_count(delay)
+
+        executed = 0
+        while executed < instructions:
+            executed += machine.execute_next_instruction()
+
+        return machine
+
+    def test_run_skips_delay_timer_wait_loop(self):
+        program = bytearray([0x61, 0x05,  # V1 = 5
+                             0xF0, 0x07,  # V0 = DT
+                             0x30, 0x00,  # skip if V0 == 0
+                             0x12, 0x02,  # jump at 0x202
+                             0x71, 0x01])  # V1 += 1
+        for engine in Machine.ENGINES:
+            machine = Machine(engine=engine)
+            machine.load_program(program)
+            machine.DelayTimer.set_count(3)
+
+            executed = machine.run(1000)
+            expected = MachineTests._run_by_instructions(program, executed, 3)
+
+            self.assertTrue(machine.Idle, engine)
+            self.assertEqual(machine.PC, expected.PC, engine)
+            self.assertEqual(machine.VRegisters, expected.VRegisters, engine)
+
+    def test_run_skips_key_wait_loop_until_key_is_pressed(self):
+        machine = Machine()
+        machine.load_program(bytearray([0x60, 0x07,  # V0 = 7
+                                        0xE0, 0x9E,  # skip if key V0 is pressed
+                                        0x12, 0x02,  # jump at 0x202
+                                        0x61, 0x01]))  # V1 = 1
+
+        machine.run(1000)
+        self.assertTrue(machine.Idle)
+        self.assertEqual(machine.VRegisters[1], 0)
+
+        machine.Keyboard.key_down(7)
+        machine.run(3)
+        self.assertFalse(machine.Idle)
+        self.assertEqual(machine.VRegisters[1], 1)
+
+    def test_machine_runs_after_instruction_raised_error(self):
+        for engine in Machine.ENGINES:
+            machine = Machine(engine=engine)
+            machine.load_program(bytearray([0x00, 0xEE,  # return with empty stack
+                                            0x12, 0x02]))  # jump at itself
+
+            with self.assertRaisesRegex(RuntimeError, 'empty stack'):
+                machine.run(10)
+
+            machine.PC = 0x202
+            self.assertGreaterEqual(machine.run(10), 10, engine)
+
+    def test_run_stops_exactly_after_given_instructions(self):
+        program = bytearray([0x60, 0x01,  # V0 = 1
+                             0x71, 0x01,  # V1 += 1
+                             0x72, 0x02,  # V2 += 2
+                             0x73, 0x03,  # V3 += 3
+                             0x31, 0x10,  # skip if V1 == 0x10
+                             0x12, 0x02,  # jump at 0x202
+                             0x12, 0x0C])  # jump at itself
+        for engine in (Machine.INTERPRETER_ENGINE, Machine.BLOCK_ENGINE):
+            machine = Machine(engine=engine)
+            machine.load_program(program)
+
+            for instructions in (3, 1, 7, 5, 2):
+                self.assertEqual(machine.run(instructions), instructions, engine)
+
+            expected = MachineTests._run_by_instructions(program, 18, 0)
+            self.assertEqual(machine.PC, expected.PC, engine)
+            self.assertEqual(machine.VRegisters, expected.VRegisters, engine)
+
+    def test_error_in_middle_of_block_leaves_same_state_with_every_engine(self):
+        programs = [bytearray([0x71, 0x01,  # V1 += 1
+                               0x60, 0x05,  # V0 = 5
+                               0xF1, 0x29,  # I = char of V1, fails at V1 == 0x10
+                               0x62, 0x07,  # V2 = 7
+                               0x12, 0x00]),  # jump at 0x200
+                    bytearray([0x65, 0x01,  # V5 = 1
+                               0xAF, 0xC0,  # I = 0xFC0
+                               0x76, 0x01,  # V6 += 1
+                               0xF5, 0x1E,  # I += V5
+                               0xF3, 0x65,  # load V0..V3 from I, fails past end of memory
+                               0x12, 0x04])]  # jump at 0x204
+
+        for program in programs:
+            expected = Machine()
+            expected.load_program(program)
+            with self.assertRaises((KeyError, IndexError)):
+                while True:
+                    expected.execute_next_instruction()
+
+            for engine in Machine.ENGINES:
+                machine = Machine(engine=engine)
+                machine.load_program(program)
+
+                with self.assertRaises((KeyError, IndexError)):
+                    machine.run(1000)
+
+                self.assertEqual(machine.PC, expected.PC, engine)
+                self.assertEqual(machine.Cycles, expected.Cycles, engine)
+                self.assertEqual(machine.VRegisters, expected.VRegisters, engine)
+                self.assertEqual(machine.AddressRegister, expected.AddressRegister, engine)
@@ -0,0 +1,58 @@
+import unittest
+from virtualmachine.machine import Machine
+
+
+class ProfilerTests(unittest.TestCase):
+    _program = bytearray([0x22, 0x06,  # call 0x206
+                          0x71, 0x01,  # V1 += 1
+                          0x12, 0x00,  # jump at 0x200
+                          0xA0, 0x00,  # I = sprite of 0
+                          0xD0, 0x05,  # draw sprite at V0, V0
+                          0x00, 0xEE])  # return
+
+    def test_profiler_should_count_instructions_and_addresses(self):
+        machine = Machine(engine=Machine.JIT_ENGINE)
+        machine.load_program(ProfilerTests._program)
+        profiler = machine.enable_profiling()
+
+        machine.run(12)
+
+        self.assertEqual(profiler.Counts['Jsr'], 2)
+        self.assertEqual(profiler.Counts['DrawSprite'], 2)
+        self.assertEqual(sum(profiler.Counts.values()), 12)
+        self.assertEqual(profiler.Addresses[0x200], 2)
+        self.assertEqual(profiler.hot_addresses(1)[0][1], 2)
+        self.assertGreater(profiler.Times['Jsr'], 0)
+
+    def test_profiler_should_count_sprite_pixels_and_collisions(self):
+        machine = Machine()
+        machine.load_program(ProfilerTests._program)
+        profiler = machine.enable_profiling()
+
+        machine.run(12)
+
+        self.assertEqual(profiler.SpritePixels, 2 * 14)  # sprite of 0 has 14 pixels
+        self.assertEqual(profiler.SpriteCollisions, 1)
+
+    def test_folded_stacks_should_contain_subroutines(self):
+        machine = Machine()
+        machine.load_program(ProfilerTests._program)
+        profiler = machine.enable_profiling()
+
+        machine.run(6)
+
+        stacks = [line.rsplit(' ', 1)[0] for line in profiler.folded_stacks()]
+        self.assertIn('main;sub_206;DrawSprite', stacks)
+        self.assertIn('main;AddConstantToRegister', stacks)
+
+    def test_disabled_profiling_should_restore_step(self):
+        machine = Machine(engine=Machine.BLOCK_ENGINE)
+        machine.load_program(ProfilerTests._program)
+        profiler = machine.enable_profiling()
+        machine.disable_profiling()
+
+        executed = machine.run(1)
+
+        self.assertIsNone(machine.Profiler)
+        self.assertEqual(sum(profiler.Counts.values()), 0)
+        self.assertEqual(executed, 1)
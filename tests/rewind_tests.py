@@ -0,0 +1,56 @@
+import unittest
+from virtualmachine.machine import Machine
+from virtualmachine.rewind import RewindBuffer
+
+
+class RewindBufferTests(unittest.TestCase):
+    _program = bytearray([0x22, 0x08,  # call 0x208
+                          0x71, 0x01,  # V1 += 1
+                          0xD1, 0x25,  # draw sprite at V1, V2
+                          0x12, 0x00,  # jump at 0x200
+                          0xF1, 0x29,  # I = sprite of V1
+                          0x00, 0xEE])  # return
+
+    def _run(self, buffer, instructions):
+        machine = Machine()
+        machine.load_program(RewindBufferTests._program)
+        states = []
+
+        for _ in range(instructions):
+            buffer.push(machine)
+            states.append(machine.save_state())
+            machine.execute_next_instruction()
+
+        return machine, states
+
+    def test_state_should_be_restored_by_steps_back(self):
+        buffer = RewindBuffer(capacity=100, keyframe_interval=7)
+        machine, states = self._run(buffer, 50)
+
+        for steps_back in range(50):
+            self.assertEqual(buffer.state(steps_back), states[-1 - steps_back])
+
+    def test_rewind_should_load_state_and_drop_newer_states(self):
+        buffer = RewindBuffer(capacity=100, keyframe_interval=7)
+        machine, states = self._run(buffer, 30)
+
+        self.assertTrue(buffer.rewind(machine, 10))
+
+        self.assertEqual(machine.save_state(), states[-10])
+        self.assertEqual(len(buffer), 20)
+        self.assertEqual(buffer.state(0), states[-11])
+
+        buffer.push(machine)
+        self.assertEqual(len(buffer), 21)
+        self.assertFalse(buffer.rewind(machine, 22))
+        self.assertTrue(buffer.rewind(machine, 21))
+        self.assertEqual(machine.save_state(), states[0])
+        self.assertEqual(len(buffer), 0)
+
+    def test_buffer_should_be_bounded(self):
+        buffer = RewindBuffer(capacity=20, keyframe_interval=5)
+        machine, states = self._run(buffer, 53)
+
+        self.assertLessEqual(len(buffer), 20)
+        self.assertGreater(len(buffer), 15)
+        self.assertEqual(buffer.state(len(buffer) - 1), states[-len(buffer)])
@@ -0,0 +1,104 @@
+import unittest
+from virtualmachine.machine import Machine
+from virtualmachine.rom_cache import RomCache, DecodedProgram
+
+
+class RomCacheTests(unittest.TestCase):
+    _program = bytes([0x60, 0x01,  # V0 = 1
+                      0x71, 0x01,  # V1 += 1
+                      0x12, 0x02])  # jump at 0x202
+
+    def test_known_program_should_not_be_decoded_again(self):
+        cache = RomCache()
+        first = Machine(rom_cache=cache)
+        first.load_program(RomCacheTests._program)
+        second = Machine(rom_cache=cache)
+        second.load_program(bytearray(RomCacheTests._program))
+
+        self.assertEqual((cache.Hits, cache.Misses), (1, 1))
+        self.assertEqual(second.cache_statistics()['blocks'], first.cache_statistics()['blocks'])
+
+    def test_machines_should_get_copies_of_blocks(self):
+        cache = RomCache()
+        first = Machine(rom_cache=cache)
+        first.load_program(RomCacheTests._program)
+        second = Machine(rom_cache=cache)
+        second.load_program(RomCacheTests._program)
+
+        first.Memory[0x203] = 0x05  # V1 += 5
+        first.invalidate_code(0x203, 1)
+        first.run(10)
+        second.run(10)
+
+        self.assertEqual(first.VRegisters[1], 0x19)
+        self.assertEqual(second.VRegisters[1], 0x05)
+
+    def test_compiled_blocks_should_be_shared(self):
+        cache = RomCache()
+        first = Machine(engine=Machine.JIT_ENGINE, rom_cache=cache)
+        first.load_program(RomCacheTests._program)
+        first.run(100)
+        second = Machine(engine=Machine.JIT_ENGINE, rom_cache=cache)
+        second.load_program(RomCacheTests._program)
+        second.run(100)
+
+        decoded = cache.get(RomCache.key(RomCacheTests._program, 0x200, 0x1000))
+
+        self.assertTrue(any(block.Compiled is not None for block in decoded.blocks()))
+        self.assertEqual(second.VRegisters, first.VRegisters)
+
+    def test_least_recently_used_program_should_be_evicted(self):
+        programs = [bytes([0x60, value, 0x12, 0x00]) for value in range(3)]
+        cache = RomCache()
+        Machine(rom_cache=cache).load_program(programs[0])
+        Machine(rom_cache=cache).load_program(programs[1])
+        Machine(rom_cache=cache).load_program(programs[0])
+        cache.MaxSize = cache.size()
+
+        Machine(rom_cache=cache).load_program(programs[2])
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(RomCache.key(programs[1], 0x200, 0x1000)))
+        self.assertIsNotNone(cache.get(RomCache.key(programs[0], 0x200, 0x1000)))
+
+    def test_blocks_decoded_past_end_of_program_should_not_be_shared(self):
+        cache = RomCache()
+        first = Machine(rom_cache=cache)
+        first.load_program(bytes([0x61, 0x05,  # V1 = 5
+                                  0x62, 0x09,  # V2 = 9
+                                  0x12, 0x06,  # jump at 0x206
+                                  0x12, 0x06]))  # jump at itself
+        first.load_program(bytes([0x61, 0x05]))  # memory after program is left from previous program
+        second = Machine(rom_cache=cache)
+        second.load_program(bytes([0x61, 0x05]))
+
+        second.run(10)
+
+        self.assertEqual(second.VRegisters[2], 0)
+        self.assertEqual(second.PC, 0x202)
+        self.assertEqual(second.ExitCode, 0)
+
+    def test_published_compiled_block_should_evict_programs(self):
+        cache = RomCache()
+        Machine(rom_cache=cache).load_program(bytes([0x60, 0x01, 0x12, 0x00]))
+        machine = Machine(engine=Machine.JIT_ENGINE, rom_cache=cache)
+        machine.load_program(RomCacheTests._program)
+        cache.MaxSize = cache.size() + DecodedProgram.COMPILED_SIZE - 1
+
+        machine.run(100)
+
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(RomCache.key(bytes([0x60, 0x01, 0x12, 0x00]), 0x200, 0x1000)))
+        self.assertLessEqual(cache.size(), cache.MaxSize)
+
+    def test_size_should_include_disassembly(self):
+        cache = RomCache()
+        machine = Machine(rom_cache=cache)
+        machine.load_program(RomCacheTests._program)
+
+        decoded = cache.get(RomCache.key(RomCacheTests._program, 0x200, 0x1000))
+        without_disassembly = DecodedProgram(decoded.Program, 0x200, {}, None)
+        with_disassembly = DecodedProgram(decoded.Program, 0x200, {}, machine.disassembly())
+
+        self.assertGreater(with_disassembly.size(), without_disassembly.size())
+        self.assertEqual(cache.size(), decoded.size())
@@ -0,0 +1,138 @@
+import time
+import unittest
+from tools.scheduler import FrameScheduler
+from virtualmachine.input_log import InputLog, InputEvent
+from virtualmachine.machine import Machine
+
+
+class FakeClock:
+    def __init__(self):
+        self.Time = 0.0
+        self.Sleeps = []
+
+    def clock(self):
+        return self.Time
+
+    def sleep(self, delay):
+        self.Sleeps.append(delay)
+        self.Time += delay
+
+
+class FrameSchedulerTests(unittest.TestCase):
+    @staticmethod
+    def _create_machine():
+        machine = Machine()
+        machine.load_program(bytearray([0x71, 0x01,  # V1 += 1
+                                        0x12, 0x00]))  # jump at 0x200
+        return machine
+
+    def test_frames_should_execute_frequency_instructions_per_second(self):
+        machine = FrameSchedulerTests._create_machine()
+        scheduler = FrameScheduler(machine, frequency=500, frame_rate=60)
+
+        executed = sum(scheduler.run_frame() for _ in range(60))
+
+        self.assertLessEqual(abs(executed - 500), 2)
+
+    def test_frame_should_decrease_timers_once(self):
+        machine = FrameSchedulerTests._create_machine()
+        machine.DelayTimer.set_count(10)
+        machine.SoundTimer.set_count(3)
+        scheduler = FrameScheduler(machine)
+
+        for _ in range(4):
+            scheduler.run_frame()
+
+        self.assertEqual(machine.DelayTimer.get_count(), 6)
+        self.assertEqual(machine.SoundTimer.get_count(), 0)
+
+    def test_frame_should_call_handlers(self):
+        frames = []
+        scheduler = FrameScheduler(FrameSchedulerTests._create_machine())
+        scheduler.add_frame_handler(lambda: frames.append(scheduler.Frames))
+
+        scheduler.run_frame()
+        scheduler.run_frame()
+
+        self.assertEqual(frames, [1, 2])
+
+    def test_run_should_follow_deadlines_of_clock(self):
+        clock = FakeClock()
+        scheduler = FrameScheduler(FrameSchedulerTests._create_machine(), clock=clock.clock, sleep=clock.sleep)
+        scheduler.add_frame_handler(lambda: setattr(clock, 'Time', clock.Time + 0.001))  # work of frame
+
+        scheduler.run(60)
+
+        self.assertAlmostEqual(clock.Time, 1.0)
+        self.assertEqual(scheduler.Frames, 60)
+
+    def test_blocked_machine_should_not_owe_instructions(self):
+        machine = Machine()
+        machine.load_program(bytearray([0xF0, 0x0A,  # wait key
+                                        0x12, 0x02]))  # jump at 0x202
+        scheduler = FrameScheduler(machine)
+
+        for _ in range(10):
+            scheduler.run_frame()
+        machine.Keyboard.key_down(1)
+
+        self.assertLessEqual(scheduler.run_frame(), 10)
+
+    def test_turbo_should_not_sleep_and_skip_frames(self):
+        clock = FakeClock()
+        machine = FrameSchedulerTests._create_machine()
+        machine.DelayTimer.set_count(200)
+        scheduler = FrameScheduler(machine, turbo=True, clock=clock.clock, sleep=clock.sleep)
+        displayed = []
+        scheduler.add_frame_handler(lambda: displayed.append(scheduler.Frames))
+        scheduler.add_frame_handler(lambda: setattr(clock, 'Time', clock.Time + 0.001))  # work of displayed frame
+
+        scheduler.run(120)
+
+        self.assertEqual(clock.Sleeps, [])
+        self.assertEqual(machine.DelayTimer.get_count(), 80)
+        self.assertLess(len(displayed), 120)
+        self.assertGreater(scheduler.frame_skip(), 1)
+
+    def test_keys_should_be_applied_at_start_of_frame(self):
+        machine = FrameSchedulerTests._create_machine()
+        scheduler = FrameScheduler(machine)
+
+        scheduler.key_down(5)
+        self.assertFalse(machine.Keyboard.is_key_pressed(5))
+
+        scheduler.run_frame()
+        self.assertTrue(machine.Keyboard.is_key_pressed(5))
+
+    def test_input_log_should_be_replayed_by_cycles(self):
+        machine = FrameSchedulerTests._create_machine()
+        scheduler = FrameScheduler(machine, frequency=600, frame_rate=60,
+                                   input_log=InputLog([InputEvent(25, 3, True), InputEvent(45, 3, False)]))
+
+        pressed = []
+        for _ in range(6):
+            scheduler.run_frame()
+            pressed.append(bool(machine.Keyboard.is_key_pressed(3)))
+
+        self.assertEqual(pressed, [False, False, False, True, True, False])  # frames start at cycles 0, 10, 20..
+
+
+    def test_run_should_park_while_machine_waits_key(self):
+        machine = Machine()
+        machine.load_program(bytearray([0xF0, 0x0A,  # wait key
+                                        0x12, 0x02]))  # jump at 0x202
+        scheduler = FrameScheduler(machine)
+        handled = []
+        scheduler.add_frame_handler(lambda: handled.append(scheduler.Frames))
+
+        scheduler.start()
+        time.sleep(0.3)
+        parked_frames = len(handled)
+        scheduler.key_down(7)
+        time.sleep(0.1)
+        scheduler.stop()
+
+        self.assertLessEqual(parked_frames, 2)
+        self.assertGreaterEqual(scheduler.Frames, 15)
+        self.assertEqual(machine.VRegisters[0], 7)
+        self.assertFalse(machine.Block)
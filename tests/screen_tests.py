@@ -52,3 +52,55 @@ class ScreenTests(unittest.TestCase):
         screen.set_pixel(55, 55, 1)
 
         self.assertEqual(screen.get_pixel(55 % 32, 55 % 64), 1)
+
+    def test_to_bytes_should_pack_rows_by_8_pixels(self):
+        screen = Screen()
+        screen.set_pixel(0, 0, 1)
+        screen.set_pixel(0, 9, 1)
+        screen.set_pixel(31, 63, 1)
+
+        packed = screen.to_bytes()
+
+        self.assertEqual(len(packed), 32 * 8)
+        self.assertEqual(packed[0], 0x80)
+        self.assertEqual(packed[1], 0x40)
+        self.assertEqual(packed[-1], 0x01)
+        self.assertEqual(sum(packed), 0x80 + 0x40 + 0x01)
+
+    def test_draw_sprite_should_wrap_around_and_detect_collision(self):
+        screen = Screen()
+
+        self.assertEqual(screen.draw_sprite(31, 60, [0xFF, 0x81]), 0)
+
+        for x in [60, 61, 62, 63, 0, 1, 2, 3]:
+            self.assertEqual(screen.get_pixel(31, x), 1)
+        self.assertEqual(screen.get_pixel(0, 60), 1)
+        self.assertEqual(screen.get_pixel(0, 61), 0)
+        self.assertEqual(screen.get_pixel(0, 3), 1)
+        self.assertEqual(screen.get_pixel(31, 59), 0)
+        self.assertEqual(screen.get_pixel(31, 4), 0)
+
+        self.assertEqual(screen.draw_sprite(0, 3, [0x80]), 1)
+        self.assertEqual(screen.get_pixel(0, 3), 0)
+
+    def test_draw_sprite_should_mark_changed_rows_dirty(self):
+        screen = Screen()
+        generation = screen.generation()
+
+        screen.draw_sprite(30, 0, [0x80, 0x00, 0x80])
+
+        self.assertEqual(screen.take_dirty_rows(), (1 << 30) | (1 << 0))
+        self.assertEqual(screen.take_dirty_rows(), 0)
+        self.assertGreater(screen.generation(), generation)
+
+    def test_clear_should_mark_only_not_empty_rows_dirty(self):
+        screen = Screen()
+        screen.set_pixel(3, 3, 1)
+        screen.take_dirty_rows()
+
+        screen.clear()
+        generation = screen.generation()
+        screen.clear()
+
+        self.assertEqual(screen.take_dirty_rows(), 1 << 3)
+        self.assertEqual(screen.generation(), generation)
@@ -0,0 +1,71 @@
+import unittest
+from virtualmachine.machine import Machine
+from virtualmachine.snapshot import SnapshotError
+
+
+class SnapshotTests(unittest.TestCase):
+    _program = bytearray([0x22, 0x06,  # call 0x206
+                          0x71, 0x01,  # V1 += 1
+                          0x12, 0x00,  # jump at 0x200
+                          0xA0, 0x00,  # I = sprite of 0
+                          0xD1, 0x05,  # draw sprite at V1, V1
+                          0x00, 0xEE])  # return
+
+    @staticmethod
+    def _get_state(machine):
+        return (bytes(machine.VRegisters), machine.PC, machine.AddressRegister, bytes(machine.Memory),
+                list(machine.Stack.items()), machine.DelayTimer.get_count(), machine.SoundTimer.get_count(),
+                machine.Block, machine.CompatibilityLoadStore, machine.ExitCode, machine.Screen.to_bytes(),
+                [machine.Keyboard.is_key_pressed(key) for key in range(16)], machine.Cycles, machine.Random.getstate())
+
+    def test_loaded_state_should_be_equal_to_saved(self):
+        machine = Machine(compatibility_load_store=True)
+        machine.load_program(SnapshotTests._program)
+        machine.execute_next_instruction()
+        machine.execute_next_instruction()
+        machine.DelayTimer.set_count(30)
+        machine.SoundTimer.set_count(2)
+        machine.Keyboard.key_down(0xA)
+
+        snapshot = machine.save_state()
+        other = Machine()
+        other.load_state(snapshot)
+
+        self.assertEqual(SnapshotTests._get_state(other), SnapshotTests._get_state(machine))
+        self.assertEqual(other.Stack.size(), 1)
+
+    def test_address_register_past_16_bits_should_be_saved(self):
+        machine = Machine()
+        machine.load_program(bytearray([0x60, 0xFF,  # V0 = 0xFF
+                                        0xF0, 0x1E,  # I += V0
+                                        0x12, 0x02]))  # jump at 0x202
+        machine.run(1000)
+
+        other = Machine()
+        other.load_state(machine.save_state())
+
+        self.assertGreater(machine.AddressRegister, 0xFFFF)
+        self.assertEqual(other.AddressRegister, machine.AddressRegister)
+
+    def test_machine_should_continue_from_loaded_state(self):
+        machine = Machine(engine=Machine.JIT_ENGINE)
+        machine.load_program(SnapshotTests._program)
+        machine.run(100)
+        snapshot = machine.save_state()
+
+        machine.run(100)
+        expected = SnapshotTests._get_state(machine)
+
+        machine.load_state(snapshot)
+        machine.run(100)
+
+        self.assertEqual(SnapshotTests._get_state(machine), expected)
+
+    def test_wrong_snapshot_should_raise_error(self):
+        machine = Machine()
+        snapshot = machine.save_state()
+
+        self.assertRaises(SnapshotError, machine.load_state, b'')
+        self.assertRaises(SnapshotError, machine.load_state, b'XXXX' + snapshot[4:])
+        self.assertRaises(SnapshotError, machine.load_state, snapshot[:-1])
+        self.assertRaises(SnapshotError, Machine(memory_size=0x2000).load_state, snapshot)
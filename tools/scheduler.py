@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+"""
+FrameScheduler - runs machine by 60 Hz frames in single thread
+
+Frame k ends at cycle k * frequency // frame_rate of machine (Machine.Cycles), so fractional part is carried,
+every frame decreases delay and sound timers exactly once and calls frame handlers (repaint, sound)
+Machine waiting key spends the rest of frame on waiting (like HeadlessRunner does)
+Keys are applied at start of frame: from key_down/key_up calls of other threads or from input log being replayed,
+so frames depend only on state of machine and run recorded by InputRecorder is replayed by HeadlessRunner exactly
+Frames are aligned to deadlines of monotonic clock, so sleep inaccuracy doesnt accumulate
+When nothing can change until key is pressed (machine waits key or ended program, timers are zero),
+run parks thread until key_down, key_up or stop, frames passed meanwhile are counted without execution
+
+In turbo mode frames are not paced: machine runs as fast as host allows, timers still go by emulated frames,
+frame handlers are called only every Nth frame, N is adapted to measured host time of frame,
+so handlers are called about frame_rate times per second of host time
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class FrameScheduler:
+    MAX_LAG = 0.25  # seconds, if host is late more, scheduler doesnt try to catch up
+
+    def __init__(self, machine, frequency: int = 500, frame_rate: int = 60, turbo: bool = False, input_log=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        if frequency <= 0 or frame_rate <= 0:
+            raise ValueError('Frequency and frame rate must be positive')
+
+        self._machine = machine
+        self._frequency = frequency
+        self._frame_rate = frame_rate
+        self._clock = clock
+        self._sleep = sleep
+        self._handlers = []
+        self._turbo = turbo
+        self._frame_skip = 1
+        self._skipped = 0
+        self._host_frame_time = None
+        self._start_cycles = machine.Cycles
+        self._keys = deque()
+        self._events = input_log.events() if input_log is not None else []
+        self._event_index = 0
+        self._running = False
+        self._thread = None
+        self._wake = threading.Event()  # set by key_down, key_up and stop for parked run
+        self.Frames = 0
+
+    def key_down(self, key: int):
+        self._keys.append((key, True))
+        self._wake.set()
+
+    def key_up(self, key: int):
+        self._keys.append((key, False))
+        self._wake.set()
+
+    def add_frame_handler(self, handler):
+        self._handlers.append(handler)
+
+    def frame_interval(self) -> float:
+        return 1.0 / self._frame_rate
+
+    def frame_skip(self) -> int:
+        """
+        Return N: handlers are called every Nth frame (it is always 1 without turbo mode)
+        """
+
+        return self._frame_skip
+
+    def run_frame(self) -> int:
+        """
+        Execute one frame of emulated time, return amount of executed instructions
+        """
+
+        machine = self._machine
+        keyboard = machine.Keyboard
+        end = self._start_cycles + (self.Frames + 1) * self._frequency // self._frame_rate
+        executed = 0
+
+        while self._keys:
+            key, pressed = self._keys.popleft()
+            keyboard.key_down(key) if pressed else keyboard.key_up(key)
+
+        while self._event_index < len(self._events) and self._events[self._event_index].Cycle <= machine.Cycles:
+            self._events[self._event_index].apply(keyboard)
+            self._event_index += 1
+
+        if machine.ExitCode is None:
+            if machine.Cycles < end and not (machine.Block and not keyboard.is_any_key_pressed()):
+                executed = machine.run(end - machine.Cycles)
+
+            if machine.Block and not keyboard.is_any_key_pressed():
+                machine.Cycles = max(machine.Cycles, end)
+
+        machine.DelayTimer.decrease()
+        machine.SoundTimer.decrease()
+        self.Frames += 1
+
+        self._skipped += 1
+        if self._skipped >= self._frame_skip:
+            self._skipped = 0
+            for handler in self._handlers:
+                handler()
+
+        return executed
+
+    def run(self, frames: int = None):
+        """
+        Run frames in real time until stop is called or given amount of frames is done
+        Run without limit of frames parks while machine waits key (see can_park)
+        """
+
+        self._running = True
+        interval = self.frame_interval()
+        deadline = self._clock()
+        done = 0
+
+        while self._running and (frames is None or done < frames):
+            if frames is None and self.can_park():
+                deadline = self._park(deadline)
+                continue
+
+            start = self._clock()
+            self.run_frame()
+            done += 1
+
+            if self._turbo:
+                self._adapt_frame_skip(self._clock() - start)
+                continue
+
+            deadline += interval
+            delay = deadline - self._clock()
+
+            if delay > 0:
+                self._sleep(delay)
+            elif -delay > FrameScheduler.MAX_LAG:
+                deadline = self._clock()
+
+    def can_park(self) -> bool:
+        """
+        Return True if frames can't change anything until key is pressed
+        """
+
+        machine = self._machine
+
+        return (machine.ExitCode is not None or machine.Block and not machine.Keyboard.is_any_key_pressed()) \
+            and machine.DelayTimer.get_count() == 0 and machine.SoundTimer.get_count() == 0 \
+            and len(self._keys) == 0 and self._event_index == len(self._events)
+
+    def _park(self, deadline: float) -> float:
+        """
+        Wait for key or stop, count frames passed meanwhile like run_frame would do and return deadline of next frame
+        """
+
+        self._wake.clear()
+        if self._running and self.can_park():  # key may come before clear
+            self._wake.wait()
+
+        if self._turbo:
+            return self._clock()  # frames are not paced by clock in turbo mode, so none passed
+
+        interval = self.frame_interval()
+        passed = int((self._clock() - deadline) / interval)
+
+        if passed <= 0:
+            return deadline
+
+        # machine doesnt execute anything and timers are zero, so only cycles of machine go
+        self.Frames += passed
+        end = self._start_cycles + self.Frames * self._frequency // self._frame_rate
+        self._machine.Cycles = max(self._machine.Cycles, end)
+
+        return deadline + passed * interval
+
+    def _adapt_frame_skip(self, host_frame_time: float):
+        if self._host_frame_time is None:
+            self._host_frame_time = host_frame_time
+        else:
+            self._host_frame_time = 0.9 * self._host_frame_time + 0.1 * host_frame_time
+
+        if self._host_frame_time <= 0:
+            return
+
+        self._frame_skip = max(1, int(self.frame_interval() / self._host_frame_time))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
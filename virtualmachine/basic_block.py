@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+"""
+BasicBlock - straight run of instructions which ends at terminator instruction
+Terminator is JumpInstruction (it changes PC itself) or instruction after which
+block can not be continued: WaitKey may block machine, Bcd and StoreRegisters may rewrite code
+
+BlockCache - blocks of machine code by start address
+Hits and Misses count lookups of blocks by get
+Blocks are invalidated by writes into memory covered by them (see Machine.invalidate_code)
+Blocks of loaded program may be installed from process-wide cache (see virtualmachine.rom_cache)
+
+Block which starts idle loop gets Idle check: function(machine) which returns True if iterations of the loop
+don't change state of machine until next timer tick or key event, LoopSize is amount of instructions of iteration
+Loops are found by patterns: jump to itself, wait of delay timer (Fx07, 3xNN or 4xNN, jump back),
+wait of key (Ex9E or ExA1, jump back)
+
+Code and Exit are Body and Terminator executed by interpreter: frequent sequences of instructions
+are fused into superinstructions (see virtualmachine.fusion), Body and Terminator stay as decoded for JIT
+"""
+
+from virtualmachine.fusion import fuse, DelayTimerWait
+from virtualmachine.instruction import JumpInstruction
+from virtualmachine.instructions import WaitKey, Bcd, StoreRegisters, Jmp, Skeq, Skne, GetDelayTimer, \
+    SkipIfKeyPressed, SkipIfKeyNotPressed
+
+
+class BasicBlock:
+    def __init__(self, start: int, body: list, terminator, terminator_address: int, terminator_is_jump: bool):
+        self.Start = start
+        self.Body = body
+        self.Terminator = terminator
+        self.Code = body
+        self.Exit = terminator
+        self.TerminatorAddress = terminator_address
+        self.TerminatorIsJump = terminator_is_jump
+        self.End = terminator_address + 2 if terminator is not None else terminator_address
+        self.Size = len(body) + (1 if terminator is not None else 0)
+        self.MaxSize = self.Size  # max amount of instructions executed by Code and Exit
+        self.CodeEnd = self.End  # end of code block depends on, it is extended by compiled blocks
+        self.Hits = 0
+        self.Compiled = None
+        self.Idle = None
+        self.LoopSize = 0
+
+    def copy(self):
+        """
+        Return block with same code and compiled function and without hits, instructions are shared
+        """
+
+        block = BasicBlock.__new__(BasicBlock)
+        block.__dict__.update(self.__dict__)
+        block.Hits = 0
+
+        return block
+
+
+class BlockCache:
+    def __init__(self, memory_size: int, instruction_factory):
+        self._blocks = dict()
+        self._code_mask = bytearray(memory_size)
+        self._instruction_factory = instruction_factory
+        self._decode_table = instruction_factory.decode_table()
+        self.Hits = 0
+        self.Misses = 0
+
+        self._jump_type = JumpInstruction
+        self._barrier_types = (WaitKey, Bcd, StoreRegisters)
+
+    def get(self, address: int) -> BasicBlock:
+        block = self._blocks.get(address)
+
+        if block is None:
+            self.Misses += 1
+        else:
+            self.Hits += 1
+
+        return block
+
+    def build(self, machine, address: int) -> BasicBlock:
+        body = []
+        memory = machine.Memory
+        decode_table = self._decode_table
+        start = address
+
+        while address < machine.MemorySize - 1:
+            opcode = (memory[address] << 8) | memory[address + 1]
+            instruction = decode_table[opcode]
+
+            if opcode == 0 or instruction is None:
+                if address == start and opcode != 0:
+                    # raises error about unknown instruction
+                    self._instruction_factory.from_opcode(opcode.to_bytes(2, 'big'))
+                break
+
+            if isinstance(instruction, self._jump_type):
+                return self._add_built(machine, BasicBlock(start, body, instruction, address, True))
+
+            if isinstance(instruction, self._barrier_types):
+                return self._add_built(machine, BasicBlock(start, body, instruction, address, False))
+
+            body.append(instruction)
+            address += 2
+
+        return self._add_built(machine, BasicBlock(start, body, None, address, False))
+
+    def region(self, machine, block: BasicBlock, is_continued, max_size: int) -> list:
+        """
+        Return block and blocks following it while is_continued(terminator) and total size less max_size
+        Code of following blocks becomes code of given block
+        """
+
+        blocks = [block]
+        size = block.Size
+
+        while is_continued(blocks[-1].Terminator) and size < max_size:
+            address = blocks[-1].End
+
+            if address >= machine.MemorySize - 1:
+                break
+
+            if self._decode_table[(machine.Memory[address] << 8) | machine.Memory[address + 1]] is None:
+                break
+
+            following = self._blocks.get(address) or self.build(machine, address)
+            blocks.append(following)
+            size += following.Size
+
+        block.CodeEnd = max(block.CodeEnd, blocks[-1].End)
+        self._mark(block)
+
+        return blocks
+
+    def predecode(self, machine, addresses):
+        """
+        Build blocks starting at given addresses of code (found by disassembly of program)
+        """
+
+        decode_table = self._decode_table
+
+        for address in addresses:
+            if address >= machine.MemorySize - 1 or address in self._blocks:
+                continue
+
+            opcode = (machine.Memory[address] << 8) | machine.Memory[address + 1]
+
+            if opcode != 0 and decode_table[opcode] is not None:
+                self.build(machine, address)
+
+    def cached(self) -> list:
+        """
+        Return cached blocks (not copies, they must not be changed)
+        """
+
+        return list(self._blocks.values())
+
+    def blocks(self) -> dict:
+        """
+        Return copies of blocks by start address
+        """
+
+        return {start: block.copy() for start, block in self._blocks.items()}
+
+    def install(self, blocks: list):
+        """
+        Add blocks built before (by cache of this or another machine with the same code)
+        """
+
+        for block in blocks:
+            self._add(block)
+
+    def invalidate(self, address: int, length: int):
+        if self._code_mask.find(1, address, address + length) == -1:
+            return
+
+        end = address + length
+        for start, block in list(self._blocks.items()):
+            if block.Start < end and address < block.CodeEnd:
+                del self._blocks[start]
+
+        self._code_mask[:] = bytes(len(self._code_mask))
+        for block in self._blocks.values():
+            self._mark(block)
+
+    def clear(self):
+        self._blocks.clear()
+        self._code_mask[:] = bytes(len(self._code_mask))
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def _add_built(self, machine, block: BasicBlock) -> BasicBlock:
+        block.Idle = self._find_idle_loop(machine, block)
+        self._fuse(machine, block)
+        return self._add(block)
+
+    def _fuse(self, machine, block: BasicBlock):
+        following_address = block.TerminatorAddress + 2
+        following = None
+
+        if block.Terminator is not None and following_address < machine.MemorySize - 1:
+            following = self._decode_table[(machine.Memory[following_address] << 8)
+                                           | machine.Memory[following_address + 1]]
+
+        block.Code, block.Exit = fuse(block.Body, block.Terminator, following)
+
+        if isinstance(block.Exit, DelayTimerWait):
+            block.CodeEnd = max(block.CodeEnd, following_address + 2)
+            block.MaxSize = block.Size + 1
+
+    def _find_idle_loop(self, machine, block: BasicBlock):
+        start = block.Start
+        terminator = block.Terminator
+
+        if len(block.Body) == 0 and isinstance(terminator, Jmp) and terminator.nnn == start:
+            block.LoopSize = 1
+            return _always_idle
+
+        # other loops are skip and jump back to start of block, jump is a part of code of block
+        jump_address = block.TerminatorAddress + 2
+        if jump_address >= machine.MemorySize - 1:
+            return None
+
+        jump = self._decode_table[(machine.Memory[jump_address] << 8) | machine.Memory[jump_address + 1]]
+        if not isinstance(jump, Jmp) or jump.nnn != start:
+            return None
+
+        idle = None
+
+        if len(block.Body) == 1 and isinstance(block.Body[0], GetDelayTimer) \
+                and isinstance(terminator, (Skeq, Skne)) and terminator.x == block.Body[0].x:
+            idle = _delay_timer_wait(terminator.x, terminator.nn, isinstance(terminator, Skne))
+        elif len(block.Body) == 0 and isinstance(terminator, (SkipIfKeyPressed, SkipIfKeyNotPressed)):
+            idle = _key_wait(terminator.x, isinstance(terminator, SkipIfKeyNotPressed))
+
+        if idle is not None:
+            block.LoopSize = block.Size + 1
+            block.CodeEnd = max(block.CodeEnd, jump_address + 2)
+
+        return idle
+
+    def _add(self, block: BasicBlock) -> BasicBlock:
+        self._blocks[block.Start] = block
+        self._mark(block)
+        return block
+
+    def _mark(self, block: BasicBlock):
+        self._code_mask[block.Start:block.CodeEnd] = b'\x01' * (block.CodeEnd - block.Start)
+
+
+def _always_idle(machine) -> bool:
+    return True
+
+
+def _delay_timer_wait(register: int, value: int, loop_while_equal: bool):
+    def is_idle(machine) -> bool:
+        count = machine.DelayTimer.get_count()
+
+        if (count == value) != loop_while_equal:
+            return False
+
+        machine.VRegisters[register] = count  # as loop would do
+        return True
+
+    return is_idle
+
+
+def _key_wait(register: int, loop_while_pressed: bool):
+    def is_idle(machine) -> bool:
+        key = machine.VRegisters[register]
+        return key < 16 and bool(machine.Keyboard.is_key_pressed(key)) == loop_while_pressed
+
+    return is_idle
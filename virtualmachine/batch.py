@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+
+"""
+BatchMachine - many machines which are stepped together by NumPy (optional dependency)
+
+State of N machines is stored by arrays:
+ VRegisters - (N, 16) uint8, Memory - (N, memory size) uint8, Screen - (N, 32, 64) uint8
+ PC, AddressRegister, timers, stacks and keys - arrays by machine
+Every step machines are grouped by PC and opcode, every group executes vectorized instruction,
+so machines in lockstep execute one instruction per step and diverged machines execute masked groups
+Machine which ended program or raised error is halted, its error is stored at Errors
+Every machine has its own random.Random for Rand, machine i of batch with seed s draws the same values
+as Machine with seed s + i
+"""
+
+import os
+import random
+
+from parser.instruction_factory import InstructionFactory
+from virtualmachine.instructions import *
+from virtualmachine.machine import Machine
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('BatchMachine requires numpy, install it by pip install numpy')
+
+    return numpy
+
+
+class BatchMachine:
+    STACK_SIZE = 64
+
+    def __init__(self, count: int, memory_size: int = 0x1000, compatibility_load_store: bool = False,
+                 seed: int = None):
+        np = _import_numpy()
+        self._np = np
+
+        self.Count = count
+        self.MemorySize = memory_size
+        self.CompatibilityLoadStore = compatibility_load_store
+
+        self.Memory = np.tile(np.frombuffer(Machine.create_memory(memory_size), dtype=np.uint8), (count, 1))
+        self.VRegisters = np.zeros((count, 16), dtype=np.uint8)
+        self.PC = np.zeros(count, dtype=np.int64)
+        self.AddressRegister = np.zeros(count, dtype=np.int64)
+        self.DelayTimer = np.zeros(count, dtype=np.uint8)
+        self.SoundTimer = np.zeros(count, dtype=np.uint8)
+        self.Stack = np.zeros((count, BatchMachine.STACK_SIZE), dtype=np.int64)
+        self.StackSize = np.zeros(count, dtype=np.int64)
+        self.Screen = np.zeros((count, 32, 64), dtype=np.uint8)
+        self.Keys = np.zeros((count, 16), dtype=bool)
+        self.Block = np.zeros(count, dtype=bool)
+        self.Halted = np.zeros(count, dtype=bool)
+        self.Errors = [None] * count
+
+        self.Randoms = [random.Random(None if seed is None else seed + i) for i in range(count)]
+        self._decode_table = InstructionFactory.shared().decode_table()
+        self._operations = {
+            Cls: self._cls,
+            Rts: self._rts,
+            Jmp: self._jmp,
+            Jsr: self._jsr,
+            Skeq: self._skeq,
+            Skne: self._skne,
+            SkeqRegister: self._skeq_register,
+            MovConstantToRegister: self._mov_constant_to_register,
+            AddConstantToRegister: self._add_constant_to_register,
+            MovRegisterToRegister: self._mov_register_to_register,
+            Or: self._or,
+            And: self._and,
+            Xor: self._xor,
+            AddRegisterToRegister: self._add_register_to_register,
+            SubRegisterToRegister: self._sub_register_to_register,
+            Shr: self._shr,
+            Subn: self._subn,
+            Shl: self._shl,
+            SkneRegisters: self._skne_registers,
+            Mvi: self._mvi,
+            Jmi: self._jmi,
+            Rand: self._rand,
+            DrawSprite: self._draw_sprite,
+            SkipIfKeyPressed: self._skip_if_key_pressed,
+            SkipIfKeyNotPressed: self._skip_if_key_not_pressed,
+            GetDelayTimer: self._get_delay_timer,
+            WaitKey: self._wait_key,
+            SetDelayTimer: self._set_delay_timer,
+            SetSoundTimer: self._set_sound_timer,
+            Adi: self._adi,
+            LoadChar: self._load_char,
+            Bcd: self._bcd,
+            StoreRegisters: self._store_registers,
+            LoadRegisters: self._load_registers,
+        }
+
+    def load_program(self, program, start_address: int = 0x200):
+        if isinstance(program, (str, os.PathLike)):
+            with open(program, 'rb') as program_file:
+                program = program_file.read()
+
+        if start_address < 0 or start_address + len(program) > self.MemorySize:
+            raise ValueError('Program of {} bytes does not fit into memory at 0x{:03X}'.format(len(program),
+                                                                                             start_address))
+
+        program = self._np.frombuffer(program, dtype=self._np.uint8)
+        self.Memory[:, start_address:start_address + len(program)] = program
+        self.PC[:] = start_address
+
+    def key_down(self, key: int, machines=slice(None)):
+        self.Keys[machines, key] = True
+
+    def key_up(self, key: int, machines=slice(None)):
+        self.Keys[machines, key] = False
+
+    def decrease_timers(self):
+        np = self._np
+        self.DelayTimer -= (self.DelayTimer != 0).astype(np.uint8)
+        self.SoundTimer -= (self.SoundTimer != 0).astype(np.uint8)
+
+    def step(self) -> int:
+        """
+        Execute next instruction at every not halted machine
+        Return amount of machines which executed instruction and are not halted
+        """
+
+        np = self._np
+        machines = np.flatnonzero(~self.Halted)
+
+        if len(machines) == 0:
+            return 0
+
+        pc = self.PC[machines]
+        out_of_memory = pc >= self.MemorySize - 1
+        if out_of_memory.any():
+            ended = machines[pc >= self.MemorySize]
+            self.Halted[ended] = True
+            self._fail(machines[pc == self.MemorySize - 1], 'Memory index out of range')
+            machines, pc = machines[~out_of_memory], pc[~out_of_memory]
+
+        opcodes = (self.Memory[machines, pc].astype(np.int64) << 8) | self.Memory[machines, pc + 1]
+
+        if len(machines) != 0 and (opcodes == opcodes[0]).all() and (pc == pc[0]).all():
+            # machines are in lockstep
+            self._execute(int(opcodes[0]), machines)
+        else:
+            keys = (pc << 16) | opcodes
+            for key in np.unique(keys):
+                self._execute(int(key) & 0xFFFF, machines[keys == key])
+
+        return int(np.count_nonzero(~self.Halted[machines]))
+
+    def run(self, steps: int) -> int:
+        """
+        Execute given amount of steps, return amount of executed instructions by all machines
+        """
+
+        executed = 0
+
+        for _ in range(steps):
+            step = self.step()
+            if step == 0:
+                break
+            executed += step
+
+        return executed
+
+    def machine(self, index: int) -> Machine:
+        """
+        Return copy of given machine as Machine
+        """
+
+        machine = Machine(self.MemorySize, self.CompatibilityLoadStore)
+        machine.Memory[:] = self.Memory[index].tobytes()
+        machine.VRegisters[:] = self.VRegisters[index].tobytes()
+        machine.PC = int(self.PC[index])
+        machine.AddressRegister = int(self.AddressRegister[index])
+        machine.DelayTimer.set_count(int(self.DelayTimer[index]))
+        machine.SoundTimer.set_count(int(self.SoundTimer[index]))
+        machine.Block = bool(self.Block[index])
+        machine.Random.setstate(self.Randoms[index].getstate())
+
+        for address in self.Stack[index, :self.StackSize[index]]:
+            machine.Stack.push(int(address))
+
+        for key in self._np.flatnonzero(self.Keys[index]):
+            machine.Keyboard.key_down(int(key))
+
+        for y, x in zip(*self._np.nonzero(self.Screen[index])):
+            machine.Screen.set_pixel(int(y), int(x), 1)
+
+        if self.Halted[index] and self.Errors[index] is None:
+            machine.ExitCode = 0
+
+        return machine
+
+    def set_machine(self, index: int, machine: Machine):
+        """
+        Copy state of given Machine into given machine of batch
+        """
+
+        np = self._np
+
+        self.Memory[index] = np.frombuffer(bytes(machine.Memory), dtype=np.uint8)
+        self.VRegisters[index] = np.frombuffer(bytes(machine.VRegisters), dtype=np.uint8)
+        self.PC[index] = machine.PC
+        self.AddressRegister[index] = machine.AddressRegister
+        self.DelayTimer[index] = machine.DelayTimer.get_count()
+        self.SoundTimer[index] = machine.SoundTimer.get_count()
+        self.Block[index] = machine.Block
+        self.Randoms[index].setstate(machine.Random.getstate())
+        self.Halted[index] = machine.ExitCode is not None
+        self.Errors[index] = None
+
+        stack = list(machine.Stack.items())[::-1]
+        self.Stack[index, :len(stack)] = stack
+        self.StackSize[index] = len(stack)
+
+        self.Keys[index] = [machine.Keyboard.is_key_pressed(key) for key in range(16)]
+        self.Screen[index] = np.unpackbits(np.frombuffer(machine.Screen.to_bytes(), dtype=np.uint8)).reshape(32, 64)
+
+    def _execute(self, opcode: int, machines):
+        instruction = self._decode_table[opcode]
+
+        if opcode == 0:
+            self.Halted[machines] = True
+            return
+
+        if instruction is None:
+            self._fail(machines, 'Unknown instruction {}'.format(hex(opcode)))
+            return
+
+        self._operations[type(instruction)](instruction, machines)
+
+    def _fail(self, machines, error: str):
+        for machine in machines:
+            self.Errors[machine] = error
+        self.Halted[machines] = True
+
+    def _skip_if(self, machines, condition):
+        self.PC[machines] += self._np.where(condition, 4, 2)
+
+    def _next(self, machines):
+        self.PC[machines] += 2
+
+    def _cls(self, instruction, machines):
+        self.Screen[machines] = 0
+        self._next(machines)
+
+    def _rts(self, instruction, machines):
+        empty = self.StackSize[machines] == 0
+        if empty.any():
+            self._fail(machines[empty], 'Pop from empty stack')
+            machines = machines[~empty]
+
+        self.StackSize[machines] -= 1
+        self.PC[machines] = self.Stack[machines, self.StackSize[machines]]
+
+    def _jmp(self, instruction, machines):
+        self.PC[machines] = instruction.nnn
+
+    def _jsr(self, instruction, machines):
+        full = self.StackSize[machines] == BatchMachine.STACK_SIZE
+        if full.any():
+            self._fail(machines[full], 'Stack overflow')
+            machines = machines[~full]
+
+        self.Stack[machines, self.StackSize[machines]] = self.PC[machines] + 2
+        self.StackSize[machines] += 1
+        self.PC[machines] = instruction.nnn
+
+    def _skeq(self, instruction, machines):
+        self._skip_if(machines, self.VRegisters[machines, instruction.x] == instruction.nn)
+
+    def _skne(self, instruction, machines):
+        self._skip_if(machines, self.VRegisters[machines, instruction.x] != instruction.nn)
+
+    def _skeq_register(self, instruction, machines):
+        v = self.VRegisters
+        self._skip_if(machines, v[machines, instruction.x] == v[machines, instruction.y])
+
+    def _skne_registers(self, instruction, machines):
+        v = self.VRegisters
+        self._skip_if(machines, v[machines, instruction.x] != v[machines, instruction.y])
+
+    def _mov_constant_to_register(self, instruction, machines):
+        self.VRegisters[machines, instruction.x] = instruction.nn
+        self._next(machines)
+
+    def _add_constant_to_register(self, instruction, machines):
+        v = self.VRegisters
+        v[machines, instruction.x] = (v[machines, instruction.x].astype(self._np.int64)
+                                         + instruction.nn) & 0xFF
+        self._next(machines)
+
+    def _mov_register_to_register(self, instruction, machines):
+        self.VRegisters[machines, instruction.x] = self.VRegisters[machines, instruction.y]
+        self._next(machines)
+
+    def _or(self, instruction, machines):
+        v = self.VRegisters
+        v[machines, instruction.x] = v[machines, instruction.x] | v[machines, instruction.y]
+        self._next(machines)
+
+    def _and(self, instruction, machines):
+        v = self.VRegisters
+        v[machines, instruction.x] = v[machines, instruction.x] & v[machines, instruction.y]
+        self._next(machines)
+
+    def _xor(self, instruction, machines):
+        v = self.VRegisters
+        v[machines, instruction.x] = v[machines, instruction.x] ^ v[machines, instruction.y]
+        self._next(machines)
+
+    def _add_register_to_register(self, instruction, machines):
+        v = self.VRegisters
+        add = v[machines, instruction.x].astype(self._np.int64) + v[machines, instruction.y]
+        v[machines, 0xF] = add >= 0x100
+        v[machines, instruction.x] = add & 0xFF
+        self._next(machines)
+
+    def _sub_register_to_register(self, instruction, machines):
+        v = self.VRegisters
+        sub = v[machines, instruction.x].astype(self._np.int64) - v[machines, instruction.y]
+        v[machines, 0xF] = sub > 0
+        v[machines, instruction.x] = sub & 0xFF
+        self._next(machines)
+
+    def _shr(self, instruction, machines):
+        v = self.VRegisters
+        v[machines, 0xF] = v[machines, instruction.x] & 1
+        v[machines, instruction.x] = v[machines, instruction.x] >> 1
+        self._next(machines)
+
+    def _subn(self, instruction, machines):
+        v = self.VRegisters
+        sub = v[machines, instruction.y].astype(self._np.int64) - v[machines, instruction.x]
+        v[machines, 0xF] = sub > 0
+        v[machines, instruction.x] = sub & 0xFF
+        self._next(machines)
+
+    def _shl(self, instruction, machines):
+        v = self.VRegisters
+        v[machines, 0xF] = v[machines, instruction.x] >> 7
+        v[machines, instruction.x] = (v[machines, instruction.x].astype(self._np.int64) << 1) & 0xFF
+        self._next(machines)
+
+    def _mvi(self, instruction, machines):
+        self.AddressRegister[machines] = instruction.nnn
+        self._next(machines)
+
+    def _jmi(self, instruction, machines):
+        self.PC[machines] = self.VRegisters[machines, 0].astype(self._np.int64) + instruction.nnn
+
+    def _rand(self, instruction, machines):
+        values = [self.Randoms[machine].getrandbits(8) for machine in machines]
+        self.VRegisters[machines, instruction.x] = self._np.array(values, dtype=self._np.uint8) & instruction.nn
+        self._next(machines)
+
+    def _draw_sprite(self, instruction, machines):
+        np = self._np
+        v = self.VRegisters
+
+        v[machines, 0xF] = 0
+        y = v[machines, instruction.y].astype(np.int64)
+        x = v[machines, instruction.x].astype(np.int64)
+        address = self.AddressRegister[machines]
+
+        columns = (x[:, None] + np.arange(8)) % 64
+        collision = np.zeros(len(machines), dtype=bool)
+        rows = machines[:, None]
+
+        for i in range(instruction.n):
+            inside = address + i < self.MemorySize
+            line = np.where(inside, self.Memory[machines, np.minimum(address + i, self.MemorySize - 1)], 0)
+            bits = np.unpackbits(line.astype(np.uint8)[:, None], axis=1)
+            row = ((y + i) % 32)[:, None]
+
+            collision |= (self.Screen[rows, row, columns] & bits).any(axis=1)
+            self.Screen[rows, row, columns] ^= bits
+
+        v[machines, 0xF] = collision
+        self._next(machines)
+
+    def _keys_of(self, instruction, machines):
+        keys = self.VRegisters[machines, instruction.x]
+        wrong = keys > 0xF
+
+        if wrong.any():
+            self._fail(machines[wrong], 'Wrong key')
+            machines, keys = machines[~wrong], keys[~wrong]
+
+        return machines, self.Keys[machines, keys]
+
+    def _skip_if_key_pressed(self, instruction, machines):
+        machines, pressed = self._keys_of(instruction, machines)
+        self._skip_if(machines, pressed)
+
+    def _skip_if_key_not_pressed(self, instruction, machines):
+        machines, pressed = self._keys_of(instruction, machines)
+        self._skip_if(machines, ~pressed)
+
+    def _get_delay_timer(self, instruction, machines):
+        self.VRegisters[machines, instruction.x] = self.DelayTimer[machines]
+        self._next(machines)
+
+    def _wait_key(self, instruction, machines):
+        pressed = self.Keys[machines].any(axis=1)
+        self.Block[machines] = ~pressed
+
+        machines = machines[pressed]
+        self.VRegisters[machines, instruction.x] = self.Keys[machines].argmax(axis=1)
+        self._next(machines)
+
+    def _set_delay_timer(self, instruction, machines):
+        self.DelayTimer[machines] = self.VRegisters[machines, instruction.x]
+        self._next(machines)
+
+    def _set_sound_timer(self, instruction, machines):
+        self.SoundTimer[machines] = self.VRegisters[machines, instruction.x]
+        self._next(machines)
+
+    def _adi(self, instruction, machines):
+        self.AddressRegister[machines] += self.VRegisters[machines, instruction.x]
+        self._next(machines)
+
+    def _load_char(self, instruction, machines):
+        digits = self.VRegisters[machines, instruction.x].astype(self._np.int64)
+        wrong = digits > 0xF
+
+        if wrong.any():
+            self._fail(machines[wrong], 'Wrong digit')
+            machines, digits = machines[~wrong], digits[~wrong]
+
+        self.AddressRegister[machines] = digits * 5
+        self._next(machines)
+
+    def _memory_range(self, machines, length: int):
+        address = self.AddressRegister[machines]
+        outside = address + length > self.MemorySize
+
+        if outside.any():
+            self._fail(machines[outside], 'Memory index out of range')
+            machines, address = machines[~outside], address[~outside]
+
+        return machines, address
+
+    def _bcd(self, instruction, machines):
+        machines, address = self._memory_range(machines, 3)
+        value = self.VRegisters[machines, instruction.x]
+
+        self.Memory[machines, address] = value // 100
+        self.Memory[machines, address + 1] = value // 10 % 10
+        self.Memory[machines, address + 2] = value % 10
+        self._next(machines)
+
+    def _store_registers(self, instruction, machines):
+        machines, address = self._memory_range(machines, instruction.x + 1)
+
+        for i in range(instruction.x + 1):
+            self.Memory[machines, address + i] = self.VRegisters[machines, i]
+
+        if self.CompatibilityLoadStore:
+            self.AddressRegister[machines] += instruction.x + 1
+        self._next(machines)
+
+    def _load_registers(self, instruction, machines):
+        machines, address = self._memory_range(machines, instruction.x + 1)
+
+        for i in range(instruction.x + 1):
+            self.VRegisters[machines, i] = self.Memory[machines, address + i]
+
+        if self.CompatibilityLoadStore:
+            self.AddressRegister[machines] += instruction.x + 1
+        self._next(machines)
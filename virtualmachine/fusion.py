@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+"""
+Superinstructions - frequent sequences of instructions executed by single dispatch
+
+Block keeps its decoded instructions (Body, Terminator) for JIT and analysis,
+interpreter executes Code and Exit of block, where fused sequences are replaced by superinstructions:
+ MviDrawSprite - ANNN, DxyN
+ MovSetDelayTimer - 6XNN, Fx15
+ AddSkeq - 7XNN, 3XNN (terminator)
+ DelayTimerWait - Fx07, 3XNN (terminator), 1NNN (instruction after terminator, it is executed if not skipped)
+Superinstructions have the same effect on registers, flags and PC as their instructions executed one by one
+Execute of terminator returns amount of executed instructions after terminator (None is 0)
+"""
+
+from virtualmachine.instructions import *
+
+
+class MviDrawSprite:
+    Size = 2  # amount of fused instructions
+
+    __slots__ = ('nnn', 'x', 'y', 'n')
+
+    def __init__(self, mvi: Mvi, draw: DrawSprite):
+        self.nnn = mvi.nnn
+        self.x = draw.x
+        self.y = draw.y
+        self.n = draw.n
+
+    def execute(self, machine):
+        address = machine.AddressRegister = self.nnn
+        registers = machine.VRegisters
+        registers[0xF] = 0
+
+        registers[0xF] = machine.Screen.draw_sprite(registers[self.y], registers[self.x],
+                                                    machine.Memory[address:address + self.n])
+
+
+class MovSetDelayTimer:
+    Size = 2  # amount of fused instructions
+
+    __slots__ = ('x', 'nn', 'timer_register')
+
+    def __init__(self, mov: MovConstantToRegister, set_delay: SetDelayTimer):
+        self.x = mov.x
+        self.nn = mov.nn
+        self.timer_register = set_delay.x
+
+    def execute(self, machine):
+        machine.VRegisters[self.x] = self.nn
+        machine.DelayTimer.set_count(machine.VRegisters[self.timer_register])
+
+
+class AddSkeq:
+    __slots__ = ('x', 'nn', 'skip_register', 'skip_value')
+
+    def __init__(self, add: AddConstantToRegister, skip: Skeq):
+        self.x = add.x
+        self.nn = add.nn
+        self.skip_register = skip.x
+        self.skip_value = skip.nn
+
+    def execute(self, machine):
+        registers = machine.VRegisters
+        registers[self.x] = (registers[self.x] + self.nn) & 0xFF
+
+        machine.PC += 4 if registers[self.skip_register] == self.skip_value else 2
+
+
+class DelayTimerWait:
+    __slots__ = ('x', 'skip_register', 'skip_value', 'nnn')
+
+    def __init__(self, get_delay: GetDelayTimer, skip: Skeq, jump: Jmp):
+        self.x = get_delay.x
+        self.skip_register = skip.x
+        self.skip_value = skip.nn
+        self.nnn = jump.nnn
+
+    def execute(self, machine):
+        registers = machine.VRegisters
+        registers[self.x] = machine.DelayTimer.get_count()
+
+        if registers[self.skip_register] == self.skip_value:
+            machine.PC += 4
+            return 0
+
+        machine.PC = self.nnn
+        return 1
+
+
+FUSIONS = (MviDrawSprite, MovSetDelayTimer, AddSkeq, DelayTimerWait)
+
+_PAIRS = {
+    (Mvi, DrawSprite): MviDrawSprite,
+    (MovConstantToRegister, SetDelayTimer): MovSetDelayTimer,
+}
+
+
+def fuse(body: list, terminator, following) -> tuple:
+    """
+    Return (code, exit) - body and terminator of block with fused sequences,
+    following is instruction after terminator (None if it is unknown)
+    Exit includes following instruction if it is DelayTimerWait
+    """
+
+    code = []
+    exit_instruction = terminator
+
+    if len(body) != 0 and type(terminator) is Skeq:
+        last = body[-1]
+
+        if type(last) is AddConstantToRegister:
+            exit_instruction = AddSkeq(last, terminator)
+            body = body[:-1]
+        elif type(last) is GetDelayTimer and type(following) is Jmp:
+            exit_instruction = DelayTimerWait(last, terminator, following)
+            body = body[:-1]
+
+    i = 0
+    while i < len(body):
+        fusion = _PAIRS.get((type(body[i]), type(body[i + 1]))) if i + 1 < len(body) else None
+
+        if fusion is not None:
+            code.append(fusion(body[i], body[i + 1]))
+            i += 2
+        else:
+            code.append(body[i])
+            i += 1
+
+    return code, exit_instruction
+
+
+def count_fusions(code: list, exit_instruction) -> dict:
+    """
+    Return amount of superinstructions of every kind in code and exit of block
+    """
+
+    counts = {}
+
+    for instruction in code + [exit_instruction]:
+        if type(instruction) in FUSIONS:
+            name = type(instruction).__name__
+            counts[name] = counts.get(name, 0) + 1
+
+    return counts
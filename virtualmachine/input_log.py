@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+InputLog - key events of keyboard keyed by cycle (amount of executed instructions) at which they happen
+
+Text format is events separated by whitespaces or commas:
+ <cycle>:+<key> - key is pressed
+ <cycle>:-<key> - key is released
+key is hex digit, for example '100:+A 250:-A'
+
+InputRecorder - records key events of machine keyboard into InputLog keyed by Machine.Cycles
+"""
+
+
+class InputLogError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+
+
+class InputEvent:
+    def __init__(self, cycle: int, key: int, pressed: bool):
+        if not isinstance(cycle, int) or cycle < 0:
+            raise InputLogError('Cycle of event must be non-negative integer')
+
+        if not isinstance(key, int) or key < 0 or key > 0xF:
+            raise InputLogError('Key must be integer value in range [0;15]')
+
+        self.Cycle = cycle
+        self.Key = key
+        self.Pressed = pressed
+
+    def apply(self, keyboard):
+        if self.Pressed:
+            keyboard.key_down(self.Key)
+        else:
+            keyboard.key_up(self.Key)
+
+    def __eq__(self, other):
+        if not isinstance(other, InputEvent):
+            return False
+
+        return self.Cycle == other.Cycle and self.Key == other.Key and self.Pressed == other.Pressed
+
+    def __str__(self):
+        return '{}:{}{:X}'.format(self.Cycle, '+' if self.Pressed else '-', self.Key)
+
+
+class InputLog:
+    def __init__(self, events=None):
+        self._events = sorted(events or [], key=lambda event: event.Cycle)
+
+    def add(self, event: InputEvent):
+        if len(self._events) != 0 and self._events[-1].Cycle > event.Cycle:
+            raise InputLogError('Events must be added in order of cycles')
+
+        self._events.append(event)
+
+    def events(self) -> list:
+        return self._events
+
+    def __len__(self):
+        return len(self._events)
+
+    def format(self) -> str:
+        return '\n'.join(map(str, self._events))
+
+    def save(self, filename: str):
+        with open(filename, 'w') as log_file:
+            log_file.write(self.format())
+            log_file.write('\n')
+
+    @staticmethod
+    def parse(text: str):
+        events = []
+
+        for token in text.replace(',', ' ').split():
+            cycle, _, key = token.partition(':')
+
+            if len(key) < 2 or key[0] not in {'+', '-'}:
+                raise InputLogError('Unexpected event: {}'.format(token))
+
+            try:
+                events.append(InputEvent(int(cycle), int(key[1:], 16), key[0] == '+'))
+            except ValueError:
+                raise InputLogError('Unexpected event: {}'.format(token))
+
+        return InputLog(events)
+
+    @staticmethod
+    def load(filename: str):
+        with open(filename) as log_file:
+            return InputLog.parse(log_file.read())
+
+
+class InputRecorder:
+    def __init__(self, machine):
+        self._machine = machine
+        self._log = InputLog()
+        machine.Keyboard.add_listener(self._record)
+
+    def log(self) -> InputLog:
+        return self._log
+
+    def _record(self, key: int, pressed: bool):
+        self._log.add(InputEvent(self._machine.Cycles, key, pressed))
@@ -1,14 +1,58 @@
 #!/usr/bin/env python3
 
+"""
+Instruction - decoded instruction, it is immutable and has integer operand fields set at decode time:
+ x, y - registers (second and third nibbles of opcode), n - last nibble, nn - last byte, nnn - last 12 bits
+Fields which are absent at opcode format of instruction are 0
+"""
+
+from __future__ import annotations
 
 from abc import *
-from virtualmachine.machine import Machine
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from virtualmachine.machine import Machine
 
 
 class Instruction:
-    def __init__(self):
-        self.arg_registers = []
-        self.arg_constant = None
+    __slots__ = ('x', 'y', 'n', 'nn', 'nnn')
+
+    def __init__(self, x: int = 0, y: int = 0, n: int = 0, nn: int = 0, nnn: int = 0):
+        object.__setattr__(self, 'x', x)
+        object.__setattr__(self, 'y', y)
+        object.__setattr__(self, 'n', n)
+        object.__setattr__(self, 'nn', nn)
+        object.__setattr__(self, 'nnn', nnn)
+
+    @classmethod
+    def from_value(cls, value: int):
+        """
+        Create instruction with operands of given integer opcode, only fields of opcode format are set
+        """
+
+        opcode_format = cls.opcode_format().lower()
+        fields = {}
+
+        if opcode_format[1] == 'x':
+            fields['x'] = (value >> 8) & 0xF
+        if opcode_format[2] == 'y':
+            fields['y'] = (value >> 4) & 0xF
+
+        constant_length = opcode_format.count('n')
+        if constant_length != 0:
+            fields['n' * constant_length] = value & ((1 << (4 * constant_length)) - 1)
+
+        return cls(**fields)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('Instruction is immutable')
+
+    def __delattr__(self, key):
+        raise AttributeError('Instruction is immutable')
+
+    def __reduce__(self):
+        return type(self), (self.x, self.y, self.n, self.nn, self.nnn)
 
     @abstractmethod
     def execute(self, machine: Machine):
@@ -19,13 +63,25 @@ class Instruction:
     def opcode_format() -> str:
         raise NotImplemented
 
+    @property
+    def arg_registers(self) -> list:
+        opcode_format = self.opcode_format().lower()
+
+        return [register for register, name in [(self.x, 'x'), (self.y, 'y')] if name in opcode_format]
+
+    @property
+    def arg_constant(self):
+        constant_length = self.opcode_format().lower().count('n')
+
+        return getattr(self, 'n' * constant_length) if constant_length != 0 else None
+
     def vx(self):
-        return self.arg_registers[0] if len(self.arg_registers) >= 1 else None
+        return self.x
 
     def vy(self):
-        return self.arg_registers[1] if len(self.arg_registers) >= 2 else None
+        return self.y
 
 
 # JumpInstruction - class to determinate instruction is instruction which change PC
 class JumpInstruction(Instruction):
-    pass
+    __slots__ = ()
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
-import logging
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 
 from virtualmachine.instruction import *
-from virtualmachine.machine import Machine
-from random import randint
+
+if TYPE_CHECKING:
+    from virtualmachine.machine import Machine
 
 
 class Cls(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
         machine.Screen.clear()
 
@@ -16,6 +21,8 @@ class Cls(Instruction):
 
 
 class Rts(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
         machine.PC = machine.Stack.pop()
 
@@ -25,8 +32,10 @@ class Rts(JumpInstruction):
 
 
 class Jmp(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.PC = self.arg_constant
+        machine.PC = self.nnn
 
     @staticmethod
     def opcode_format() -> str:
@@ -34,9 +43,11 @@ class Jmp(JumpInstruction):
 
 
 class Jsr(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
         machine.Stack.push(machine.PC + 2)
-        machine.PC = self.arg_constant
+        machine.PC = self.nnn
 
     @staticmethod
     def opcode_format() -> str:
@@ -44,8 +55,10 @@ class Jsr(JumpInstruction):
 
 
 class Skeq(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        if machine.VRegisters[self.vx()] == self.arg_constant:
+        if machine.VRegisters[self.x] == self.nn:
             machine.PC += 4
         else:
             machine.PC += 2
@@ -56,8 +69,10 @@ class Skeq(JumpInstruction):
 
 
 class Skne(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        if machine.VRegisters[self.vx()] != self.arg_constant:
+        if machine.VRegisters[self.x] != self.nn:
             machine.PC += 4
         else:
             machine.PC += 2
@@ -68,8 +83,10 @@ class Skne(JumpInstruction):
 
 
 class SkeqRegister(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        if machine.VRegisters[self.vx()] == machine.VRegisters[self.vy()]:
+        if machine.VRegisters[self.x] == machine.VRegisters[self.y]:
             machine.PC += 4
         else:
             machine.PC += 2
@@ -80,8 +97,10 @@ class SkeqRegister(JumpInstruction):
 
 
 class MovConstantToRegister(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[self.vx()] = self.arg_constant
+        machine.VRegisters[self.x] = self.nn
 
     @staticmethod
     def opcode_format() -> str:
@@ -89,8 +108,10 @@ class MovConstantToRegister(Instruction):
 
 
 class AddConstantToRegister(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[self.vx()] = (self.arg_constant + machine.VRegisters[self.vx()]) % 0x100
+        machine.VRegisters[self.x] = (self.nn + machine.VRegisters[self.x]) % 0x100
 
     @staticmethod
     def opcode_format() -> str:
@@ -98,8 +119,10 @@ class AddConstantToRegister(Instruction):
 
 
 class MovRegisterToRegister(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[self.vx()] = machine.VRegisters[self.vy()]
+        machine.VRegisters[self.x] = machine.VRegisters[self.y]
 
     @staticmethod
     def opcode_format() -> str:
@@ -107,8 +130,10 @@ class MovRegisterToRegister(Instruction):
 
 
 class Or(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[self.vx()] = machine.VRegisters[self.vx()] | machine.VRegisters[self.vy()]
+        machine.VRegisters[self.x] = machine.VRegisters[self.x] | machine.VRegisters[self.y]
 
     @staticmethod
     def opcode_format() -> str:
@@ -116,8 +141,10 @@ class Or(Instruction):
 
 
 class And(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[self.vx()] = machine.VRegisters[self.vx()] & machine.VRegisters[self.vy()]
+        machine.VRegisters[self.x] = machine.VRegisters[self.x] & machine.VRegisters[self.y]
 
     @staticmethod
     def opcode_format() -> str:
@@ -125,8 +152,10 @@ class And(Instruction):
 
 
 class Xor(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[self.vx()] = machine.VRegisters[self.vx()] ^ machine.VRegisters[self.vy()]
+        machine.VRegisters[self.x] = machine.VRegisters[self.x] ^ machine.VRegisters[self.y]
 
     @staticmethod
     def opcode_format() -> str:
@@ -134,10 +163,12 @@ class Xor(Instruction):
 
 
 class AddRegisterToRegister(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        add = machine.VRegisters[self.vx()] + machine.VRegisters[self.vy()]
+        add = machine.VRegisters[self.x] + machine.VRegisters[self.y]
         machine.VRegisters[0xF] = add >= 0x100
-        machine.VRegisters[self.vx()] = add % 0x100
+        machine.VRegisters[self.x] = add % 0x100
 
     @staticmethod
     def opcode_format() -> str:
@@ -145,10 +176,12 @@ class AddRegisterToRegister(Instruction):
 
 
 class SubRegisterToRegister(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        sub = machine.VRegisters[self.vx()] - machine.VRegisters[self.vy()]
+        sub = machine.VRegisters[self.x] - machine.VRegisters[self.y]
         machine.VRegisters[0xF] = 1 if sub > 0 else 0
-        machine.VRegisters[self.vx()] = sub % 0x100
+        machine.VRegisters[self.x] = sub % 0x100
 
     @staticmethod
     def opcode_format() -> str:
@@ -156,9 +189,11 @@ class SubRegisterToRegister(Instruction):
 
 
 class Shr(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[0xF] = machine.VRegisters[self.vx()] & 1
-        machine.VRegisters[self.vx()] = machine.VRegisters[self.vx()] >> 1
+        machine.VRegisters[0xF] = machine.VRegisters[self.x] & 1
+        machine.VRegisters[self.x] = machine.VRegisters[self.x] >> 1
 
     @staticmethod
     def opcode_format() -> str:
@@ -166,10 +201,12 @@ class Shr(Instruction):
 
 
 class Subn(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        sub = machine.VRegisters[self.vy()] - machine.VRegisters[self.vx()]
+        sub = machine.VRegisters[self.y] - machine.VRegisters[self.x]
         machine.VRegisters[0xF] = 1 if sub > 0 else 0
-        machine.VRegisters[self.vx()] = sub % 0x100
+        machine.VRegisters[self.x] = sub % 0x100
 
     @staticmethod
     def opcode_format() -> str:
@@ -177,9 +214,11 @@ class Subn(Instruction):
 
 
 class Shl(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[0xF] = machine.VRegisters[self.vx()] >> 7
-        machine.VRegisters[self.vx()] = (machine.VRegisters[self.vx()] << 1) & 0xFF
+        machine.VRegisters[0xF] = machine.VRegisters[self.x] >> 7
+        machine.VRegisters[self.x] = (machine.VRegisters[self.x] << 1) & 0xFF
 
     @staticmethod
     def opcode_format() -> str:
@@ -187,8 +226,10 @@ class Shl(Instruction):
 
 
 class SkneRegisters(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        if machine.VRegisters[self.vx()] != machine.VRegisters[self.vy()]:
+        if machine.VRegisters[self.x] != machine.VRegisters[self.y]:
             machine.PC += 4
         else:
             machine.PC += 2
@@ -199,8 +240,10 @@ class SkneRegisters(JumpInstruction):
 
 
 class Mvi(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.AddressRegister = self.arg_constant
+        machine.AddressRegister = self.nnn
 
     @staticmethod
     def opcode_format() -> str:
@@ -208,8 +251,10 @@ class Mvi(Instruction):
 
 
 class Jmi(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.PC = machine.VRegisters[0] + self.arg_constant
+        machine.PC = machine.VRegisters[0] + self.nnn
 
     @staticmethod
     def opcode_format() -> str:
@@ -217,8 +262,10 @@ class Jmi(JumpInstruction):
 
 
 class Rand(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[self.vx()] = randint(0, 255) & self.arg_constant
+        machine.VRegisters[self.x] = machine.Random.getrandbits(8) & self.nn
 
     @staticmethod
     def opcode_format() -> str:
@@ -226,20 +273,16 @@ class Rand(Instruction):
 
 
 class DrawSprite(Instruction):
-    def execute(self, machine: Machine):
-        def get_bit(n, i):
-            return (n & (1 << i)) >> i
+    __slots__ = ()
 
+    def execute(self, machine: Machine):
         machine.VRegisters[0xF] = 0
-        y = machine.VRegisters[self.vy()]
-        x = machine.VRegisters[self.vx()]
+        y = machine.VRegisters[self.y]
+        x = machine.VRegisters[self.x]
 
-        for i in range(self.arg_constant):
-            next8pixels = machine.Memory[machine.AddressRegister + i]
+        sprite = machine.Memory[machine.AddressRegister:machine.AddressRegister + self.n]
 
-            for k in range(8):
-                pixel = get_bit(next8pixels, 7 - k)
-                machine.VRegisters[0xF] |= machine.Screen.set_pixel(y + i, x + k, pixel)
+        machine.VRegisters[0xF] = machine.Screen.draw_sprite(y, x, sprite)
 
     @staticmethod
     def opcode_format() -> str:
@@ -247,8 +290,10 @@ class DrawSprite(Instruction):
 
 
 class SkipIfKeyPressed(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        key = machine.VRegisters[self.vx()]
+        key = machine.VRegisters[self.x]
         if machine.Keyboard.is_key_pressed(key):
             machine.PC += 4
         else:
@@ -260,8 +305,10 @@ class SkipIfKeyPressed(JumpInstruction):
 
 
 class SkipIfKeyNotPressed(JumpInstruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        key = machine.VRegisters[self.vx()]
+        key = machine.VRegisters[self.x]
         if not machine.Keyboard.is_key_pressed(key):
             machine.PC += 4
         else:
@@ -273,8 +320,10 @@ class SkipIfKeyNotPressed(JumpInstruction):
 
 
 class GetDelayTimer(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.VRegisters[self.vx()] = machine.DelayTimer.get_count()
+        machine.VRegisters[self.x] = machine.DelayTimer.get_count()
 
     @staticmethod
     def opcode_format() -> str:
@@ -282,13 +331,15 @@ class GetDelayTimer(Instruction):
 
 
 class WaitKey(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
         machine.Block = True
 
         if not machine.Keyboard.is_any_key_pressed():
             return
 
-        machine.VRegisters[self.vx()] = machine.Keyboard.get_first_pressed()
+        machine.VRegisters[self.x] = machine.Keyboard.get_first_pressed()
 
         machine.Block = False
 
@@ -298,8 +349,10 @@ class WaitKey(Instruction):
 
 
 class SetDelayTimer(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.DelayTimer.set_count(machine.VRegisters[self.vx()])
+        machine.DelayTimer.set_count(machine.VRegisters[self.x])
 
     @staticmethod
     def opcode_format() -> str:
@@ -307,8 +360,10 @@ class SetDelayTimer(Instruction):
 
 
 class SetSoundTimer(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.SoundTimer.set_count(machine.VRegisters[self.vx()])
+        machine.SoundTimer.set_count(machine.VRegisters[self.x])
 
     @staticmethod
     def opcode_format() -> str:
@@ -316,8 +371,10 @@ class SetSoundTimer(Instruction):
 
 
 class Adi(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.AddressRegister += machine.VRegisters[self.vx()]
+        machine.AddressRegister += machine.VRegisters[self.x]
 
     @staticmethod
     def opcode_format() -> str:
@@ -325,21 +382,36 @@ class Adi(Instruction):
 
 
 class LoadChar(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        machine.AddressRegister = machine.FontDict[machine.VRegisters[self.vx()]]
+        machine.AddressRegister = machine.FontDict[machine.VRegisters[self.x]]
 
     @staticmethod
     def opcode_format() -> str:
         return 'Fx29'
 
 
+# decimal digits (hundreds, tens, ones) of every byte value
+_BCD_DIGITS = tuple(bytes((value // 100, value // 10 % 10, value % 10)) for value in range(256))
+
+
+def _check_memory_range(machine: Machine, address: int, length: int):
+    # slices are not checked: assignment past the end would grow memory
+    if address + length > len(machine.Memory):
+        raise IndexError('Memory index out of range')
+
+
 class Bcd(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        hundreds, tens, ones = map(int, str(machine.VRegisters[self.vx()]).zfill(3))
+        address = machine.AddressRegister
+        _check_memory_range(machine, address, 3)
+
+        machine.Memory[address:address + 3] = _BCD_DIGITS[machine.VRegisters[self.x]]
 
-        machine.Memory[machine.AddressRegister] = hundreds
-        machine.Memory[machine.AddressRegister + 1] = tens
-        machine.Memory[machine.AddressRegister + 2] = ones
+        machine.invalidate_code(address, 3)
 
     @staticmethod
     def opcode_format() -> str:
@@ -347,12 +419,19 @@ class Bcd(Instruction):
 
 
 class StoreRegisters(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        for i in range(0, self.vx() + 1):
-            machine.Memory[machine.AddressRegister + i] = machine.VRegisters[i]
+        address = machine.AddressRegister
+        length = self.x + 1
+        _check_memory_range(machine, address, length)
+
+        machine.Memory[address:address + length] = machine.VRegisters[:length]
+
+        machine.invalidate_code(address, length)
 
         if machine.CompatibilityLoadStore:
-            machine.AddressRegister += self.vx() + 1
+            machine.AddressRegister = address + length
 
     @staticmethod
     def opcode_format() -> str:
@@ -360,12 +439,17 @@ class StoreRegisters(Instruction):
 
 
 class LoadRegisters(Instruction):
+    __slots__ = ()
+
     def execute(self, machine: Machine):
-        for i in range(0, self.vx() + 1):
-            machine.VRegisters[i] = machine.Memory[machine.AddressRegister + i]
+        address = machine.AddressRegister
+        length = self.x + 1
+        _check_memory_range(machine, address, length)
+
+        machine.VRegisters[:length] = machine.Memory[address:address + length]
 
         if machine.CompatibilityLoadStore:
-            machine.AddressRegister += self.vx() + 1
+            machine.AddressRegister = address + length
 
     @staticmethod
     def opcode_format() -> str:
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+
+"""
+JitCompiler - compile BasicBlock into python function
+
+Every block becomes python source which is compiled once by compile()
+Block is extended by following blocks while it ends at skip instruction, skips become exits from function
+Registers are local variables of function and written back to VRegisters at exit from block
+Instructions without template are executed by Instruction.execute with registers written back before
+Before code which may raise error registers are written back and PC is set to address of instruction,
+so machine sees the same state as after error of interpreter
+
+Compiled function takes machine and budget (max amount of instructions to execute), executes block,
+sets PC and returns amount of executed instructions
+Budget must fit first block, following block is executed only if it fits into the rest of budget
+Headless runner gives budget up to next timer tick (a few instructions), so regions rarely go past first block
+and JIT is not much faster than block engine there, block engine is default of headless tools
+"""
+
+from virtualmachine.basic_block import BasicBlock
+from virtualmachine.instructions import *
+
+
+class JitCompiler:
+    def __init__(self):
+        self._templates = {
+            Cls: JitCompiler._cls,
+            MovConstantToRegister: JitCompiler._mov_constant_to_register,
+            AddConstantToRegister: JitCompiler._add_constant_to_register,
+            MovRegisterToRegister: JitCompiler._mov_register_to_register,
+            Or: JitCompiler._or,
+            And: JitCompiler._and,
+            Xor: JitCompiler._xor,
+            AddRegisterToRegister: JitCompiler._add_register_to_register,
+            SubRegisterToRegister: JitCompiler._sub_register_to_register,
+            Shr: JitCompiler._shr,
+            Subn: JitCompiler._subn,
+            Shl: JitCompiler._shl,
+            Mvi: JitCompiler._mvi,
+            Rand: JitCompiler._rand,
+            DrawSprite: JitCompiler._draw_sprite,
+            GetDelayTimer: JitCompiler._get_delay_timer,
+            SetDelayTimer: JitCompiler._set_delay_timer,
+            SetSoundTimer: JitCompiler._set_sound_timer,
+            Adi: JitCompiler._adi,
+            LoadChar: JitCompiler._load_char,
+        }
+
+        self._jump_templates = {
+            Rts: JitCompiler._rts,
+            Jmp: JitCompiler._jmp,
+            Jsr: JitCompiler._jsr,
+            Jmi: JitCompiler._jmi,
+        }
+
+        self._skip_conditions = {
+            Skeq: JitCompiler._skeq,
+            Skne: JitCompiler._skne,
+            SkeqRegister: JitCompiler._skeq_register,
+            SkneRegisters: JitCompiler._skne_registers,
+            SkipIfKeyPressed: JitCompiler._skip_if_key_pressed,
+            SkipIfKeyNotPressed: JitCompiler._skip_if_key_not_pressed,
+        }
+
+    def compile(self, blocks: list):
+        return self._compile_source(*self.generate_source(blocks))
+
+    def generate_source(self, blocks: list):
+        """
+        Blocks must follow each other and all of them except last must end at skip instruction
+        Skips of such blocks become exits from function, not skipped instruction continues next block
+        Return source of function and namespace it must be executed in
+        """
+
+        state = _RegistersState()
+        namespace = {}
+        executed = 0
+
+        for block, following in zip(blocks, blocks[1:]):
+            executed += self._generate_body(state, namespace, block)
+            terminator = block.Terminator
+
+            condition = self._skip_conditions[type(terminator)](state, terminator)
+            state.emit('if {}:'.format(condition))
+            state.emit_exit(block.TerminatorAddress + 4, executed + 1, indent='    ')
+            executed += 1
+
+            state.emit('if budget < {}:'.format(executed + following.Size))
+            state.emit_exit(following.Start, executed, indent='    ')
+
+        block = blocks[-1]
+        executed += self._generate_body(state, namespace, block)
+        terminator = block.Terminator
+        address = block.TerminatorAddress
+
+        if terminator is None:
+            state.flush()
+            state.emit('m.PC = {}'.format(hex(address)))
+        elif type(terminator) in self._skip_conditions:
+            condition = self._skip_conditions[type(terminator)](state, terminator)
+            state.flush()
+            state.emit('m.PC = {} if {} else {}'.format(hex(address + 4), condition, hex(address + 2)))
+        elif type(terminator) in self._jump_templates:
+            self._jump_templates[type(terminator)](state, terminator, address)
+        else:
+            namespace['terminator'] = terminator
+            state.flush()
+            state.emit('m.PC = {}'.format(hex(address)))
+            state.emit('terminator.execute(m)')
+            if not block.TerminatorIsJump:
+                state.emit('if not m.Block:')
+                state.emit('    m.PC = {}'.format(hex(address + 2)))
+
+        state.emit('return {}'.format(executed + block.Size - len(block.Body)))
+
+        lines = ['def block(m, budget):', '    V = m.VRegisters']
+        lines.extend('    ' + line for line in state.lines)
+
+        return '\n'.join(lines) + '\n', namespace, blocks[0].Start
+
+    def is_skip(self, instruction) -> bool:
+        return type(instruction) in self._skip_conditions
+
+    def _generate_body(self, state, namespace, block: BasicBlock) -> int:
+        for i, instruction in enumerate(block.Body):
+            template = self._templates.get(type(instruction))
+            state.address = block.Start + 2 * i
+
+            if template is not None:
+                template(state, instruction)
+            else:
+                name = 'i{}'.format(len(namespace))
+                namespace[name] = instruction
+                state.flush()
+                state.emit('m.PC = {}'.format(hex(state.address)))
+                state.emit('{}.execute(m)'.format(name))
+                state.forget()
+
+        return len(block.Body)
+
+    @staticmethod
+    def _compile_source(source: str, namespace: dict, start: int):
+        code = compile(source, '<chip8 block {}>'.format(hex(start)), 'exec')
+        exec(code, namespace)
+        return namespace['block']
+
+    @staticmethod
+    def _cls(state, instruction):
+        state.emit('m.Screen.clear()')
+
+    @staticmethod
+    def _mov_constant_to_register(state, instruction):
+        state.emit('{} = {}'.format(state.write(instruction.x), hex(instruction.nn)))
+
+    @staticmethod
+    def _add_constant_to_register(state, instruction):
+        vx = state.read(instruction.x)
+        state.emit('{} = ({} + {}) & 0xFF'.format(state.write(instruction.x), vx, hex(instruction.nn)))
+
+    @staticmethod
+    def _mov_register_to_register(state, instruction):
+        vy = state.read(instruction.y)
+        state.emit('{} = {}'.format(state.write(instruction.x), vy))
+
+    @staticmethod
+    def _or(state, instruction):
+        JitCompiler._binary_operation(state, instruction, '|')
+
+    @staticmethod
+    def _and(state, instruction):
+        JitCompiler._binary_operation(state, instruction, '&')
+
+    @staticmethod
+    def _xor(state, instruction):
+        JitCompiler._binary_operation(state, instruction, '^')
+
+    @staticmethod
+    def _binary_operation(state, instruction, operation):
+        vx, vy = state.read(instruction.x), state.read(instruction.y)
+        state.emit('{} = {} {} {}'.format(state.write(instruction.x), vx, operation, vy))
+
+    @staticmethod
+    def _add_register_to_register(state, instruction):
+        vx, vy = state.read(instruction.x), state.read(instruction.y)
+        state.emit('t = {} + {}'.format(vx, vy))
+        state.emit('{} = 1 if t >= 0x100 else 0'.format(state.write(0xF)))
+        state.emit('{} = t & 0xFF'.format(state.write(instruction.x)))
+
+    @staticmethod
+    def _sub_register_to_register(state, instruction):
+        vx, vy = state.read(instruction.x), state.read(instruction.y)
+        state.emit('t = {} - {}'.format(vx, vy))
+        state.emit('{} = 1 if t > 0 else 0'.format(state.write(0xF)))
+        state.emit('{} = t & 0xFF'.format(state.write(instruction.x)))
+
+    @staticmethod
+    def _shr(state, instruction):
+        vx = state.read(instruction.x)
+        state.emit('{} = {} & 1'.format(state.write(0xF), vx))
+        vx = state.read(instruction.x)
+        state.emit('{} = {} >> 1'.format(state.write(instruction.x), vx))
+
+    @staticmethod
+    def _subn(state, instruction):
+        vx, vy = state.read(instruction.x), state.read(instruction.y)
+        state.emit('t = {} - {}'.format(vy, vx))
+        state.emit('{} = 1 if t > 0 else 0'.format(state.write(0xF)))
+        state.emit('{} = t & 0xFF'.format(state.write(instruction.x)))
+
+    @staticmethod
+    def _shl(state, instruction):
+        vx = state.read(instruction.x)
+        state.emit('{} = {} >> 7'.format(state.write(0xF), vx))
+        vx = state.read(instruction.x)
+        state.emit('{} = ({} << 1) & 0xFF'.format(state.write(instruction.x), vx))
+
+    @staticmethod
+    def _mvi(state, instruction):
+        state.emit('{} = {}'.format(state.write_address(), hex(instruction.nnn)))
+
+    @staticmethod
+    def _rand(state, instruction):
+        state.emit('{} = m.Random.getrandbits(8) & {}'.format(state.write(instruction.x), hex(instruction.nn)))
+
+    @staticmethod
+    def _draw_sprite(state, instruction):
+        if 0xF in (instruction.x, instruction.y):
+            state.emit('{} = 0'.format(state.write(0xF)))
+
+        vy, vx, address = state.read(instruction.y), state.read(instruction.x), state.read_address()
+        state.emit('{} = m.Screen.draw_sprite({}, {}, m.Memory[{}:{} + {}])'
+                   .format(state.write(0xF), vy, vx, address, address, instruction.n))
+
+    @staticmethod
+    def _get_delay_timer(state, instruction):
+        state.emit('{} = m.DelayTimer.get_count()'.format(state.write(instruction.x)))
+
+    @staticmethod
+    def _set_delay_timer(state, instruction):
+        state.emit('m.DelayTimer.set_count({})'.format(state.read(instruction.x)))
+
+    @staticmethod
+    def _set_sound_timer(state, instruction):
+        state.emit('m.SoundTimer.set_count({})'.format(state.read(instruction.x)))
+
+    @staticmethod
+    def _adi(state, instruction):
+        vx, address = state.read(instruction.x), state.read_address()
+        state.emit('{} = {} + {}'.format(state.write_address(), address, vx))
+
+    @staticmethod
+    def _load_char(state, instruction):
+        vx = state.read(instruction.x)
+        state.emit('if {} > 0xF:'.format(vx))
+        state.emit_fault(indent='    ')
+        state.emit('{} = m.FontDict[{}]'.format(state.write_address(), vx))
+
+    @staticmethod
+    def _rts(state, instruction, address):
+        state.flush()
+        state.emit('m.PC = {}'.format(hex(address)))
+        state.emit('m.PC = m.Stack.pop()')
+
+    @staticmethod
+    def _jmp(state, instruction, address):
+        state.flush()
+        state.emit('m.PC = {}'.format(hex(instruction.nnn)))
+
+    @staticmethod
+    def _jsr(state, instruction, address):
+        state.flush()
+        state.emit('m.Stack.push({})'.format(hex(address + 2)))
+        state.emit('m.PC = {}'.format(hex(instruction.nnn)))
+
+    @staticmethod
+    def _jmi(state, instruction, address):
+        v0 = state.read(0)
+        state.flush()
+        state.emit('m.PC = {} + {}'.format(v0, hex(instruction.nnn)))
+
+    @staticmethod
+    def _skeq(state, instruction):
+        return '{} == {}'.format(state.read(instruction.x), hex(instruction.nn))
+
+    @staticmethod
+    def _skne(state, instruction):
+        return '{} != {}'.format(state.read(instruction.x), hex(instruction.nn))
+
+    @staticmethod
+    def _skeq_register(state, instruction):
+        vx, vy = state.read(instruction.x), state.read(instruction.y)
+        return '{} == {}'.format(vx, vy)
+
+    @staticmethod
+    def _skne_registers(state, instruction):
+        vx, vy = state.read(instruction.x), state.read(instruction.y)
+        return '{} != {}'.format(vx, vy)
+
+    @staticmethod
+    def _skip_if_key_pressed(state, instruction):
+        return 'm.Keyboard.is_key_pressed({})'.format(state.read(instruction.x))
+
+    @staticmethod
+    def _skip_if_key_not_pressed(state, instruction):
+        return 'not m.Keyboard.is_key_pressed({})'.format(state.read(instruction.x))
+
+
+class _RegistersState:
+    """
+    Tracks which registers are loaded into local variables and which of them must be written back
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.address = 0  # address of instruction being generated
+        self._loaded = set()
+        self._dirty = set()
+        self._address_loaded = False
+        self._address_dirty = False
+
+    def emit(self, line: str):
+        self.lines.append(line)
+
+    def read(self, register: int) -> str:
+        name = _RegistersState._name(register)
+
+        if register not in self._loaded:
+            self.emit('{} = V[{}]'.format(name, register))
+            self._loaded.add(register)
+
+        return name
+
+    def write(self, register: int) -> str:
+        self._loaded.add(register)
+        self._dirty.add(register)
+        return _RegistersState._name(register)
+
+    def read_address(self) -> str:
+        if not self._address_loaded:
+            self.emit('I = m.AddressRegister')
+            self._address_loaded = True
+
+        return 'I'
+
+    def write_address(self) -> str:
+        self._address_loaded = True
+        self._address_dirty = True
+        return 'I'
+
+    def flush(self):
+        self._emit_write_back('')
+        self._dirty.clear()
+        self._address_dirty = False
+
+    def emit_exit(self, pc: int, executed: int, indent: str):
+        """
+        Emit exit from function which doesnt change state of following code
+        """
+
+        self._emit_write_back(indent)
+        self.emit('{}m.PC = {}'.format(indent, hex(pc)))
+        self.emit('{}return {}'.format(indent, executed))
+
+    def emit_fault(self, indent: str):
+        """
+        Emit preparation to error raised by following code: write back and PC of current instruction
+        """
+
+        self._emit_write_back(indent)
+        self.emit('{}m.PC = {}'.format(indent, hex(self.address)))
+
+    def _emit_write_back(self, indent: str):
+        for register in sorted(self._dirty):
+            self.emit('{}V[{}] = {}'.format(indent, register, _RegistersState._name(register)))
+
+        if self._address_dirty:
+            self.emit('{}m.AddressRegister = I'.format(indent))
+
+    def forget(self):
+        self._loaded.clear()
+        self._address_loaded = False
+
+    @staticmethod
+    def _name(register: int) -> str:
+        return 'v{:X}'.format(register)
@@ -1,27 +1,64 @@
 #!/usr/bin/env python3
 
+"""
+Keyboard - state of 16 keys as bit mask, bit i is set while key i is pressed
+"""
+
 
 class Keyboard:
     def __init__(self):
-        self._keys = [0] * 16
+        self._mask = 0
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """
+        Listener is called as listener(key, pressed) on every key_down and key_up
+        """
+
+        self._listeners.append(listener)
 
     def key_down(self, key: int):
-        self._keys[key] = True
+        self._mask |= Keyboard._bit(key)
+
+        for listener in self._listeners:
+            listener(key, True)
 
     def key_up(self, key: int):
-        self._keys[key] = False
+        self._mask &= ~Keyboard._bit(key)
+
+        for listener in self._listeners:
+            listener(key, False)
 
     def is_key_pressed(self, key: int):
-        return self._keys[key]
+        return self._mask & Keyboard._bit(key) != 0
 
     def get_first_pressed(self):
-        for key in range(16):
-            if self._keys[key]:
-                return key
-        return None
+        mask = self._mask
+
+        if mask == 0:
+            return None
+
+        return (mask & -mask).bit_length() - 1
 
     def is_any_key_pressed(self):
-        for key in self._keys:
-            if key:
-                return True
-        return False
+        return self._mask != 0
+
+    def mask(self) -> int:
+        return self._mask
+
+    def set_mask(self, mask: int):
+        """
+        Set state of all keys at once, listeners are not called
+        """
+
+        if not 0 <= mask <= 0xFFFF:
+            raise ValueError('Key mask must be 16-bit')
+
+        self._mask = mask
+
+    @staticmethod
+    def _bit(key: int) -> int:
+        if not 0 <= key < 16:
+            raise IndexError('Key must be in range [0;15]')
+
+        return 1 << key
@@ -1,13 +1,36 @@
 #!/usr/bin/env python3
 
+import mmap
+import os
+import random
+import sys
+
 from virtualmachine.timer import Timer
 from virtualmachine.stack import Stack
 from virtualmachine.keyboard import Keyboard
 from virtualmachine.screen import Screen
+from parser.instruction_factory import InstructionFactory
+from virtualmachine.basic_block import BlockCache
+from virtualmachine.fusion import FUSIONS, count_fusions
+from virtualmachine.instruction import JumpInstruction
+from virtualmachine.rom_cache import RomCache, DecodedProgram
 
 
 class Machine:
-    def __init__(self, memory_size: int = 0x1000, compatibility_load_store: bool = False):
+    INTERPRETER_ENGINE = 'interpreter'  # execute_next_instruction executes single instruction
+    BLOCK_ENGINE = 'block'  # execute_next_instruction executes basic block
+    JIT_ENGINE = 'jit'  # execute_next_instruction executes basic block compiled into python function
+
+    ENGINES = (INTERPRETER_ENGINE, BLOCK_ENGINE, JIT_ENGINE)
+
+    JIT_THRESHOLD = 8  # block is compiled after given amount of executions
+    JIT_MAX_REGION = 64  # max amount of instructions in compiled block extended by following blocks
+
+    def __init__(self, memory_size: int = 0x1000, compatibility_load_store: bool = False,
+                 engine: str = INTERPRETER_ENGINE, seed: int = None, rom_cache: RomCache = None):
+        if engine not in Machine.ENGINES:
+            raise ValueError('Engine must be one of {}'.format(', '.join(Machine.ENGINES)))
+
         self.CompatibilityLoadStore = compatibility_load_store
         self.Screen = Screen()
         self.Keyboard = Keyboard()
@@ -21,64 +44,421 @@ class Machine:
         self.DelayTimer = Timer(0)
         self.SoundTimer = Timer(0)
         self.Block = False
+        self.Idle = False  # last run skipped iterations of idle loop (see run)
         self.FontDict = Machine._create_font_dict()
+        self.Random = random.Random(seed)  # generator of Rand instruction
+        self.Cycles = 0  # amount of executed instructions (and cycles spent on waiting of key, see HeadlessRunner)
 
-        import parser.instruction_factory
-        self._instruction_factory = parser.instruction_factory.InstructionFactory()
+        self._instruction_factory = InstructionFactory.shared()
+        self._decode_table = self._instruction_factory.decode_table()
+        self._blocks = BlockCache(self.MemorySize, self._instruction_factory)
+        self._rom_cache = rom_cache if rom_cache is not None else RomCache.shared()
+        self._program = None  # DecodedProgram of loaded program
+        self._program_key = None  # key of loaded program at RomCache
         self._instruction_executing = False
+        self._skipping_idle_loops = False
+        self._idle_loop_size = 0
+
+        self.Engine = engine
+        self._jit = None
+        self._block_step = self._execute_interpreted_block
+        self._step = self._execute_instruction
+
+        if engine == Machine.JIT_ENGINE:
+            from virtualmachine.jit import JitCompiler
+            self._jit = JitCompiler()
+            self._block_step = self._execute_compiled_block
+
+        if engine != Machine.INTERPRETER_ENGINE:
+            self._step = self._block_step
+
+        self.Profiler = None
+        self._unprofiled_steps = None
 
     def reset(self):
         self.Screen.clear()
         self.Stack = Stack()
-        self.Keyboard = Keyboard()
-        self.Memory = Machine.create_memory(self.MemorySize)
+        self.Keyboard.set_mask(0)  # keyboard is reused, its listeners (InputRecorder) stay attached
+        self.Memory[:] = Machine._clean_memory(self.MemorySize)  # memory is reused, it may be referenced outside
         self.PC = 0
         self.VRegisters = bytearray(16)
         self.AddressRegister = 0
         self.ExitCode = None
         self.DelayTimer.set_count(0)
         self.SoundTimer.set_count(0)
+        self.Cycles = 0
+        self.Idle = False
+        self._blocks.clear()
+        self._program = None
 
-    def execute_next_instruction(self):
-        if self._instruction_executing:
+    def execute_next_instruction(self) -> int:
+        """
+        Execute next instruction or basic block depending on engine
+        Return amount of executed instructions
+        """
+
+        executed = self._step()
+        self.Cycles += executed
+
+        return executed
+
+    def execute_block(self) -> int:
+        """
+        Execute basic block starting at PC as single unit
+        Return amount of executed instructions
+        """
+
+        executed = self._block_step()
+        self.Cycles += executed
+
+        return executed
+
+    def run(self, instructions: int) -> int:
+        """
+        Execute given amount of instructions by basic blocks, block which doesnt fit is executed partially,
+        so machine stops at the same instruction with every engine
+        Stop earlier if program ends or machine is blocked
+        Return amount of executed instructions
+
+        If instruction raises error, PC is left at it and Cycles counts instructions executed before it,
+        as with single instructions executed by interpreter
+
+        Iterations of idle loop (loop waiting for timer or key, which doesnt change state of machine)
+        are counted as executed without execution, so machine ends in the same state with the same amount
+        of executed instructions as without skipping, Idle is set if it happened
+        """
+
+        executed = 0
+
+        block_step = self._block_step
+        self.Idle = False
+        self._skipping_idle_loops = True
+
+        try:
+            while executed < instructions:
+                step = block_step(instructions - executed)
+                executed += step
+
+                if self.Block or self.ExitCode is not None:
+                    break
+
+                if self.Idle and self._skipping_idle_loops:
+                    # skip whole iterations, the rest is executed as usual
+                    size = self._idle_loop_size
+                    executed += (instructions - executed - 1) // size * size
+                    self._skipping_idle_loops = False
+                elif step == 0:
+                    # step is refused while another one is executing
+                    break
+        finally:
+            self._skipping_idle_loops = False
+            self.Cycles += executed
+
+        return executed
+
+    def save_state(self) -> bytes:
+        """
+        Return complete state of machine as binary snapshot (see virtualmachine.snapshot)
+        """
+
+        from virtualmachine.snapshot import save_state
+        return save_state(self)
+
+    def load_state(self, snapshot: bytes):
+        """
+        Restore state saved by save_state, cached blocks are dropped
+        """
+
+        from virtualmachine.snapshot import load_state
+        load_state(self, snapshot)
+
+        self._blocks.clear()
+        self._program = None
+
+    def enable_profiling(self, profiler=None):
+        """
+        Execute instructions one by one by step function of profiler (for execute_next_instruction and run)
+        Return profiler
+        """
+
+        if self.Profiler is not None:
+            self.disable_profiling()
+
+        if profiler is None:
+            from virtualmachine.profiler import Profiler
+            profiler = Profiler()
+
+        self.Profiler = profiler
+        self._unprofiled_steps = (self._step, self._block_step)
+        self._step = self._block_step = profiler.create_step(self, self._execute_instruction)
+
+        return profiler
+
+    def disable_profiling(self):
+        if self.Profiler is None:
             return
 
+        self._step, self._block_step = self._unprofiled_steps
+        self._unprofiled_steps = None
+        self.Profiler = None
+
+    def cache_statistics(self) -> dict:
+        """
+        Return amount of hits and misses of block cache and amount of cached blocks
+        """
+
+        return {
+            'hits': self._blocks.Hits,
+            'misses': self._blocks.Misses,
+            'blocks': len(self._blocks)
+        }
+
+    def fusion_statistics(self) -> dict:
+        """
+        Return how many times every kind of superinstruction was executed by interpreted blocks
+        (see virtualmachine.fusion), blocks dropped from block cache are not counted
+        """
+
+        statistics = {fusion.__name__: 0 for fusion in FUSIONS}
+
+        for block in self._blocks.cached():
+            executions = block.Hits if block.Compiled is None else min(block.Hits, Machine.JIT_THRESHOLD - 1)
+
+            if executions == 0:
+                continue
+
+            for name, count in count_fusions(block.Code, block.Exit).items():
+                statistics[name] += count * executions
+
+        return statistics
+
+    def invalidate_code(self, address: int, length: int):
+        """
+        Must be called after writing into memory, so blocks of rewritten code will be decoded again
+        """
+
+        self._blocks.invalidate(address, length)
+
+    def _execute_instruction(self):
+        if self._instruction_executing:
+            return 0
+
         if self._end_program_reached():
             self.ExitCode = 0
-            return
+            return 0
 
         self._instruction_executing = True
 
-        instruction = self._get_next_instruction()
+        try:
+            instruction = self._get_next_instruction()
 
-        instruction.execute(self)
+            instruction.execute(self)
 
-        from virtualmachine.instruction import JumpInstruction
-        if not isinstance(instruction, JumpInstruction) and not self.Block:
+            if not isinstance(instruction, JumpInstruction) and not self.Block:
+                self.PC += 2
+        finally:
+            self._instruction_executing = False
+
+        return 1
+
+    def _execute_interpreted_block(self, budget: int = sys.maxsize):
+        if self._instruction_executing:
+            return 0
+
+        block = self._blocks.get(self.PC)
+
+        if block is None:
+            if self._end_program_reached():
+                self.ExitCode = 0
+                return 0
+
+            block = self._blocks.build(self, self.PC)
+
+        if block.Idle is not None and self._skipping_idle_loops and block.Idle(self):
+            self.Idle = True
+            self._idle_loop_size = block.LoopSize
+            return 0
+
+        self._instruction_executing = True
+
+        try:
+            if budget < block.MaxSize:
+                return self._execute_block_part(block, budget)
+
+            block.Hits += 1
+            return self._execute_block_instructions(block)
+        except Exception:
+            self.Cycles += (self.PC - block.Start) // 2  # instructions executed before failed one
+            raise
+        finally:
+            self._instruction_executing = False
+
+    def _execute_compiled_block(self, budget: int = sys.maxsize):
+        if self._instruction_executing:
+            return 0
+
+        block = self._blocks.get(self.PC)
+
+        if block is None:
+            if self._end_program_reached():
+                self.ExitCode = 0
+                return 0
+
+            block = self._blocks.build(self, self.PC)
+
+        if block.Idle is not None and self._skipping_idle_loops and block.Idle(self):
+            self.Idle = True
+            self._idle_loop_size = block.LoopSize
+            return 0
+
+        self._instruction_executing = True
+
+        try:
+            if budget < block.MaxSize:
+                return self._execute_block_part(block, budget)
+
+            compiled = block.Compiled
+
+            if compiled is None:
+                block.Hits += 1
+
+                if block.Hits < Machine.JIT_THRESHOLD:
+                    return self._execute_block_instructions(block)
+
+                region = self._blocks.region(self, block, self._jit.is_skip, Machine.JIT_MAX_REGION)
+                compiled = block.Compiled = self._jit.compile(region)
+
+                if self._program is not None:
+                    self._rom_cache.add_compiled(self._program_key, self.Memory, block)
+
+            return compiled(self, budget)
+        except Exception:
+            self.Cycles += (self.PC - block.Start) // 2  # instructions executed before failed one
+            raise
+        finally:
+            self._instruction_executing = False
+
+    def _execute_block_instructions(self, block):
+        code = block.Code
+
+        try:
+            for i, instruction in enumerate(code):
+                instruction.execute(self)
+        except Exception:
+            # superinstructions fail only at their first instruction
+            self.PC = block.Start + 2 * sum(getattr(fused, 'Size', 1) for fused in code[:i])
+            raise
+
+        self.PC = block.TerminatorAddress
+
+        terminator = block.Exit
+        if terminator is not None:
+            # superinstruction returns amount of executed instructions following terminator
+            following = terminator.execute(self)
+
+            if not block.TerminatorIsJump and not self.Block:
+                self.PC += 2
+
+            if following:
+                return block.Size + following
+
+        return block.Size
+
+    def _execute_block_part(self, block, budget: int):
+        """
+        Execute instructions of block (without superinstructions) which fit into budget
+        """
+
+        body = block.Body
+        count = min(budget, len(body))
+
+        try:
+            for i, instruction in enumerate(body[:count]):
+                instruction.execute(self)
+        except Exception:
+            self.PC = block.Start + 2 * i
+            raise
+
+        if budget <= len(body) or block.Terminator is None:
+            self.PC = block.Start + 2 * count
+            return count
+
+        self.PC = block.TerminatorAddress
+        block.Terminator.execute(self)
+
+        if not block.TerminatorIsJump and not self.Block:
             self.PC += 2
 
-        self._instruction_executing = False
+        return block.Size
 
     def load_program(self, program, start_address: int = 0x200):
-        if not isinstance(program, bytearray):
+        """
+        Load program into memory at start_address and set PC to it
+        Program is name of file (it is memory-mapped, not read) or any object supporting buffer protocol:
+        bytes, bytearray, memoryview, mmap
+        Blocks of program are taken from cache of decoded programs, unknown program is disassembled,
+        its blocks found by disassembly are predecoded and cached
+        """
+
+        if isinstance(program, (str, os.PathLike)):
             with open(program, 'rb') as program_file:
-                program = program_file.read()
+                if os.fstat(program_file.fileno()).st_size == 0:
+                    return self.load_program(b'', start_address)
+
+                with mmap.mmap(program_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_program:
+                    return self.load_program(mapped_program, start_address)
+
+        with memoryview(program) as view, view.cast('B') as program_bytes:
+            end_address = start_address + len(program_bytes)
+
+            if start_address < 0 or end_address > self.MemorySize:
+                raise ValueError('Program of {} bytes does not fit into memory at 0x{:03X}'
+                                 .format(len(program_bytes), start_address))
+
+            self.Memory[start_address:end_address] = program_bytes
+            key = RomCache.key(program_bytes, start_address, self.MemorySize)
 
-        for i in range(len(program)):
-            self.Memory[i + start_address] = program[i]
         self.PC = start_address
+        self._blocks.clear()
+        self._program_key = key
+        self._program = self._rom_cache.get(key)
+
+        if self._program is not None:
+            self._blocks.install(self._program.blocks())
+            return
+
+        from parser.disassembler import Disassembler
+
+        program_bytes = bytes(self.Memory[start_address:end_address])
+        disassembly = Disassembler(self._instruction_factory).disassemble(program_bytes, start_address)
+
+        self._blocks.predecode(self, disassembly.Blocks)
+        self._program = self._rom_cache.add(key, DecodedProgram(program_bytes, start_address, self._blocks.blocks(),
+                                                                disassembly))
+
+    def disassembly(self):
+        """
+        Return static disassembly of loaded program (see parser.disassembler) or None
+        """
+
+        return self._program.Disassembly if self._program is not None else None
 
     def _get_next_instruction(self):
         opcode = self._get_next_instruction_opcode()
+        instruction = self._decode_table[opcode]
+
+        if instruction is None:
+            # raises error about unknown instruction
+            return self._instruction_factory.from_opcode(opcode.to_bytes(2, 'big'))
 
-        return self._instruction_factory.from_opcode(opcode)
+        return instruction
 
     def _get_next_instruction_opcode(self):
-        return bytearray([self.Memory[self.PC], self.Memory[self.PC + 1]])
+        return (self.Memory[self.PC] << 8) | self.Memory[self.PC + 1]
 
     def _end_program_reached(self):
         return self.ExitCode is not None or self.PC >= self.MemorySize \
-               or self._get_next_instruction_opcode() == bytearray([0, 0])
+               or self._get_next_instruction_opcode() == 0
 
     _standard_sprites = [0xF0, 0x90, 0x90, 0x90, 0xF0,  # 0
                          0x20, 0x60, 0x20, 0x20, 0x70,  # 1
@@ -97,14 +477,22 @@ class Machine:
                          0xF0, 0x80, 0xF0, 0x80, 0xF0,  # E
                          0xF0, 0x80, 0xF0, 0x80, 0x80]  # F
 
+    _clean_memories = {}  # memory size -> bytes of memory with only standard sprites
+
     @staticmethod
     def create_memory(memory_size):
-        memory = bytearray(memory_size)
+        return bytearray(Machine._clean_memory(memory_size))
+
+    @staticmethod
+    def _clean_memory(memory_size) -> bytes:
+        clean_memory = Machine._clean_memories.get(memory_size)
 
-        for i in range(len(Machine._standard_sprites)):
-            memory[i] = Machine._standard_sprites[i]
+        if clean_memory is None:
+            memory = bytearray(memory_size)
+            memory[:len(Machine._standard_sprites)] = bytes(Machine._standard_sprites)
+            clean_memory = Machine._clean_memories[memory_size] = bytes(memory)
 
-        return memory
+        return clean_memory
 
     @staticmethod
     def _create_font_dict():
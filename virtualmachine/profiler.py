@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Profiler - opt-in instrumentation of machine (see Machine.enable_profiling)
+
+Machine with profiler executes instructions one by one by step function of profiler,
+machine without profiler runs its usual step function, so disabled profiling costs nothing
+Profiler collects:
+ Counts, Times - amount of executions and total time (seconds) by instruction class name
+ Addresses - amount of executions by address of instruction
+ SpritePixels, SpriteCollisions - amount of pixels drawn by DrawSprite and amount of draws with collision
+ Stacks - total time by call stack (subroutines are tracked by Jsr and Rts), it is dumped as folded stacks
+ for flame graph tools (flamegraph.pl, speedscope): 'main;sub_2A0;DrawSprite 1234' (time in microseconds)
+"""
+
+import time
+from collections import Counter
+
+
+class Profiler:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.Counts = Counter()
+        self.Times = Counter()
+        self.Addresses = Counter()
+        self.SpritePixels = 0
+        self.SpriteCollisions = 0
+        self.Stacks = Counter()
+        self._call_stack = ['main']
+
+    def create_step(self, machine, execute_instruction):
+        """
+        Return step function of machine which executes single instruction by execute_instruction and profiles it
+        """
+
+        from parser.instruction_factory import InstructionFactory
+        from virtualmachine.instructions import DrawSprite, Jsr, Rts
+
+        decode_table = InstructionFactory.shared().decode_table()
+        clock = time.perf_counter
+
+        def step(budget: int = 1):
+            # single instruction fits into any budget of run
+            pc = machine.PC
+            instruction = None
+            if pc < machine.MemorySize - 1:
+                instruction = decode_table[(machine.Memory[pc] << 8) | machine.Memory[pc + 1]]
+
+            if isinstance(instruction, DrawSprite):
+                sprite = machine.Memory[machine.AddressRegister:machine.AddressRegister + instruction.n]
+                pixels = sum(bin(line).count('1') for line in sprite)
+
+            start = clock()
+            executed = execute_instruction()
+            elapsed = clock() - start
+
+            if executed == 0 or instruction is None:
+                return executed
+
+            name = type(instruction).__name__
+            self.Counts[name] += 1
+            self.Times[name] += elapsed
+            self.Addresses[pc] += 1
+            self.Stacks[';'.join(self._call_stack) + ';' + name] += elapsed
+
+            if isinstance(instruction, DrawSprite):
+                self.SpritePixels += pixels
+                self.SpriteCollisions += machine.VRegisters[0xF]
+            elif isinstance(instruction, Jsr):
+                self._call_stack.append('sub_{:03X}'.format(instruction.nnn))
+            elif isinstance(instruction, Rts) and len(self._call_stack) > 1:
+                self._call_stack.pop()
+
+            return executed
+
+        return step
+
+    def hot_addresses(self, amount: int = 10) -> list:
+        """
+        Return list of (address, executions) of most executed instructions
+        """
+
+        return self.Addresses.most_common(amount)
+
+    def report(self) -> dict:
+        return {
+            'instructions': {name: {'count': count, 'seconds': self.Times[name],
+                                    'mean_ns': self.Times[name] / count * 1e9}
+                             for name, count in sorted(self.Counts.items())},
+            'hot_addresses': [[address, count] for address, count in self.hot_addresses()],
+            'sprite_pixels': self.SpritePixels,
+            'sprite_collisions': self.SpriteCollisions
+        }
+
+    def folded_stacks(self) -> list:
+        return ['{} {}'.format(stack, round(seconds * 1e6)) for stack, seconds in sorted(self.Stacks.items())]
+
+    def save_folded_stacks(self, filename: str):
+        with open(filename, 'w') as stacks_file:
+            for line in self.folded_stacks():
+                stacks_file.write(line)
+                stacks_file.write('\n')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+"""
+RewindBuffer - bounded history of machine states for stepping backwards
+
+States are snapshots of machine (see Machine.save_state) pushed one by one (every instruction or every frame)
+Every keyframe_interval-th state is stored as is (keyframe), other states are stored as XOR of state
+and its keyframe compressed by zlib, they are mostly zeros because memory and screen change little
+When buffer is over capacity the oldest keyframe is dropped together with its states,
+so buffer keeps from capacity - keyframe_interval + 1 to capacity states
+Any state is restored by single XOR with its keyframe, without replaying of instructions
+"""
+
+import zlib
+from collections import deque
+
+
+class RewindBuffer:
+    def __init__(self, capacity: int = 600, keyframe_interval: int = 60):
+        if capacity <= 0 or keyframe_interval <= 0:
+            raise ValueError('Capacity and keyframe interval must be positive')
+
+        if capacity < keyframe_interval:
+            raise ValueError('Capacity must be not less than keyframe interval')
+
+        self._capacity = capacity
+        self._keyframe_interval = keyframe_interval
+        self._segments = deque()  # [keyframe, list of (length, compressed delta)]
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, machine):
+        self.push_state(machine.save_state())
+
+    def push_state(self, state: bytes):
+        if len(self._segments) == 0 or len(self._segments[-1][1]) + 1 >= self._keyframe_interval:
+            self._segments.append([state, []])
+        else:
+            keyframe = self._segments[-1][0]
+            self._segments[-1][1].append((len(state), zlib.compress(RewindBuffer._xor(state, keyframe))))
+
+        self._size += 1
+
+        while self._size > self._capacity:
+            self._drop_oldest()
+
+    def state(self, steps_back: int = 0) -> bytes:
+        """
+        Return state pushed steps_back pushes before the last one
+        """
+
+        if steps_back < 0 or steps_back >= self._size:
+            raise IndexError('There is no state {} steps back'.format(steps_back))
+
+        for keyframe, deltas in reversed(self._segments):
+            if steps_back <= len(deltas):
+                index = len(deltas) - steps_back
+                if index == 0:
+                    return keyframe
+
+                length, delta = deltas[index - 1]
+                return RewindBuffer._xor(zlib.decompress(delta), keyframe)[:length]
+
+            steps_back -= len(deltas) + 1
+
+    def rewind(self, machine, steps: int = 1) -> bool:
+        """
+        Load into machine state pushed steps pushes ago (1 is the last pushed state), drop it and all newer states
+        Return False if there are not so many states
+        """
+
+        if steps <= 0 or steps > self._size:
+            return False
+
+        machine.load_state(self.state(steps - 1))
+
+        for _ in range(steps):
+            self._drop_newest()
+
+        return True
+
+    def clear(self):
+        self._segments.clear()
+        self._size = 0
+
+    def _drop_newest(self):
+        keyframe, deltas = self._segments[-1]
+
+        if len(deltas) != 0:
+            deltas.pop()
+        else:
+            self._segments.pop()
+
+        self._size -= 1
+
+    def _drop_oldest(self):
+        keyframe, deltas = self._segments.popleft()
+        self._size -= len(deltas) + 1
+
+    @staticmethod
+    def _xor(first: bytes, second: bytes) -> bytes:
+        length = max(len(first), len(second))
+
+        return (int.from_bytes(first.ljust(length, b'\0'), 'big')
+                ^ int.from_bytes(second.ljust(length, b'\0'), 'big')).to_bytes(length, 'big')
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+"""
+RomCache - process-wide cache of decoded programs keyed by hash of program bytes
+
+Machine.load_program looks program up in the cache: known program is not decoded again,
+machine gets copies of its predecoded basic blocks (and blocks compiled by JIT, if any), so it starts hot
+Cached blocks are never executed, every machine works with its own copies (copy on write),
+so hits of blocks and invalidation by writes into code stay private to machine
+Only blocks covering program code are cached: blocks decoded past the end of program depend on memory
+of machine which decoded them, other machines build them from their own memory
+Block compiled by machine is published into cache only if its code is unchanged program code
+
+Programs are evicted in LRU order when estimated size of cache is over max_size,
+size is estimated for program, its disassembly and blocks, it is updated when compiled block is published
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class DecodedProgram:
+    BLOCK_SIZE = 400  # estimated bytes of block without instructions (instructions are shared by decode table)
+    INSTRUCTION_SIZE = 8
+    COMPILED_SIZE = 4096  # estimated bytes of compiled function
+    DISASSEMBLY_INSTRUCTION_SIZE = 100  # estimated bytes of entry of Disassembly.Instructions
+    DISASSEMBLY_BLOCK_SIZE = 300  # estimated bytes of ControlFlowBlock
+
+    def __init__(self, program: bytes, start_address: int, blocks: dict, disassembly=None):
+        self.Program = program
+        self.StartAddress = start_address
+        self.Disassembly = disassembly  # static analysis of program, see parser.disassembler
+        self._blocks = {start: block for start, block in blocks.items() if self._covers(block)}
+        self._lock = threading.Lock()
+        self._size = self._program_size() + sum(DecodedProgram._block_size(block) for block in self._blocks.values())
+
+    def blocks(self) -> list:
+        """
+        Return copies of cached blocks
+        """
+
+        with self._lock:
+            return [block.copy() for block in self._blocks.values()]
+
+    def add_compiled(self, memory, block) -> int:
+        """
+        Publish block compiled by machine with given memory if block covers only unchanged program code
+        Return change of estimated size
+        """
+
+        if not self._covers(block):
+            return 0
+
+        start = block.Start - self.StartAddress
+        end = block.CodeEnd - self.StartAddress
+
+        if memory[block.Start:block.CodeEnd] != self.Program[start:end]:
+            return 0
+
+        with self._lock:
+            previous = self._blocks.get(block.Start)
+            self._blocks[block.Start] = block.copy()
+
+            change = DecodedProgram._block_size(block)
+            if previous is not None:
+                change -= DecodedProgram._block_size(previous)
+
+            self._size += change
+
+        return change
+
+    def _covers(self, block) -> bool:
+        return self.StartAddress <= block.Start and block.CodeEnd <= self.StartAddress + len(self.Program)
+
+    def _program_size(self) -> int:
+        size = len(self.Program)
+
+        if self.Disassembly is not None:
+            size += DecodedProgram.DISASSEMBLY_INSTRUCTION_SIZE * len(self.Disassembly.Instructions)
+            size += DecodedProgram.DISASSEMBLY_BLOCK_SIZE * len(self.Disassembly.Blocks)
+
+        return size
+
+    @staticmethod
+    def _block_size(block) -> int:
+        size = DecodedProgram.BLOCK_SIZE + DecodedProgram.INSTRUCTION_SIZE * block.Size
+        if block.Compiled is not None:
+            size += DecodedProgram.COMPILED_SIZE
+
+        return size
+
+    def size(self) -> int:
+        """
+        Return estimated bytes of program, its disassembly and cached blocks
+        """
+
+        with self._lock:
+            return self._size
+
+
+class RomCache:
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        if max_size < 0:
+            raise ValueError('Max size of cache must be non-negative')
+
+        self.MaxSize = max_size
+        self.Hits = 0
+        self.Misses = 0
+        self._programs = OrderedDict()
+        self._size = 0  # estimated size of all programs
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared():
+        """
+        Return cache shared by all machines of process
+        """
+
+        with RomCache._shared_lock:
+            if RomCache._shared is None:
+                RomCache._shared = RomCache()
+
+            return RomCache._shared
+
+    @staticmethod
+    def key(program, start_address: int, memory_size: int):
+        return hashlib.blake2b(program, digest_size=16).digest(), start_address, memory_size
+
+    def get(self, key) -> DecodedProgram:
+        with self._lock:
+            decoded = self._programs.get(key)
+
+            if decoded is None:
+                self.Misses += 1
+                return None
+
+            self.Hits += 1
+            self._programs.move_to_end(key)
+
+            return decoded
+
+    def add(self, key, decoded: DecodedProgram) -> DecodedProgram:
+        with self._lock:
+            previous = self._programs.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size()
+
+            self._programs[key] = decoded
+            self._size += decoded.size()
+            self._evict()
+
+        return decoded
+
+    def add_compiled(self, key, memory, block):
+        """
+        Publish block compiled by machine into cached program with given key (see DecodedProgram.add_compiled)
+        """
+
+        with self._lock:
+            decoded = self._programs.get(key)
+
+            if decoded is None:
+                return
+
+            self._programs.move_to_end(key)
+            self._size += decoded.add_compiled(memory, block)
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.MaxSize and len(self._programs) != 0:
+            _, program = self._programs.popitem(last=False)
+            self._size -= program.size()
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+            self._size = 0
+
+    def size(self) -> int:
+        with self._lock:
+            return self._size
+
+    def __len__(self):
+        return len(self._programs)
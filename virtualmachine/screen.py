@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 
+"""
+Screen - monochrome screen of machine
+Every row is stored as integer, most significant bit of row is left pixel
+Sprites are drawn by whole rows: one XOR per row, collision is AND of row and sprite row
+Changed rows are collected into dirty rows bitmask (bit y is row y) and every change increases generation,
+so drawer may skip frames without changes and redraw only changed rows
+"""
+
 
 class Screen:
     def __init__(self, height=32, width=64):
-        self._screen = []
         self._height = height
         self._width = width
-        for i in range(self._height):
-            self._screen.append([0] * self._width)
+        self._row_mask = (1 << width) - 1
+        self._rows = [0] * self._height
+        self._dirty_rows = 0
+        self._generation = 0
 
     def height(self):
         return self._height
@@ -21,16 +30,106 @@ class Screen:
         y = y % self._height
         x = x % self._width
 
-        self._screen[y][x] ^= value
+        bit = value << (self._width - 1 - x)
+        collision = self._rows[y] & bit != 0
+        self._rows[y] ^= bit
+
+        if bit != 0:
+            self._dirty_rows |= 1 << y
+            self._generation += 1
 
-        return value == 1 and self._screen[y][x] == 0  # return 1 if collision
+        return collision  # return 1 if collision
 
     def get_pixel(self, y, x):
         y = y % self._height
         x = x % self._width
-        return self._screen[y][x]
+        return (self._rows[y] >> (self._width - 1 - x)) & 1
+
+    def draw_sprite(self, y, x, sprite) -> int:
+        """
+        XOR sprite (sequence of bytes, one byte per row) at screen, sprite is wrapped around edges of screen
+        Return 1 if any pixel was erased
+        """
+
+        width = self._width
+        height = self._height
+        rows = self._rows
+        shift = width - 8 - x % width
+        collision = 0
+        dirty = 0
+
+        for i, line in enumerate(sprite):
+            if line == 0:
+                continue
+
+            if shift >= 0:
+                bits = line << shift
+            else:
+                bits = ((line >> -shift) | (line << (width + shift))) & self._row_mask
+
+            row = (y + i) % height
+            collision |= rows[row] & bits
+            rows[row] ^= bits
+            dirty |= 1 << row
+
+        if dirty != 0:
+            self._dirty_rows |= dirty
+            self._generation += 1
+
+        return 1 if collision else 0
+
+    def to_bytes(self) -> bytes:
+        """
+        Return pixels packed by rows, every byte contains 8 pixels, left pixel is most significant bit
+        """
+
+        padding = -self._width % 8
+        row_size = (self._width + 7) // 8
+
+        return b''.join((row << padding).to_bytes(row_size, 'big') for row in self._rows)
+
+    def load_bytes(self, pixels: bytes):
+        """
+        Set pixels packed like to_bytes returns
+        """
+
+        padding = -self._width % 8
+        row_size = (self._width + 7) // 8
+
+        if len(pixels) != row_size * self._height:
+            raise ValueError('Packed pixels must have {} bytes'.format(row_size * self._height))
+
+        for y in range(self._height):
+            self._rows[y] = int.from_bytes(pixels[y * row_size:(y + 1) * row_size], 'big') >> padding
+
+        self._dirty_rows |= (1 << self._height) - 1
+        self._generation += 1
+
+    def generation(self) -> int:
+        """
+        Return counter which is increased by every change of pixels
+        """
+
+        return self._generation
+
+    def take_dirty_rows(self) -> int:
+        """
+        Return bitmask of rows changed since previous call (bit y is row y) and reset it
+        """
+
+        dirty = self._dirty_rows
+        self._dirty_rows = 0
+
+        return dirty
 
     def clear(self):
+        dirty = 0
+
         for y in range(self._height):
-            for x in range(self._width):
-                self._screen[y][x] = 0
+            if self._rows[y] != 0:
+                dirty |= 1 << y
+            self._rows[y] = 0
+
+        if dirty != 0:
+            self._dirty_rows |= dirty
+            self._generation += 1
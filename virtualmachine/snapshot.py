@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""
+Snapshot - complete state of machine as versioned binary blob (see Machine.save_state and Machine.load_state)
+
+Format (big endian):
+ header: magic b'CH8S', version (2 bytes)
+ state: PC (2), AddressRegister (8, Adi doesn't wrap it), memory size (2), DelayTimer (1), SoundTimer (1), flags (1),
+        exit code (1), keyboard mask (2, bit i is key i), stack size (2)
+ cycles (8), state of Random: 625 words (4 per word)
+ V registers (16), stack from bottom to top (2 per item), memory (memory size), screen packed by rows
+Flags: bit 0 - Block, bit 1 - CompatibilityLoadStore, bit 2 - ExitCode is set
+"""
+
+import struct
+
+from virtualmachine.stack import Stack
+
+MAGIC = b'CH8S'
+VERSION = 3
+
+_HEADER = struct.Struct('>4sH')
+_STATE = struct.Struct('>HQHBBBBHH')
+_RANDOM = struct.Struct('>Q625I')
+_RANDOM_VERSION = 3  # version of state of random.Random
+
+_BLOCK_FLAG = 1
+_COMPATIBILITY_FLAG = 2
+_EXIT_FLAG = 4
+
+
+class SnapshotError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+
+
+def save_state(machine) -> bytes:
+    stack = list(machine.Stack.items())[::-1]
+    keys = machine.Keyboard.mask()
+
+    flags = (_BLOCK_FLAG if machine.Block else 0) \
+        | (_COMPATIBILITY_FLAG if machine.CompatibilityLoadStore else 0) \
+        | (_EXIT_FLAG if machine.ExitCode is not None else 0)
+
+    return b''.join([
+        _HEADER.pack(MAGIC, VERSION),
+        _STATE.pack(machine.PC, machine.AddressRegister, machine.MemorySize,
+                    machine.DelayTimer.get_count(), machine.SoundTimer.get_count(), flags,
+                    machine.ExitCode or 0, keys, len(stack)),
+        _RANDOM.pack(machine.Cycles, *machine.Random.getstate()[1]),
+        bytes(machine.VRegisters),
+        struct.pack('>{}H'.format(len(stack)), *stack),
+        bytes(machine.Memory),
+        machine.Screen.to_bytes()
+    ])
+
+
+def load_state(machine, data: bytes):
+    """
+    Load state saved by save_state into machine, snapshot must be saved from machine with the same memory size
+    """
+
+    data = memoryview(data)
+
+    if len(data) < _HEADER.size + _STATE.size:
+        raise SnapshotError('Snapshot is too short')
+
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError('It is not snapshot of machine')
+    if version != VERSION:
+        raise SnapshotError('Unsupported version of snapshot: {}'.format(version))
+
+    pc, address, memory_size, delay, sound, flags, exit_code, keys, stack_size = _STATE.unpack_from(data, _HEADER.size)
+
+    if memory_size != machine.MemorySize:
+        raise SnapshotError('Snapshot has memory size {}, machine has {}'.format(memory_size, machine.MemorySize))
+
+    offset = _HEADER.size + _STATE.size
+    screen_size = len(machine.Screen.to_bytes())
+
+    if len(data) != offset + _RANDOM.size + 16 + 2 * stack_size + memory_size + screen_size:
+        raise SnapshotError('Snapshot has wrong size')
+
+    cycles, *random_state = _RANDOM.unpack_from(data, offset)
+    offset += _RANDOM.size
+
+    registers = data[offset:offset + 16]
+    offset += 16
+    stack = struct.unpack_from('>{}H'.format(stack_size), data, offset)
+    offset += 2 * stack_size
+    memory = data[offset:offset + memory_size]
+    offset += memory_size
+
+    machine.Memory[:] = memory
+    machine.VRegisters[:] = registers
+    machine.Screen.load_bytes(data[offset:])
+    machine.PC = pc
+    machine.AddressRegister = address
+    machine.DelayTimer.set_count(delay)
+    machine.SoundTimer.set_count(sound)
+    machine.Block = flags & _BLOCK_FLAG != 0
+    machine.CompatibilityLoadStore = flags & _COMPATIBILITY_FLAG != 0
+    machine.ExitCode = exit_code if flags & _EXIT_FLAG else None
+    machine.Cycles = cycles
+    machine.Random.setstate((_RANDOM_VERSION, tuple(random_state), None))
+
+    machine.Stack = Stack()
+    for item in stack:
+        machine.Stack.push(item)
+
+    machine.Keyboard.set_mask(keys)